@@ -0,0 +1,107 @@
+"""
+Benchmark for the database JSON codecs
+Builds a synthetic Users shard (5,000 players with 10 weeks of stats, the
+shape Import._store_stats_fields writes) and times saving and loading it with:
+  - stdlib json, indent=2 (the old on-disk format)
+  - stdlib json, compact
+  - orjson, compact (skipped if orjson isn't installed)
+
+Run from the bot folder: python bench_database.py [players] [weeks]
+"""
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CATEGORIES = {
+    "QB": ["CMP", "ATT", "YDS", "TD", "INT", "RATING"],
+    "WR": ["REC", "YDS", "TD", "LNG", "DROPS"],
+    "DEF": ["TKL", "SACK", "INT", "PD", "FF"],
+}
+REPEATS = 5
+
+
+def build_table(players: int, weeks: int) -> dict:
+    rng = random.Random(42)
+    guild = {}
+    for index in range(players):
+        user_id = str(100000000000000000 + index)
+        category = rng.choice(list(CATEGORIES))
+        week_data = {}
+        for week in range(1, weeks + 1):
+            week_data[f"week_{week}"] = {
+                category: {field: str(rng.randint(0, 400)) for field in CATEGORIES[category]}
+            }
+        guild[user_id] = {
+            "contract": f"{rng.randint(1, 3)} seasons",
+            "demands": str(rng.randint(0, 3)),
+            "stats": {
+                "weeks": week_data,
+                "meta": {"last_import_week": weeks, "weeks_imported": list(range(1, weeks + 1))},
+                "season_totals": {category: {field: rng.randint(0, 4000) for field in CATEGORIES[category]}},
+            },
+        }
+    return {"123456789012345678": guild}
+
+
+def codecs():
+    yield "json indent=2", (
+        lambda data: json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8"),
+        json.loads,
+    )
+    yield "json compact", (
+        lambda data: json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        json.loads,
+    )
+    if orjson is not None:
+        yield "orjson compact", (
+            lambda data: orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS),
+            orjson.loads,
+        )
+
+
+def best_of(func) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    weeks = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    table = build_table(players, weeks)
+
+    print(f"{players} players x {weeks} weeks, best of {REPEATS}")
+    print(f"{'codec':<16}{'size (KiB)':>12}{'save (ms)':>12}{'load (ms)':>12}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = Path(folder) / "Users.json"
+        for name, (dumps, loads) in codecs():
+            def save():
+                path.write_bytes(dumps(table))
+
+            def load():
+                return loads(path.read_bytes())
+
+            save_time = best_of(save)
+            load_time = best_of(load)
+            assert load() == table
+            size = path.stat().st_size / 1024
+            print(f"{name:<16}{size:>12.0f}{save_time * 1000:>12.1f}{load_time * 1000:>12.1f}")
+
+    if orjson is None:
+        print("orjson is not installed, pip install orjson to compare it")
+
+
+if __name__ == "__main__":
+    main()
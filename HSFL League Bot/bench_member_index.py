@@ -0,0 +1,90 @@
+"""
+Benchmark for resolving sheet names to members
+Compares the old disnake.utils.find scan over guild.members (lower() on the
+username and display name of every member, per row) with building a
+utils.member_index.MemberIndex once and looking every row up in it
+
+Three quarters of the names belong to members spread through the guild,
+the rest match nobody (the slow case for the scan, it reads every member)
+
+Run from the bot folder: python bench_member_index.py [members] [rows]
+"""
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+import disnake
+
+from utils.member_index import MemberIndex
+
+REPEATS = 3
+
+
+def build(members: int, rows: int):
+    rng = random.Random(7)
+    guild_members = []
+    for index in range(members):
+        name = f"user{index}"
+        nick = f"Player {index}" if index % 3 == 0 else None
+        guild_members.append(SimpleNamespace(id=index + 1, name=name, global_name=None, display_name=nick or name))
+
+    names = []
+    for row in range(rows):
+        if row % 4 == 3:
+            names.append(f"nobody{row}")
+        else:
+            names.append(rng.choice(guild_members).display_name.upper())
+    return guild_members, names
+
+
+def legacy_resolve(members, names):
+    resolved = []
+    for name in names:
+        def _match(member):
+            target = name.lower()
+            return (
+                member.name.lower() == target
+                or (member.display_name and member.display_name.lower() == target)
+            )
+
+        member = disnake.utils.find(_match, members)
+        resolved.append(member.id if member else None)
+    return resolved
+
+
+def index_resolve(members, names):
+    index = MemberIndex(members)
+    return [index.get(name) for name in names]
+
+
+def best_of(func) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    members = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    guild_members, names = build(members, rows)
+
+    assert legacy_resolve(guild_members, names) == index_resolve(guild_members, names)
+
+    legacy_time = best_of(lambda: legacy_resolve(guild_members, names))
+    index_time = best_of(lambda: index_resolve(guild_members, names))
+    build_time = best_of(lambda: MemberIndex(guild_members))
+
+    print(f"{rows} names against {members} members, best of {REPEATS}")
+    print(f"{'lookup':<16}{'total (ms)':>12}{'per row (us)':>16}")
+    for name, elapsed in (("find scan", legacy_time), ("index", index_time)):
+        print(f"{name:<16}{elapsed * 1000:>12.2f}{elapsed / rows * 1e6:>16.2f}")
+    print(f"index build alone: {build_time * 1000:.2f} ms")
+    print(f"{legacy_time / index_time:.0f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark for role membership checks
+Compares the old has_role loop (every configured id against every role the
+member holds, int() on both sides) with the set intersection against
+member._roles that utils.settings.matching_roles does now
+
+Members hold 50+ roles, the TeamRole table has 30 teams. Half the members
+are on a team, half aren't (the slow case for the loop, nothing matches)
+
+Run from the bot folder: python bench_roles.py [member_roles] [team_roles]
+"""
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+from disnake.utils import SnowflakeList
+
+from utils.settings import matching_roles, parse_ids
+
+GUILD_ID = 123456789012345678
+MEMBERS = 1000
+REPEATS = 5
+
+
+class FakeRole:
+    __slots__ = ("id",)
+
+    def __init__(self, role_id):
+        self.id = role_id
+
+
+class FakeMember:
+    """
+    Just enough of disnake.Member: _roles holds the sorted role ids and
+    roles builds Role objects on every access, like the real property
+    """
+
+    def __init__(self, role_ids):
+        self._roles = SnowflakeList(role_ids)
+        self.guild = SimpleNamespace(id=GUILD_ID)
+
+    @property
+    def roles(self):
+        roles = [FakeRole(role_id) for role_id in self._roles]
+        roles.append(FakeRole(GUILD_ID))
+        return roles
+
+
+def legacy_has_role(data, member):
+    for row in data:
+        for role in member.roles:
+            if int(role.id) == int(row):
+                return True
+    return False
+
+
+def set_has_role(team_ids, member):
+    return bool(matching_roles(team_ids, member))
+
+
+def build(member_roles: int, team_roles: int):
+    rng = random.Random(7)
+    # Stored the way the database holds them, as strings
+    stored_teams = [str(900000000000000000 + index) for index in range(team_roles)]
+    other_roles = [800000000000000000 + index for index in range(500)]
+
+    members = []
+    for index in range(MEMBERS):
+        role_ids = rng.sample(other_roles, member_roles)
+        if index % 2:
+            role_ids[0] = int(rng.choice(stored_teams))
+        members.append(FakeMember(role_ids))
+    return stored_teams, members
+
+
+def best_of(func) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    member_roles = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    team_roles = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    stored_teams, members = build(member_roles, team_roles)
+    team_ids = frozenset(parse_ids(stored_teams))
+
+    legacy = [legacy_has_role(stored_teams, member) for member in members]
+    assert legacy == [set_has_role(team_ids, member) for member in members]
+
+    legacy_time = best_of(lambda: [legacy_has_role(stored_teams, member) for member in members])
+    set_time = best_of(lambda: [set_has_role(team_ids, member) for member in members])
+
+    print(f"{MEMBERS} members x {member_roles} roles against {team_roles} team roles, best of {REPEATS}")
+    print(f"{'check':<16}{'total (ms)':>12}{'per call (us)':>16}")
+    for name, elapsed in (("nested loop", legacy_time), ("set", set_time)):
+        print(f"{name:<16}{elapsed * 1000:>12.2f}{elapsed / MEMBERS * 1e6:>16.2f}")
+    print(f"{legacy_time / set_time:.0f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark for season totals on import
+Compares the old import step (write the week, then recompute the totals
+from every week the player has) with utils.season_totals.apply_week_fields,
+which moves running sums by the fields that changed
+
+Every player already has the earlier weeks in four categories, the timed
+step imports the last week for every player
+
+Run from the bot folder: python bench_season_totals.py [players] [weeks]
+"""
+import copy
+import random
+import sys
+import time
+
+from utils.season_totals import apply_week_fields, recalculate_season_totals
+
+REPEATS = 5
+CATEGORIES = {
+    "PASSING": ["Comp", "Att", "Yds", "TD", "INT", "Rating", "Pct"],
+    "RUSHING": ["Att", "Yds", "TD", "Long", "Fumbles"],
+    "RECEIVING": ["Rec", "Yds", "TD", "Long", "Drops"],
+    "DEFENSE": ["Tackles", "Sacks", "INT", "PD", "FF"],
+}
+
+
+def week_fields(rng):
+    return {
+        category: {
+            field: rng.choice([str(rng.randint(0, 300)), f"{rng.randint(0, 1000) / 10}%", f"{rng.randint(5, 80)}T"])
+            if field in ("Long", "Pct")
+            else str(rng.randint(0, 300))
+            for field in fields
+        }
+        for category, fields in CATEGORIES.items()
+    }
+
+
+def build(players: int, weeks: int):
+    rng = random.Random(7)
+    seeded = []
+    for _ in range(players):
+        stats = {}
+        for week in range(1, weeks):
+            for category, fields in week_fields(rng).items():
+                apply_week_fields(stats, f"week_{week}", category, fields)
+        seeded.append(stats)
+    imports = [week_fields(rng) for _ in range(players)]
+    return seeded, imports
+
+
+def legacy_import(players, imports, week_key):
+    for stats, categories in zip(players, imports):
+        for category, fields in categories.items():
+            stats.setdefault("weeks", {}).setdefault(week_key, {}).setdefault(category, {}).update(fields)
+            recalculate_season_totals(stats)
+
+
+def incremental_import(players, imports, week_key):
+    for stats, categories in zip(players, imports):
+        for category, fields in categories.items():
+            apply_week_fields(stats, week_key, category, fields)
+
+
+def best_of(seeded, imports, func, week_key) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        players = copy.deepcopy(seeded)
+        start = time.perf_counter()
+        func(players, imports, week_key)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    player_count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    weeks = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    seeded, imports = build(player_count, weeks)
+    week_key = f"week_{weeks}"
+
+    legacy = copy.deepcopy(seeded)
+    legacy_import(legacy, imports, week_key)
+    incremental = copy.deepcopy(seeded)
+    incremental_import(incremental, imports, week_key)
+    assert [stats["season_totals"] for stats in legacy] == [stats["season_totals"] for stats in incremental]
+
+    legacy_time = best_of(seeded, imports, legacy_import, week_key)
+    incremental_time = best_of(seeded, imports, incremental_import, week_key)
+
+    print(f"Importing week {weeks} for {player_count} players ({len(CATEGORIES)} categories), best of {REPEATS}")
+    print(f"{'totals':<16}{'total (ms)':>12}{'per player (us)':>18}")
+    for name, elapsed in (("full recompute", legacy_time), ("incremental", incremental_time)):
+        print(f"{name:<16}{elapsed * 1000:>12.2f}{elapsed / player_count * 1e6:>18.2f}")
+    print(f"{legacy_time / incremental_time:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark for stat leaderboards
+Compares ranking players by walking every player's nested week dicts (what
+a leaderboard over the Users data has to do) with utils.stats_engine,
+which lays each stat out as a players x weeks array once and answers
+queries from that. Uses numpy when it's installed, plain dicts otherwise
+
+Run from the bot folder: python bench_stats_engine.py [players] [weeks]
+"""
+import random
+import sys
+import time
+
+from utils.season_totals import to_number
+from utils.stats_engine import GuildStats, StatsEngine
+
+REPEATS = 5
+QUERIES = 50
+CATEGORIES = {
+    "PASSING": ["Comp", "Att", "Yds", "TD", "INT", "Rating"],
+    "RUSHING": ["Att", "Yds", "TD", "Long", "Fumbles"],
+    "RECEIVING": ["Rec", "Yds", "TD", "Long", "Drops"],
+    "DEFENSE": ["Tackles", "Sacks", "INT", "PD", "FF"],
+}
+
+
+def build(players: int, weeks: int) -> dict:
+    rng = random.Random(7)
+    users = {}
+    for player in range(players):
+        player_weeks = {}
+        for week in range(1, weeks + 1):
+            if rng.random() < 0.2:
+                continue
+            player_weeks[f"week_{week}"] = {
+                category: {field: str(rng.randint(0, 300)) for field in fields if rng.random() < 0.8}
+                for category, fields in CATEGORIES.items()
+                if rng.random() < 0.5
+            }
+        users[str(100000 + player)] = {"stats": {"weeks": player_weeks}}
+    return users
+
+
+def legacy_leaderboard(users, category, stat, limit=10):
+    totals = []
+    for player, record in users.items():
+        total = None
+        for categories in record["stats"]["weeks"].values():
+            number = to_number(categories.get(category, {}).get(stat))
+            if number is not None:
+                total = (total or 0.0) + number
+        if total is not None:
+            totals.append((player, total))
+    totals.sort(key=lambda item: -item[1])
+    return totals[:limit]
+
+
+def best_of(func) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    weeks = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    users = build(players, weeks)
+    stats = GuildStats(users)
+    queries = [key for key in stats.labels.values()][:QUERIES]
+
+    for category, stat in queries:
+        legacy = legacy_leaderboard(users, category, stat)
+        engine = stats.leaderboard(category, stat)
+        assert [value for _, value in legacy] == [value for _, value in engine]
+
+    legacy_time = best_of(lambda: [legacy_leaderboard(users, *key) for key in queries]) / len(queries)
+    engine_time = best_of(lambda: [stats.leaderboard(*key) for key in queries]) / len(queries)
+    build_time = best_of(lambda: GuildStats(users))
+    search_time = best_of(lambda: [stats.search(query) for query in ("y", "pass", "td", "")]) / 4
+
+    backend = StatsEngine.get_stats()["backend"]
+    print(f"{players} players x {weeks} weeks, {len(stats.labels)} stats, {backend} backend, best of {REPEATS}")
+    print(f"{'leaderboard':<16}{'per query (ms)':>16}")
+    for name, elapsed in (("nested dicts", legacy_time), ("stats engine", engine_time)):
+        print(f"{name:<16}{elapsed * 1000:>16.3f}")
+    print(f"engine build: {build_time * 1000:.2f} ms, autocomplete search: {search_time * 1e6:.1f} us")
+    print(f"{legacy_time / engine_time:.0f}x faster per query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Benchmark for stat sheet parsing
+Compares the old parser (a dict per row, split into per-player dicts, then
+every header lowercased and matched again for every player) with
+utils.statsheet, which compiles each header row once and streams the rows
+
+The sheet has a few categories, each with a header row and four player
+sections per row (Name, Name_2...), like the league's weekly stat sheets
+
+Run from the bot folder: python bench_statsheet.py [rows]
+"""
+import csv
+import io
+import random
+import sys
+import time
+
+from utils.statsheet import IDENTIFIER_FIELDS, IGNORED_IDENTIFIERS, iter_player_rows
+
+REPEATS = 5
+CATEGORIES = {
+    "PASSING": ["Comp", "Att", "Yds", "TD", "INT", "Rating"],
+    "RUSHING": ["Att", "Yds", "TD", "Long", "Fumbles"],
+    "RECEIVING": ["Rec", "Yds", "TD", "Long", "Drops"],
+    "DEFENSE": ["Tackles", "Sacks", "INT", "PD", "FF"],
+}
+SECTIONS = 4
+
+
+def build(rows: int) -> str:
+    rng = random.Random(7)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    per_category = rows // len(CATEGORIES)
+
+    for category, stats in CATEGORIES.items():
+        writer.writerow([category] + [""] * (SECTIONS * (len(stats) + 3) - 1))
+        header = []
+        for _ in range(SECTIONS):
+            header += ["Name", "Contract", "Demands"] + stats
+        writer.writerow(header)
+
+        for row in range(per_category):
+            cells = []
+            for section in range(SECTIONS):
+                if rng.random() < 0.1:
+                    cells += [""] * (len(stats) + 3)
+                    continue
+                name = "Team Total" if rng.random() < 0.02 else f"player{row}_{section}"
+                cells += [
+                    name,
+                    rng.choice(["", "", "2 seasons"]),
+                    rng.choice(["", str(rng.randint(1, 9))]),
+                ]
+                cells += [rng.choice(["", str(rng.randint(0, 300))]) for _ in stats]
+            writer.writerow(cells)
+
+    return out.getvalue()
+
+
+def legacy_split_key_suffix(key):
+    if not key:
+        return "", ""
+    parts = key.rsplit("_", 1)
+    if len(parts) == 2 and parts[1].isdigit():
+        return parts[0], f"_{parts[1]}"
+    return key, ""
+
+
+def legacy_parse(csv_text):
+    rows = list(csv.reader(io.StringIO(csv_text)))
+    parsed_data = []
+    current_headers = None
+    current_header_map = None
+    current_category = "General"
+
+    for row in rows:
+        normalized_cells = [(cell or "").strip() for cell in row]
+        if not any(normalized_cells):
+            continue
+
+        lower_cells = [cell.lower() for cell in normalized_cells]
+
+        if len([cell for cell in normalized_cells if cell]) == 1 and normalized_cells[0].isupper():
+            current_category = normalized_cells[0]
+            continue
+
+        if {cell for cell in lower_cells if cell} & IDENTIFIER_FIELDS:
+            seen = {}
+            current_headers = []
+            current_header_map = {}
+            for idx, header in enumerate(normalized_cells):
+                header = header or f"Column_{idx + 1}"
+                header = header.strip() or f"Column_{idx + 1}"
+                base = header.lower()
+                count = seen.get(base, 0)
+                if count:
+                    current_headers.append(f"{header}_{count + 1}")
+                    seen[base] = count + 1
+                else:
+                    current_headers.append(header)
+                    seen[base] = 1
+                current_header_map[idx] = current_headers[-1]
+            continue
+
+        if not current_headers:
+            continue
+
+        record = {header: "" for header in current_headers}
+        for idx, value in enumerate(row):
+            header = current_header_map.get(idx)
+            if header is not None:
+                record[header] = value
+
+        record["__category"] = current_category
+        parsed_data.append(record)
+
+    return parsed_data
+
+
+def legacy_extract_player_rows(row):
+    suffix_map = {}
+    for key, value in row.items():
+        if key.startswith("__"):
+            continue
+        base, suffix = legacy_split_key_suffix(key)
+        suffix_map.setdefault(suffix, {})[base] = value
+
+    player_rows = []
+    for suffix, data in suffix_map.items():
+        if not any((str(val).strip() for val in data.values() if val not in (None, ""))):
+            continue
+        player_rows.append({**data, "__suffix": suffix})
+    return player_rows
+
+
+def legacy_match_field(row, *candidates):
+    normalized = {}
+    for key, value in row.items():
+        normalized_key = (key or "").strip().lower()
+        if normalized_key:
+            normalized[normalized_key] = value
+
+    for candidate in candidates:
+        candidate = candidate.strip().lower()
+        for key, value in normalized.items():
+            if key == candidate or key.startswith(f"{candidate}_"):
+                return value
+    return None
+
+
+def legacy_players(csv_text):
+    """
+    The old parse_csv_data followed by the per-player loop of _prepare_master_entries_from_parsed
+    """
+    players = []
+    for row_num, row in enumerate(legacy_parse(csv_text), start=2):
+        category = row.get("__category", "General")
+        for player_data in legacy_extract_player_rows(row):
+            player_data.pop("__suffix", None)
+            identifier = legacy_match_field(
+                player_data, "user_id", "discord_id", "discord id", "id", "username", "user", "name", "player"
+            )
+            if isinstance(identifier, str):
+                identifier = identifier.strip()
+            if not identifier:
+                continue
+            identifier_lower = identifier.lower()
+            if identifier_lower in IGNORED_IDENTIFIERS or identifier_lower.startswith("team "):
+                continue
+
+            contract = player_data.get("contract")
+            demands = player_data.get("demands")
+            stats = {}
+            for key, value in player_data.items():
+                key_lower = (key or "").strip().lower()
+                if key_lower in IDENTIFIER_FIELDS or key_lower in {"contract", "demands"}:
+                    continue
+                if value not in (None, ""):
+                    stats[key] = value
+
+            if not stats and contract is None and demands is None:
+                continue
+            players.append((row_num, category, identifier, contract, demands, stats))
+    return players
+
+
+def schema_players(csv_text):
+    return [tuple(player) for player in iter_player_rows(csv_text)]
+
+
+def best_of(func) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    csv_text = build(rows)
+
+    legacy = legacy_players(csv_text)
+    assert legacy == schema_players(csv_text)
+
+    legacy_time = best_of(lambda: legacy_players(csv_text))
+    schema_time = best_of(lambda: schema_players(csv_text))
+
+    print(f"{rows} rows x {SECTIONS} players ({len(legacy)} parsed, {len(csv_text) // 1024} KiB), best of {REPEATS}")
+    print(f"{'parser':<16}{'total (ms)':>12}{'per player (us)':>18}")
+    for name, elapsed in (("dict per row", legacy_time), ("schema", schema_time)):
+        print(f"{name:<16}{elapsed * 1000:>12.2f}{elapsed / len(legacy) * 1e6:>18.2f}")
+    print(f"{legacy_time / schema_time:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,17 @@ Clear all database files
 WARNING: This will delete all stored data!
 """
 
+import asyncio
 import os
 from pathlib import Path
 
+from dotenv import load_dotenv
+
+from utils.database import Database
+
+# DATABASE_BACKEND picks the store to clear, same as the bot
+load_dotenv()
+
 def clear_database():
     db_dir = Path("database")
     
@@ -24,26 +32,13 @@ def clear_database():
         print("[CANCELLED] Database clearance cancelled")
         return False
     
-    files_deleted = 0
-    errors = []
-    
     try:
-        for file_path in db_dir.glob("*.json"):
-            try:
-                file_path.unlink()
-                print(f"[DELETED] {file_path.name}")
-                files_deleted += 1
-            except Exception as e:
-                errors.append(f"Failed to delete {file_path.name}: {e}")
-                print(f"[ERROR] Failed to delete {file_path.name}: {e}")
+        tables_deleted = asyncio.run(Database.clear_all())
+        for key in tables_deleted:
+            print(f"[DELETED] {key}")
         
         print()
-        print(f"[SUCCESS] Deleted {files_deleted} database file(s)")
-        
-        if errors:
-            print(f"[WARNING] {len(errors)} error(s) occurred during deletion:")
-            for error in errors:
-                print(f"  - {error}")
+        print(f"[SUCCESS] Deleted {len(tables_deleted)} database table(s)")
         
         print()
         print("[INFO] Backups preserved in database/backups/")
@@ -19,7 +19,7 @@ class DatabaseMaintenance(commands.Cog):
         """
         await inter.response.defer()
         
-        report = await Database.verify_integrity()
+        report = await Database.verify_integrity(deep=True)
         
         embed = disnake.Embed(
             title="Database Health Check",
@@ -30,6 +30,14 @@ class DatabaseMaintenance(commands.Cog):
         embed.add_field(name="Corrupted Files", value=str(report["corrupted"]), inline=True)
         embed.add_field(name="Recovered Files", value=str(report["recovered"]), inline=True)
         
+        slowest = sorted(report["timings"].items(), key=lambda item: item[1], reverse=True)[:3]
+        timings_text = "\n".join(f"`{name}`: {ms:.1f} ms" for name, ms in slowest) or "None"
+        embed.add_field(
+            name=f"Parse Time ({report['duration']:.0f} ms total)",
+            value=timings_text,
+            inline=False
+        )
+        
         if report["errors"]:
             errors_text = "\n".join(report["errors"][:5])
             if len(report["errors"]) > 5:
@@ -38,6 +46,29 @@ class DatabaseMaintenance(commands.Cog):
         else:
             embed.add_field(name="Status", value="✅ All databases healthy", inline=False)
         
+        lock_stats = Database.get_lock_stats()
+        embed.add_field(
+            name="Lock Waits",
+            value=(
+                f"**Acquired**: {lock_stats['acquired']}\n"
+                f"**Avg**: {lock_stats['wait_avg'] * 1000:.2f} ms\n"
+                f"**Max**: {lock_stats['wait_max'] * 1000:.2f} ms\n"
+                f"**Timeouts**: {lock_stats['timeouts']}"
+            ),
+            inline=True
+        )
+        
+        cache_stats = Database.get_cache_stats()
+        embed.add_field(
+            name="Table Cache",
+            value=(
+                f"**Tables**: {cache_stats['tables']}\n"
+                f"**Hit Rate**: {cache_stats['hit_rate']:.1%}\n"
+                f"**Misses**: {cache_stats['misses']}"
+            ),
+            inline=True
+        )
+        
         await inter.followup.send(embed=embed)
     
     @commands.slash_command(name="db_backups")
@@ -108,23 +139,14 @@ class DatabaseMaintenance(commands.Cog):
             await button_inter.response.defer()
             
             try:
-                from pathlib import Path
-                import shutil
-                
-                db_dir = Path("database")
-                files_deleted = 0
-                
-                for file_path in db_dir.glob("*.json"):
-                    if file_path.name != ".gitkeep":
-                        file_path.unlink()
-                        files_deleted += 1
+                tables_deleted = await Database.clear_all()
                 
                 result_embed = disnake.Embed(
                     title="Database Cleared",
-                    description=f"Successfully deleted {files_deleted} database files",
+                    description=f"Successfully deleted {len(tables_deleted)} database tables",
                     color=disnake.Color.green()
                 )
-                result_embed.add_field(name="Files Deleted", value=str(files_deleted), inline=False)
+                result_embed.add_field(name="Tables Deleted", value=str(len(tables_deleted)), inline=False)
                 result_embed.add_field(name="Note", value="Backups and lock files were preserved", inline=False)
                 
                 await button_inter.followup.send(embed=result_embed)
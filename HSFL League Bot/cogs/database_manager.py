@@ -20,20 +20,18 @@ def _truncate(text: str, limit: int = 1900) -> str:
     return f"{text[: limit - 20]}...\n[truncated]"
 
 
-def _format_summary(value: Any) -> str:
+def _format_index_summary(info: dict) -> str:
     """
-    Provide a concise, human-readable summary for a database entry preview.
+    Summarise a key from its Database.get_db_summary() entry, without loading its data.
     """
-    if value is None:
-        return "empty"
-    if isinstance(value, dict):
-        keys = list(value.keys())
-        preview = ", ".join(str(k) for k in keys[:5])
-        suffix = "" if len(keys) <= 5 else f", +{len(keys) - 5}"
-        return f"dict ({len(keys)} keys: {preview}{suffix})"
-    if isinstance(value, list):
-        return f"list ({len(value)} items)"
-    return f"{type(value).__name__}: {str(value)[:40]}"
+    preview = ", ".join(info["preview"])
+    suffix = "" if info["entries"] <= len(info["preview"]) else f", +{info['entries'] - len(info['preview'])}"
+    details = f"{info['size'] / 1024:.1f} KiB"
+    if info["files"] > 1:
+        details += f" in {info['files']} files"
+    if info["modified"]:
+        details += f", updated <t:{int(info['modified'])}:R>"
+    return f"{info['entries']} keys: {preview}{suffix}\n{details}"
 
 
 def _build_nested_payload(path: Optional[str], payload: Any) -> Any:
@@ -385,9 +383,10 @@ class DatabaseManager(commands.Cog):
             )
             return embed
 
+        index = await Database.get_db_summary()
         for key in keys[:10]:
-            data = await Database.get_data(key)  # type: ignore[arg-type]
-            summary = _format_summary(data)
+            info = index.get(key)
+            summary = _format_index_summary(info) if info else "empty"
             embed.add_field(name=key, value=summary, inline=False)
 
         if len(keys) > 10:
@@ -459,7 +458,13 @@ class DatabaseManager(commands.Cog):
         Merge or overwrite data in the database at the provided key/path.
         """
         merged_payload = _build_nested_payload(path, payload)
-        await Database.add_data(key, merged_payload)
+        try:
+            await Database.add_data(key, merged_payload)
+        except ValueError as error:
+            await interaction.response.send_message(
+                f"{BotEmojis.warn} {error}", ephemeral=True
+            )
+            return
 
         await interaction.response.send_message(
             f"{BotEmojis.check_mark} Data saved to `{key}`" + (f" at `{path}`." if path else "."),
@@ -10,8 +10,9 @@ from utils.config import SPORTS_LEAGUES, Links, not_premium_message
 from utils.database import Database
 from utils.embed import Embed
 from utils.roles import Roles
+from utils.signing_tools import sign_roles
 from utils.tools import (get_user_response, guild_members, has_role,
-                         parse_duration, premium_guild_check, add_roles, remove_roles)
+                         parse_duration, premium_guild_check)
 
 # - Draft Picks - random, manually send a thingy with picks, snake draft
 
@@ -316,9 +317,7 @@ class DraftSettingsMenu(disnake.ui.View):
                             player_string = f"{player.mention} `{player.display_name}`"
                             coach = view.coach
 
-                            await player.add_roles(team)
-                            await add_roles(self.inter, 'AfterSignRole', player, self.inter.guild)  
-                            await remove_roles(self.inter, 'FreeAgentRole', player, self.inter.guild)
+                            await sign_roles(self.inter, player, team)
                             await your_turn_message.edit(f"{coach.mention} has drafted {player_string}", view=None, embed=None)
 
 
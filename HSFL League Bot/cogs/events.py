@@ -5,6 +5,8 @@ from disnake.ext import commands, tasks
 from utils.embed import Embed
 from utils.config import Ids, welcome_message, SETTINGS, error_support_message
 from utils.database import Database
+from utils.chunker import ChunkScheduler
+from utils.roster import RosterIndex
 from utils.tools import premium_user_check, remove_all_premium_data, premium_guild_check, has_role, remove_all_guild_data
 from utils.signing_tools import suspension_check, send_notfication_channel, auto_setup, auto_add_object
 
@@ -79,6 +81,8 @@ class Events(commands.Cog):
     
   @commands.Cog.listener()
   async def on_member_remove(self, member: disnake.Member):
+      RosterIndex.remove_member(member.guild.id, member.id)
+
       bk_guild = self.bot.get_guild(Ids.bk_server)
       if member.guild == bk_guild:
           premium_role = disnake.utils.get(bk_guild.roles, id=Ids.premium_role)
@@ -95,9 +99,22 @@ class Events(commands.Cog):
       
       # log when a player on a team leaves, ping coaches?
   
+  @commands.Cog.listener()
+  async def on_slash_command(self, inter: disnake.ApplicationCommandInteraction):
+    # Guilds people are using get chunked before quiet ones
+    if inter.guild:
+      ChunkScheduler.touch(inter.guild)
+
+  @commands.Cog.listener()
+  async def on_member_join(self, member: disnake.Member):
+    RosterIndex.update_member(member)
+
   # log when a user switches team
   @commands.Cog.listener()
   async def on_member_update(self, before: disnake.Member, after: disnake.Member):
+    if before._roles != after._roles:
+      RosterIndex.update_member(after)
+
     bk_guild = self.bot.get_guild(Ids.bk_server)
     if before.guild == bk_guild:
       premium = await premium_user_check(self.bot, after)
@@ -121,6 +138,8 @@ class Events(commands.Cog):
 
   @commands.Cog.listener()
   async def on_guild_remove(self, guild: disnake.Guild):
+    RosterIndex.forget(guild.id)
+    ChunkScheduler.forget(guild.id)
     await remove_all_guild_data(guild.id)
 
    # check who made/delete a role or channel
@@ -138,6 +157,7 @@ class Events(commands.Cog):
 
   @commands.Cog.listener()
   async def on_guild_role_delete(self, role: disnake.Role):
+    RosterIndex.remove_role(role)
     await delete_object_data(role.guild.id, role.id)
     # log?
 
@@ -10,7 +10,6 @@ from typing import Optional
 
 import disnake
 from disnake.ext import commands
-import aiohttp
 
 try:
     import gspread
@@ -22,6 +21,10 @@ except ImportError:  # pragma: no cover - optional dependency
 from utils.config import BotEmojis
 from utils.database import Database
 from utils.embed import Embed
+from utils.member_index import MemberIndex
+from utils.season_totals import apply_week_fields, recalculate_season_totals
+from utils.sheet_cache import SheetCache, SheetFetch
+from utils.statsheet import IDENTIFIER_FIELDS, IGNORED_IDENTIFIERS, PlayerRow, iter_player_rows
 from utils.tools import has_role, premium_guild_check
 
 
@@ -587,31 +590,8 @@ class Import(commands.Cog):
     DEFAULT_MASTER_SHEET_ID = "1qMlCBIut2HX6daBXVSWC0hFP_RZ8cpqLoyptW1pUXz4"
     DEFAULT_MASTER_SHEET_GID = 708235940
 
-    IDENTIFIER_FIELDS = {
-        "user_id",
-        "discord_id",
-        "discord id",
-        "id",
-        "username",
-        "user",
-        "name",
-        "player",
-    }
-
-    IGNORED_IDENTIFIERS = {
-        "username",
-        "name",
-        "player",
-        "stream link",
-        "streamer + media",
-        "stat taker",
-        "coach",
-        "team",
-        "teams",
-        "position",
-        "pos",
-        "total",
-    }
+    IDENTIFIER_FIELDS = IDENTIFIER_FIELDS
+    IGNORED_IDENTIFIERS = IGNORED_IDENTIFIERS
 
     GOOGLE_SCOPES = (
         "https://www.googleapis.com/auth/spreadsheets.readonly",
@@ -624,6 +604,10 @@ class Import(commands.Cog):
         self.gspread_init_error: Optional[str] = None
         self.gspread_client = self._init_gspread_client()
 
+    def cog_unload(self):
+        # Kept on the cog so the close isn't garbage collected before it runs
+        self.sheet_cache_close = asyncio.create_task(SheetCache.close())
+
     def _init_gspread_client(self):
         """
         Attempt to initialise a Google Sheets service account client using environment variables.
@@ -757,15 +741,11 @@ class Import(commands.Cog):
         except Exception as exc:  # pragma: no cover - defensive
             raise ValueError(f"Failed to download sheet via service account: {exc}") from exc
 
-    async def fetch_google_sheet(self, url: str) -> str:
+    async def fetch_google_sheet(self, url: str) -> SheetFetch:
         """
         Fetches data from a Google Sheets URL
-        Converts the shareable URL to CSV export format
+        Public sheets go through the CSV export, cached on disk and only downloaded again when the sheet changed
         """
-        # Convert Google Sheets URL to CSV export format
-        # Example: https://docs.google.com/spreadsheets/d/SHEET_ID/edit
-        # To: https://docs.google.com/spreadsheets/d/SHEET_ID/export?format=csv&gid=0
-
         sheet_id, gid = self._parse_sheet_url(url)
 
         # First attempt: use a service account if configured (handles private sheets)
@@ -775,150 +755,14 @@ class Import(commands.Cog):
                 raise ValueError(
                     "The sheet appears to be empty. Make sure the tab contains data."
                 )
-            return service_result
-
-        gid_param = gid if gid is not None else 0
-        csv_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid_param}"
-
-        async with aiohttp.ClientSession() as session:
-            async with session.get(csv_url) as response:
-                if response.status == 403:
-                    raise ValueError(
-                        "Google denied access to the sheet. Share it with 'Anyone with the link' (Viewer) or provide a CSV file."
-                    )
-                if response.status != 200:
-                    raise ValueError(f"Failed to fetch sheet: HTTP {response.status}")
-
-                text = await response.text()
-
-                # If Google returns an HTML page, the sheet isn't publicly accessible.
-                if "<!DOCTYPE html" in text[:200].lower() or "<html" in text[:200].lower():
-                    raise ValueError(
-                        "Received an HTML page instead of CSV data. Make sure the Google Sheet is shared with 'Anyone with the link' and try again."
-                    )
-
-                return text
-
-    def parse_csv_data(self, csv_text: str) -> list:
-        """Parse CSV text into row dictionaries with category awareness."""
-
-        rows = list(csv.reader(io.StringIO(csv_text)))
-        if not rows:
-            return []
-
-        parsed_data = []
-        current_headers = None
-        current_header_map = None
-        current_category = "General"
-
-        for row in rows:
-            normalized_cells = [(cell or "").strip() for cell in row]
-            if not any(normalized_cells):
-                continue
+            return SheetCache.remember(sheet_id, gid, service_result)
 
-            lower_cells = [cell.lower() for cell in normalized_cells]
+        return await SheetCache.fetch(sheet_id, gid)
 
-            # Detect category labels (single cell like PASSING, RUSHING, etc.)
-            if len([cell for cell in normalized_cells if cell]) == 1 and normalized_cells[0].isupper():
-                current_category = normalized_cells[0]
-                continue
-
-            # Detect header rows (contain identifier keywords)
-            if {cell for cell in lower_cells if cell} & self.IDENTIFIER_FIELDS:
-                seen = {}
-                current_headers = []
-                current_header_map = {}
-                for idx, header in enumerate(normalized_cells):
-                    header = header or f"Column_{idx + 1}"
-                    header = header.strip() or f"Column_{idx + 1}"
-                    base = header.lower()
-                    count = seen.get(base, 0)
-                    if count:
-                        unique_header = f"{header}_{count + 1}"
-                        current_headers.append(unique_header)
-                        seen[base] = count + 1
-                    else:
-                        current_headers.append(header)
-                        seen[base] = 1
-                    current_header_map[idx] = current_headers[-1]
-                continue
-
-            if not current_headers:
-                continue
-
-            values = list(row)
-            record = {header: "" for header in current_headers}
-            for idx, value in enumerate(values):
-                header = current_header_map.get(idx)
-                if header is not None:
-                    record[header] = value
-
-            record["__category"] = current_category
-            parsed_data.append(record)
-
-        return parsed_data
-
-    @staticmethod
-    def _split_key_suffix(key: str) -> tuple[str, str]:
-        if not key:
-            return "", ""
-        parts = key.rsplit("_", 1)
-        if len(parts) == 2 and parts[1].isdigit():
-            return parts[0], f"_{parts[1]}"
-        return key, ""
-
-    def _extract_player_rows(self, row: dict) -> list[dict]:
-        suffix_map = {}
-        for key, value in row.items():
-            if key.startswith("__"):
-                continue
-            base, suffix = self._split_key_suffix(key)
-            suffix_map.setdefault(suffix, {})[base] = value
-
-        player_rows = []
-        for suffix, data in suffix_map.items():
-            if not any((str(val).strip() for val in data.values() if val not in (None, ""))):
-                continue
-            player_rows.append({**data, "__suffix": suffix})
+    def parse_csv_data(self, csv_text: str) -> list[PlayerRow]:
+        """Parse CSV text into one PlayerRow per player, with category awareness."""
 
-        return player_rows
-
-    def _match_field(self, row: dict, *candidates: str):
-        """Return the value for the first matching header name (case-insensitive)."""
-
-        normalized = {}
-        for key, value in row.items():
-            normalized_key = (key or "").strip().lower()
-            if normalized_key:
-                normalized[normalized_key] = value
-
-        for candidate in candidates:
-            candidate = candidate.strip().lower()
-            for key, value in normalized.items():
-                if key == candidate or key.startswith(f"{candidate}_"):
-                    return value
-        return None
-
-    @staticmethod
-    def _to_number(value: object) -> Optional[float]:
-        if value is None:
-            return None
-        if isinstance(value, (int, float)):
-            return float(value)
-
-        text = str(value).strip()
-        if not text:
-            return None
-
-        if text.endswith("%"):
-            text = text[:-1].strip()
-
-        text = text.replace(",", "")
-
-        try:
-            return float(text)
-        except ValueError:
-            return None
+        return list(iter_player_rows(csv_text))
 
     def _store_stats_fields(
         self,
@@ -934,10 +778,8 @@ class Import(commands.Cog):
             category_bucket.update(stats_fields)
             return
 
-        weeks_bucket = stats.setdefault("weeks", {})
-        week_bucket = weeks_bucket.setdefault(f"week_{week}", {})
-        category_bucket = week_bucket.setdefault(category, {})
-        category_bucket.update(stats_fields)
+        # Keeps season_totals up to date as the week is written
+        apply_week_fields(stats, f"week_{week}", category, stats_fields)
 
         meta = stats.setdefault("meta", {})
         meta['last_import_week'] = week
@@ -945,50 +787,6 @@ class Import(commands.Cog):
         if week not in weeks_imported:
             weeks_imported.append(week)
 
-    def _recalculate_season_totals(self, stats: dict) -> None:
-        weeks_bucket = stats.get("weeks")
-        if not weeks_bucket:
-            stats.pop("season_totals", None)
-            return
-
-        totals: dict[str, dict[str, float]] = {}
-        last_strings: dict[str, dict[str, str]] = {}
-
-        for week_data in weeks_bucket.values():
-            for category, fields in week_data.items():
-                category_totals = totals.setdefault(category, {})
-                category_strings = last_strings.setdefault(category, {})
-
-                for key, value in fields.items():
-                    numeric_value = self._to_number(value)
-                    if numeric_value is not None:
-                        category_totals[key] = category_totals.get(key, 0.0) + numeric_value
-                    else:
-                        category_strings[key] = str(value)
-
-        season_totals: dict[str, dict[str, object]] = {}
-        for category, fields in totals.items():
-            category_total_values: dict[str, object] = {}
-            for key, total in fields.items():
-                if total.is_integer():
-                    category_total_values[key] = int(total)
-                else:
-                    category_total_values[key] = round(total, 3)
-
-            # Include non-numeric last values if they were never numeric
-            for key, value in last_strings.get(category, {}).items():
-                category_total_values.setdefault(key, value)
-
-            season_totals[category] = category_total_values
-
-        # Include categories that only had string values
-        for category, values in last_strings.items():
-            season_totals.setdefault(category, {})
-            for key, value in values.items():
-                season_totals[category].setdefault(key, value)
-
-        stats["season_totals"] = season_totals
-
     @staticmethod
     def _create_master_entry(
         identifier: str,
@@ -1012,70 +810,22 @@ class Import(commands.Cog):
 
     def _prepare_master_entries_from_parsed(
         self,
-        data: list[dict],
+        data: list[PlayerRow],
         week: Optional[int],
     ) -> list[dict]:
         master_entries: list[dict] = []
 
-        for row in data:
-            category = row.get("__category", "General")
-            player_rows = self._extract_player_rows(row)
-
-            for player_data in player_rows:
-                player_copy = dict(player_data)
-                player_copy.pop("__suffix", None)
-
-                user_identifier = self._match_field(
-                    player_copy,
-                    "user_id",
-                    "discord_id",
-                    "discord id",
-                    "id",
-                    "username",
-                    "user",
-                    "name",
-                    "player",
-                )
-
-                if isinstance(user_identifier, str):
-                    user_identifier = user_identifier.strip()
-
-                if not user_identifier:
-                    continue
-
-                identifier_lower = user_identifier.lower()
-                if (
-                    identifier_lower in self.IGNORED_IDENTIFIERS
-                    or identifier_lower.startswith("team ")
-                ):
-                    continue
-
-                contract = player_copy.get("contract")
-                demands = player_copy.get("demands")
-
-                stats_fields: dict[str, object] = {}
-                for key, value in player_copy.items():
-                    if key.startswith("__"):
-                        continue
-                    key_lower = (key or "").strip().lower()
-                    if key_lower in self.IDENTIFIER_FIELDS or key_lower in {"contract", "demands"}:
-                        continue
-                    if value not in (None, ""):
-                        stats_fields[key] = value
-
-                if not stats_fields and contract is None and demands is None:
-                    continue
-
-                master_entries.append(
-                    self._create_master_entry(
-                        identifier=user_identifier,
-                        category=category,
-                        week=week,
-                        stats_fields=stats_fields,
-                        contract=contract,
-                        demands=demands,
-                    )
+        for player in data:
+            master_entries.append(
+                self._create_master_entry(
+                    identifier=player.identifier,
+                    category=player.category,
+                    week=week,
+                    stats_fields=player.stats,
+                    contract=player.contract,
+                    demands=player.demands,
                 )
+            )
 
         return master_entries
 
@@ -1282,9 +1032,11 @@ class Import(commands.Cog):
         self,
         inter: disnake.Interaction,
         identifier: str,
+        members: Optional[MemberIndex] = None,
     ) -> tuple[Optional[str], Optional[str]]:
         """
         Convert a manual identifier into a Discord user ID or return an error message.
+        Pass a MemberIndex when resolving many identifiers so the guild is only indexed once.
         """
         cleaned = (identifier or "").strip()
         if not cleaned:
@@ -1300,15 +1052,12 @@ class Import(commands.Cog):
             numeric_id = int(cleaned)
             return str(numeric_id), None
         except ValueError:
-            def _match(member: disnake.Member) -> bool:
-                target = lowered
-                name_match = member.name.lower() == target
-                display_match = member.display_name and member.display_name.lower() == target
-                return name_match or display_match
+            if members is None:
+                members = MemberIndex(inter.guild.members)
 
-            member = disnake.utils.find(_match, inter.guild.members)
-            if member:
-                return str(member.id), None
+            member_id = members.get(cleaned)
+            if member_id:
+                return str(member_id), None
 
             return sanitized, None
 
@@ -1326,62 +1075,62 @@ class Import(commands.Cog):
         issues: list[str] = []
         master_entries: list[dict] = []
 
-        for index, entry in enumerate(session.entries, start=1):
-            user_id, error = await self._resolve_user_identifier(inter, entry.identifier)
-            if error:
-                issues.append(f"Entry {index}: {error}")
-            if user_id is None:
-                issues.append(f"Entry {index}: Missing user identifier")
-                continue
+        members = MemberIndex(inter.guild.members)
 
-            existing_data = await Database.get_data("Users", f"{session.guild_id}/{user_id}")
-            is_update = isinstance(existing_data, dict)
-            import_data = copy.deepcopy(existing_data) if is_update else {}
+        async with Database.batch() as batch:
+            for index, entry in enumerate(session.entries, start=1):
+                user_id, error = await self._resolve_user_identifier(inter, entry.identifier, members)
+                if error:
+                    issues.append(f"Entry {index}: {error}")
+                if user_id is None:
+                    issues.append(f"Entry {index}: Missing user identifier")
+                    continue
 
-            if entry.contract:
-                import_data["contract"] = entry.contract.strip()
+                existing_data = await batch.get_data("Users", f"{session.guild_id}/{user_id}")
+                is_update = isinstance(existing_data, dict)
+                import_data = copy.deepcopy(existing_data) if is_update else {}
 
-            if entry.demands:
-                try:
-                    import_data["demands"] = int(entry.demands)
-                except ValueError:
-                    import_data["demands"] = entry.demands.strip()
+                if entry.contract:
+                    import_data["contract"] = entry.contract.strip()
 
-            category = entry.category.strip() or "General"
-            if entry.stats:
-                self._store_stats_fields(import_data, category, entry.stats, session.week)
-                stats_ref = import_data.get("stats", {})
-                if session.week is not None and stats_ref:
-                    self._recalculate_season_totals(stats_ref)
+                if entry.demands:
+                    try:
+                        import_data["demands"] = int(entry.demands)
+                    except ValueError:
+                        import_data["demands"] = entry.demands.strip()
 
-            if not entry.stats and "contract" not in import_data and "demands" not in import_data:
-                issues.append(f"Entry {index}: No actionable data provided.")
-                continue
+                category = entry.category.strip() or "General"
+                if entry.stats:
+                    self._store_stats_fields(import_data, category, entry.stats, session.week)
 
-            await Database.add_data("Users", {session.guild_id: {user_id: import_data}})
-
-            stats_snapshot = {
-                key: value
-                for key, value in (entry.stats or {}).items()
-                if value not in (None, "")
-            }
-
-            if stats_snapshot or entry.contract or entry.demands:
-                master_entries.append(
-                    self._create_master_entry(
-                        identifier=entry.identifier,
-                        category=category,
-                        week=session.week,
-                        stats_fields=stats_snapshot,
-                        contract=entry.contract,
-                        demands=entry.demands,
+                if not entry.stats and "contract" not in import_data and "demands" not in import_data:
+                    issues.append(f"Entry {index}: No actionable data provided.")
+                    continue
+
+                await batch.add_data("Users", {session.guild_id: {user_id: import_data}})
+
+                stats_snapshot = {
+                    key: value
+                    for key, value in (entry.stats or {}).items()
+                    if value not in (None, "")
+                }
+
+                if stats_snapshot or entry.contract or entry.demands:
+                    master_entries.append(
+                        self._create_master_entry(
+                            identifier=entry.identifier,
+                            category=category,
+                            week=session.week,
+                            stats_fields=stats_snapshot,
+                            contract=entry.contract,
+                            demands=entry.demands,
+                        )
                     )
-                )
 
-            if is_update:
-                updated += 1
-            else:
-                imported += 1
+                if is_update:
+                    updated += 1
+                else:
+                    imported += 1
 
         return imported, updated, issues, master_entries
 
@@ -1391,98 +1140,50 @@ class Import(commands.Cog):
         data: list,
         guild_id: int,
         week: Optional[int] = None,
+        fuzzy_names: bool = False,
     ):
         """
         Imports parsed data into the Users database table
         Expected columns: user_id (Discord ID), and optional fields like contract, demands, etc.
+        With fuzzy_names, names that match nobody exactly go to the closest member name (reported in fuzzy_matches)
         """
         imported_count = 0
         updated_count = 0
         errors = []
+        fuzzy_matches = []
+        # Built on the first name lookup, sheets keyed by Discord ID never need it
+        members = None
 
-        for row_num, row in enumerate(data, start=2):  # Start at 2 because row 1 is headers
-            try:
-                category = row.get("__category", "General")
-                player_rows = self._extract_player_rows(row)
-
-                for player_data in player_rows:
-                    suffix = player_data.pop("__suffix", "")
-
-                    user_identifier = self._match_field(
-                        player_data,
-                        'user_id',
-                        'discord_id',
-                        'discord id',
-                        'id',
-                        'username',
-                        'user',
-                        'name',
-                        'player',
-                    )
-
-                    if isinstance(user_identifier, str):
-                        user_identifier = user_identifier.strip()
-
-                    identifier_lower = (user_identifier or "").strip().lower()
-
-                    non_identifier_values = [
-                        value
-                        for key, value in player_data.items()
-                        if key.lower() not in self.IDENTIFIER_FIELDS and value not in (None, "")
-                    ]
-
-                    if not user_identifier:
-                        continue
-
-                    if identifier_lower in self.IGNORED_IDENTIFIERS or identifier_lower.startswith("team "):
-                        continue
+        # Stage every row and write the guild's Users shard once at the end
+        async with Database.batch() as batch:
+            for player in data:
+                try:
+                    user_identifier = player.identifier
+                    contract = player.contract
+                    demands = player.demands
+                    stats_fields = player.stats
 
                     # Try to convert to int if it's a Discord ID
                     try:
                         user_id = str(int(user_identifier))
                     except ValueError:
-                        def _match(member):
-                            target = user_identifier.lower()
-                            return (
-                                member.name.lower() == target
-                                or (member.display_name and member.display_name.lower() == target)
-                            )
-
-                        member = disnake.utils.find(_match, inter.guild.members)
-                        if member:
-                            user_id = str(member.id)
+                        if members is None:
+                            members = MemberIndex(inter.guild.members)
+
+                        member_id = members.get(user_identifier)
+                        if member_id is None and fuzzy_names:
+                            match = members.fuzzy(user_identifier)
+                            if match:
+                                member_id, score = match
+                                fuzzy_matches.append(f"Row {player.row}: {user_identifier} -> <@{member_id}> ({score:.0f}%)")
+
+                        if member_id:
+                            user_id = str(member_id)
                         else:
                             user_id = user_identifier.replace("/", "_")
 
-                    # Prepare data to import
-                    import_data = {}
-
-                    # Import contract or demands if present within this player section
-                    contract = player_data.get('contract')
-                    if contract:
-                        import_data['contract'] = contract
-
-                    demands = player_data.get('demands')
-                    if demands:
-                        try:
-                            import_data['demands'] = int(demands)
-                        except ValueError:
-                            pass
-
-                    stats_fields = {}
-                    for key, value in player_data.items():
-                        if value in (None, ""):
-                            continue
-                        key_lower = (key or "").strip().lower()
-                        if key_lower in self.IDENTIFIER_FIELDS or key_lower in {"contract", "demands"}:
-                            continue
-                        stats_fields[key] = value
-
-                    if not stats_fields and contract is None and demands is None:
-                        continue
-
                     # Get existing user data
-                    existing_data = await Database.get_data("Users", f"{guild_id}/{user_id}")
+                    existing_data = await batch.get_data("Users", f"{guild_id}/{user_id}")
                     is_update = existing_data is not None and isinstance(existing_data, dict)
                     import_data = copy.deepcopy(existing_data) if is_update else {}
 
@@ -1496,22 +1197,19 @@ class Import(commands.Cog):
                             import_data['demands'] = demands
 
                     if stats_fields:
-                        self._store_stats_fields(import_data, category, stats_fields, week)
-                        stats_ref = import_data.get('stats', {})
-                        if week is not None and stats_ref:
-                            self._recalculate_season_totals(stats_ref)
+                        self._store_stats_fields(import_data, player.category, stats_fields, week)
 
                     if is_update:
                         updated_count += 1
                     else:
                         imported_count += 1
 
-                    await Database.add_data("Users", {guild_id: {user_id: import_data}})
+                    await batch.add_data("Users", {guild_id: {user_id: import_data}})
 
-            except Exception as e:
-                errors.append(f"Row {row_num}: {str(e)}")
+                except Exception as e:
+                    errors.append(f"Row {player.row}: {str(e)}")
 
-        return imported_count, updated_count, errors
+        return imported_count, updated_count, errors, fuzzy_matches
 
     @commands.slash_command()
     @commands.has_permissions(administrator=True)
@@ -1526,6 +1224,14 @@ class Import(commands.Cog):
             le=100,
             description="Week number to store these stats under (optional)",
         ),
+        fuzzy_names: bool = commands.Param(
+            default=False,
+            description="Match names with typos to the closest member name",
+        ),
+        force: bool = commands.Param(
+            default=False,
+            description="Import a Google Sheet again even if it hasn't changed since it was last imported",
+        ),
     ):
         """
         Import data from a stat sheet into the master database
@@ -1535,6 +1241,8 @@ class Import(commands.Cog):
         statsheet: Google Sheets URL or CSV data (leave empty if using file attachment)
         file: CSV file attachment (optional if using statsheet parameter)
         week: Optional week number; if provided, stats are stored in week-specific buckets
+        fuzzy_names: Match names that aren't exact to the closest member name (listed in the results)
+        force: Import a Google Sheet even if this exact sheet was already imported for this week
         """
         await inter.response.defer(ephemeral=True)
 
@@ -1550,6 +1258,7 @@ class Import(commands.Cog):
 
         csv_data = None
         source_sheet_meta: Optional[tuple[str, Optional[int]]] = None
+        sheet_fetch: Optional[SheetFetch] = None
 
         # Get CSV data from either URL or file attachment
         if file:
@@ -1572,12 +1281,22 @@ class Import(commands.Cog):
             if 'docs.google.com/spreadsheets' in statsheet or 'drive.google.com' in statsheet:
                 try:
                     source_sheet_meta = self._parse_sheet_url(statsheet)
-                    csv_data = await self.fetch_google_sheet(statsheet)
+                    sheet_fetch = await self.fetch_google_sheet(statsheet)
+                    csv_data = sheet_fetch.text
                 except Exception as e:
                     return await inter.send(
                         f"{BotEmojis.x_mark} Failed to fetch Google Sheet: {str(e)}",
                         ephemeral=True
                     )
+
+                # The same sheet was already imported for this week, nothing to parse, import or sync
+                if not force and await SheetCache.already_imported(sheet_fetch, inter.guild.id, week):
+                    target = f"week {week}" if week is not None else "the season"
+                    return await inter.send(
+                        f"{BotEmojis.check_mark} Already imported: this sheet hasn't changed since it was imported for {target}. "
+                        "Use `force` to import it again.",
+                        ephemeral=True
+                    )
             else:
                 # Assume it's raw CSV data
                 csv_data = statsheet
@@ -1604,9 +1323,11 @@ class Import(commands.Cog):
 
         # Import to database
         try:
-            imported, updated, errors = await self.import_to_database(
-                inter, parsed_data, inter.guild.id, week=week
+            imported, updated, errors, fuzzy_matches = await self.import_to_database(
+                inter, parsed_data, inter.guild.id, week=week, fuzzy_names=fuzzy_names
             )
+            if sheet_fetch is not None:
+                await SheetCache.mark_imported(sheet_fetch, inter.guild.id, week)
 
             master_entries = self._prepare_master_entries_from_parsed(parsed_data, week)
             master_sync_result: Optional[tuple[bool, str]] = None
@@ -1633,6 +1354,16 @@ class Import(commands.Cog):
                 inline=False
             )
 
+            if fuzzy_matches:
+                match_text = "\n".join(fuzzy_matches[:10])
+                if len(fuzzy_matches) > 10:
+                    match_text += f"\n... and {len(fuzzy_matches) - 10} more"
+                embed.add_field(
+                    name=f"{BotEmojis.warn} Fuzzy Matches",
+                    value=match_text[:1024],
+                    inline=False
+                )
+
             file_attachment = None
             if errors:
                 error_text = "\n".join(errors[:10])  # Show first 10 errors
@@ -1848,7 +1579,7 @@ class Import(commands.Cog):
                         changed = True
 
                 if changed:
-                    self._recalculate_season_totals(stats)
+                    recalculate_season_totals(stats)
                     _cleanup_stats_container(stats)
                     if not stats:
                         record.pop("stats", None)
@@ -1866,10 +1597,12 @@ class Import(commands.Cog):
                 ephemeral=True,
             )
 
-        if updates:
-            await Database.add_data("Users", {inter.guild.id: updates})
-        for user_id in deletions:
-            await Database.delete_data("Users", f"{inter.guild.id}/{user_id}")
+        # add_data deep-merges, so pruned records are removed before being rewritten
+        async with Database.batch() as batch:
+            for user_id in [*updates, *deletions]:
+                await batch.delete_data("Users", f"{inter.guild.id}/{user_id}")
+            if updates:
+                await batch.add_data("Users", {inter.guild.id: updates})
 
         summary_bits = []
         if week is not None:
@@ -10,6 +10,8 @@ logger = logging.getLogger(__name__)
 from utils.config import SETTINGS, Links, not_premium_message
 from utils.database import Database
 from utils.embed import Embed
+from utils.role_planner import RolePlan
+from utils.settings import GuildSettings
 from utils.signing_tools import send_notfication_channel, team_check, under_contract
 from utils.tools import (
     format_database_data,
@@ -23,6 +25,21 @@ from utils.tools import (
     search_embed_ids,
 )
 
+# Role edits between progress updates on disband/swap
+PROGRESS_EVERY = 5
+
+
+def role_progress(inter: disnake.GuildCommandInteraction, action: str):
+    """
+    Progress callback for RolePlan.apply, shows "<action>... done/total" on the deferred response
+    """
+    async def progress(done: int, total: int):
+        if done % PROGRESS_EVERY == 0 and done < total:
+            await inter.edit_original_message(content=f"{action}... {done}/{total}")
+
+    return progress
+
+
 NO_RINGS_ROAST = [
     "Bro has no rings 😂",
     "You have no rings and will never get one",
@@ -187,145 +204,142 @@ class GameInformationView(disnake.ui.View):
 class LeagueCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-
-    @commands.Cog.listener()
-    async def on_button_click(self, inter):
-        if not hasattr(inter, 'component') or not inter.component or not hasattr(inter.component, 'custom_id'):
-            return
-        
-        custom_id = inter.component.custom_id
-        
-        if not custom_id:
-            return
-
+        # Buttons on the /game message, custom_id is "<prefix>-<game author id>"
+        self.game_buttons = {
+            "teamthread": self.team_thread_button,
+            "gametime": self.game_time_button,
+            "streamlink": self.stream_link_button,
+            "referee": self.referee_button,
+            "scoresupdate": self.scores_update_button,
+            "notes": self.notes_button,
+            "endgame": self.end_game_button,
+        }
+        for prefix, handler in self.game_buttons.items():
+            bot.component_router.register(prefix, handler)
+
+    def cog_unload(self):
+        self.bot.component_router.unregister(*self.game_buttons)
+
+    @staticmethod
+    def game_access(inter, author_id: str) -> bool:
+        """Checks if the clicker started the game or is an admin"""
         try:
-            og_author = custom_id.split("-")
-            og_author_id = og_author[-1]  # The last part contains the ID
+            if int(inter.author.id) == int(author_id):
+                return True
+        except ValueError:
+            return False
+        return inter.channel.permissions_for(inter.author).administrator
+
+    async def no_access(self, inter):
+        return await inter.response.send_message(
+            "You do not have access to use this button", ephemeral=True
+        )
 
-            staff = inter.channel.permissions_for(inter.author).administrator
-            author = int(inter.author.id) == int(og_author_id)
-        except (ValueError, AttributeError, IndexError):
-            return
+    async def team_thread_button(self, inter, author_id):
+        if not self.game_access(inter, author_id):
+            return await self.no_access(inter)
 
-        if custom_id == f"teamthread-{og_author_id}":
-            if not (staff or author):
+        try:
+            if not inter.message.embeds or len(inter.message.embeds) == 0:
                 return await inter.response.send_message(
-                    "You do not have access to use this button", ephemeral=True
+                    "Could not find game embed", ephemeral=True
+                )
+            
+            roles = await search_embed_ids(
+                inter.message.embeds[0].description, "role", inter.guild
+            )
+            
+            if not roles or len(roles) < 2:
+                return await inter.response.send_message(
+                    "Could not find both teams in the game", ephemeral=True
                 )
 
+            thread_name = " vs ".join([role.name for role in roles])
             try:
-                if not inter.message.embeds or len(inter.message.embeds) == 0:
-                    return await inter.response.send_message(
-                        "Could not find game embed", ephemeral=True
-                    )
-                
-                roles = await search_embed_ids(
-                    inter.message.embeds[0].description, "role", inter.guild
+                thread = await inter.channel.create_thread(
+                    name=thread_name,
+                    type=disnake.ChannelType.private_thread,
+                    invitable=False,
                 )
-                
-                if not roles or len(roles) < 2:
-                    return await inter.response.send_message(
-                        "Could not find both teams in the game", ephemeral=True
-                    )
-
-                thread_name = " vs ".join([role.name for role in roles])
-                try:
-                    thread = await inter.channel.create_thread(
-                        name=thread_name,
-                        type=disnake.ChannelType.private_thread,
-                        invitable=False,
-                    )
-                except Exception as e:
-                    return await inter.response.send_message(f"Error creating thread: {str(e)}", ephemeral=True)
-
-                for role in roles:
-                    try:
-                        members = await guild_members(inter.guild, role)
-                        for member in members:
-                            try:
-                                await thread.add_user(member)
-                            except Exception:
-                                pass  # Skip if can't add user
-                    except Exception:
-                        pass  # Skip if can't get members
-                
-                await inter.response.send_message(thread.jump_url, ephemeral=True)
             except Exception as e:
-                logger.error(f"Error updating game embed: {e}", exc_info=True)
+                return await inter.response.send_message(f"Error creating thread: {str(e)}", ephemeral=True)
+
+            for role in roles:
                 try:
-                    await inter.response.send_message(f"Error: {str(e)}", ephemeral=True)
+                    members = await guild_members(inter.guild, role)
+                    for member in members:
+                        try:
+                            await thread.add_user(member)
+                        except Exception:
+                            pass  # Skip if can't add user
                 except Exception:
-                    pass
-
-        if custom_id == f"gametime-{og_author_id}":
-            if staff or author:
-                return await update_game_embed(self.bot, inter, "⏰ Game Time")
-
-            try:
-                coach = await has_role("FranchiseRole", inter.guild.id, inter.author)
-                if not inter.message.embeds or len(inter.message.embeds) == 0:
-                    return await inter.response.send_message(
-                        "Could not find game embed", ephemeral=True
-                    )
-                
-                roles = await search_embed_ids(
-                    inter.message.embeds[0].description, "role", inter.guild
-                )
-                if coach:
-                    for role in inter.author.roles:
-                        if role in roles:
-                            return await update_game_embed(self.bot, inter, "⏰ Game Time")
-            except Exception as e:
-                logger.error(f"Error: {e}", exc_info=True)
+                    pass  # Skip if can't get members
             
-            return await inter.response.send_message(
-                "You do not have access to use this button", ephemeral=True
-            )
-
-        if custom_id == f"streamlink-{og_author_id}":
+            await inter.response.send_message(thread.jump_url, ephemeral=True)
+        except Exception as e:
+            logger.error(f"Error updating game embed: {e}", exc_info=True)
             try:
-                streamer = await has_role("StreamerRole", inter.guild.id, inter.author)
-                if staff or author or streamer:
-                    return await update_game_embed(self.bot, inter, "🎥 Stream Link")
-            except Exception as e:
-                logger.error(f"Error: {e}", exc_info=True)
-            return await inter.response.send_message(
-                "You do not have access to use this button", ephemeral=True
-            )
+                await inter.response.send_message(f"Error: {str(e)}", ephemeral=True)
+            except Exception:
+                pass
 
-        if custom_id == f"referee-{og_author_id}":
-            try:
-                referee = await has_role("RefereeRole", inter.guild.id, inter.author)
-                if staff or author or referee:
-                    return await update_game_embed(self.bot, inter, "🏁 Referee")
-            except Exception as e:
-                logger.error(f"Error: {e}", exc_info=True)
-            return await inter.response.send_message(
-                "You do not have access to use this button", ephemeral=True
-            )
+    async def game_time_button(self, inter, author_id):
+        if self.game_access(inter, author_id):
+            return await update_game_embed(self.bot, inter, "⏰ Game Time")
 
-        if custom_id == f"scoresupdate-{og_author_id}":
-            if staff or author:
-                return await update_game_embed(self.bot, inter, "💯 Score")
-            return await inter.response.send_message(
-                "You do not have access to use this button", ephemeral=True
+        try:
+            coach = await has_role("FranchiseRole", inter.guild.id, inter.author)
+            if not inter.message.embeds or len(inter.message.embeds) == 0:
+                return await inter.response.send_message(
+                    "Could not find game embed", ephemeral=True
+                )
+            
+            roles = await search_embed_ids(
+                inter.message.embeds[0].description, "role", inter.guild
             )
+            if coach:
+                for role in inter.author.roles:
+                    if role in roles:
+                        return await update_game_embed(self.bot, inter, "⏰ Game Time")
+        except Exception as e:
+            logger.error(f"Error: {e}", exc_info=True)
+        
+        return await self.no_access(inter)
 
-        if custom_id == f"notes-{og_author_id}":
-            if staff or author:
-                return await update_game_embed(self.bot, inter, "📝 Note")
-            return await inter.response.send_message(
-                "You do not have access to use this button", ephemeral=True
-            )
+    async def stream_link_button(self, inter, author_id):
+        try:
+            streamer = await has_role("StreamerRole", inter.guild.id, inter.author)
+            if streamer or self.game_access(inter, author_id):
+                return await update_game_embed(self.bot, inter, "🎥 Stream Link")
+        except Exception as e:
+            logger.error(f"Error: {e}", exc_info=True)
+        return await self.no_access(inter)
 
-        if custom_id == f"endgame-{og_author_id}":
-            if staff or author:
-                return await inter.response.edit_message(
-                    view=None, content="🎉 Game Over 🎉"
-                )
-            return await inter.response.send_message(
-                "You do not have access to use this button", ephemeral=True
+    async def referee_button(self, inter, author_id):
+        try:
+            referee = await has_role("RefereeRole", inter.guild.id, inter.author)
+            if referee or self.game_access(inter, author_id):
+                return await update_game_embed(self.bot, inter, "🏁 Referee")
+        except Exception as e:
+            logger.error(f"Error: {e}", exc_info=True)
+        return await self.no_access(inter)
+
+    async def scores_update_button(self, inter, author_id):
+        if self.game_access(inter, author_id):
+            return await update_game_embed(self.bot, inter, "💯 Score")
+        return await self.no_access(inter)
+
+    async def notes_button(self, inter, author_id):
+        if self.game_access(inter, author_id):
+            return await update_game_embed(self.bot, inter, "📝 Note")
+        return await self.no_access(inter)
+
+    async def end_game_button(self, inter, author_id):
+        if self.game_access(inter, author_id):
+            return await inter.response.edit_message(
+                view=None, content="🎉 Game Over 🎉"
             )
+        return await self.no_access(inter)
 
     @commands.slash_command()
     async def gametime(self, inter):
@@ -559,7 +573,7 @@ class LeagueCommands(commands.Cog):
                 embed.add_field(name="Premium?", value="Unknown")
 
             try:
-                roster_cap = await Database.get_data("RosterCap", guild.id)
+                roster_cap = (await GuildSettings.get(guild.id)).value("RosterCap")
                 if roster_cap is None:
                     roster_cap = "No roster cap set"
                 else:
@@ -570,7 +584,7 @@ class LeagueCommands(commands.Cog):
                 embed.add_field(name="Roster Cap", value="No roster cap set")
 
             try:
-                demand_limit = await Database.get_data("DemandLimit", guild.id)
+                demand_limit = (await GuildSettings.get(guild.id)).value("DemandLimit")
                 if demand_limit is None:
                     demand_limit = "No demand limit set"
                 else:
@@ -728,23 +742,28 @@ class LeagueCommands(commands.Cog):
         removed_members = []
         removed_coaches = []
         error_members = []
+        embed = None
 
+        # Team and coach role come off in one edit per member
+        plan = RolePlan(inter.guild)
+        coach_roles = {}
         members = await guild_members(inter.guild, team)
         for member in members:
-            # if team in member.roles:
-            try:
-                await member.remove_roles(team)
-                removed_members.append(member.mention)
-            except disnake.Forbidden:
+            plan.remove(member, team)
+            role_id = await has_role("FranchiseRole", inter.guild.id, member, "id")
+            coach_role = inter.guild.get_role(int(role_id)) if role_id else None
+            if coach_role:
+                plan.remove(member, coach_role)
+                coach_roles[member] = coach_role
+
+        result = await plan.apply(role_progress(inter, f"Disbanding the {team.name}"), reason=f"Team disbanded by {inter.author}")
+        for member in members:
+            if not result.ok(member):
                 error_members.append(member.mention)
                 continue
-
-            coach_role_check = await has_role("FranchiseRole", inter.guild.id, member)
-            if coach_role_check:
-                role_id = await has_role("FranchiseRole", inter.guild.id, member, "id")
-                coach_role = inter.guild.get_role(int(role_id))
-                await member.remove_roles(coach_role)
-                removed_coaches.append(f"{member.mention} - {coach_role.mention}")
+            removed_members.append(member.mention)
+            if member in coach_roles:
+                removed_coaches.append(f"{member.mention} - {coach_roles[member].mention}")
 
         if removed_members:
             embed = Embed(
@@ -767,7 +786,8 @@ class LeagueCommands(commands.Cog):
             )
 
         if embed:
-            await inter.send(embed=embed)
+            # Replaces the progress message
+            await inter.edit_original_message(content=None, embed=embed)
             await send_notfication_channel(inter.guild, embed)
         else:
             await inter.send("I could find no players on that team", ephemeral=True)
@@ -802,25 +822,27 @@ class LeagueCommands(commands.Cog):
         good_members_2 = []
         error_members_2 = []
 
-        team1_members = await guild_members(inter.guild, team1)
-        for member in team1_members:
-            try:
-                await member.remove_roles(team1)
-                await member.add_roles(team2)
-                good_members_1.append(member.mention)
-            except disnake.Forbidden:
-                error_members_1.append(member.mention)
-                continue
+        # Both rosters are read before anything changes, so team1's players
+        # aren't picked up again as team2's
+        team1_members = list(await guild_members(inter.guild, team1))
+        team2_members = list(await guild_members(inter.guild, team2))
 
-        team2_members = await guild_members(inter.guild, team2)
+        plan = RolePlan(inter.guild)
+        for member in team1_members:
+            plan.remove(member, team1).add(member, team2)
         for member in team2_members:
-            try:
-                await member.remove_roles(team2)
-                await member.add_roles(team1)
-                good_members_2.append(member.mention)
-            except disnake.Forbidden:
-                error_members_2.append(member.mention)
-                continue
+            plan.remove(member, team2).add(member, team1)
+        result = await plan.apply(role_progress(inter, "Swapping teams"), reason=f"Teams swapped by {inter.author}")
+
+        for members, good_members, error_members in (
+            (team1_members, good_members_1, error_members_1),
+            (team2_members, good_members_2, error_members_2),
+        ):
+            for member in members:
+                if result.ok(member):
+                    good_members.append(member.mention)
+                else:
+                    error_members.append(member.mention)
 
         if good_members_1 and good_members_2:
             # not using embed.league_embed, bc we using 2 emojis and using the emojis in the description
@@ -860,7 +882,7 @@ class LeagueCommands(commands.Cog):
                     inline=True,
                 )
 
-            await inter.send(embed=embed)
+            await inter.edit_original_message(content=None, embed=embed)
             await send_notfication_channel(inter.guild, embed)
         else:
             await inter.send(
@@ -981,7 +1003,7 @@ class LeagueCommands(commands.Cog):
             
             # Get referee role
             try:
-                ref = await Database.get_data('RefereeRole', inter.guild.id)
+                ref = (await GuildSettings.get(inter.guild.id)).value('RefereeRole')
                 if ref is None:
                     return await inter.send(
                         "❌ There is no referee role set up. Use `/setup roles referee role` to set one.",
@@ -1021,7 +1043,7 @@ class LeagueCommands(commands.Cog):
 
             # Get referee channel
             try:
-                channel_data = await Database.get_data("RefereeChannel", inter.guild.id)
+                channel_data = (await GuildSettings.get(inter.guild.id)).value("RefereeChannel")
                 if channel_data is None:
                     return await inter.send(
                         "❌ There is no referee channel set up. Use `/setup channels referee channel` to set one.",
@@ -1141,7 +1163,7 @@ class LeagueCommands(commands.Cog):
 
             # Get referee channel
             try:
-                channel_data = await Database.get_data("RefereeChannel", inter.guild.id)
+                channel_data = (await GuildSettings.get(inter.guild.id)).value("RefereeChannel")
                 if channel_data is None:
                     return await inter.send(
                         "❌ There is no referee channel set up. Use `/setup channels referee channel` to set one.",
@@ -1262,7 +1284,7 @@ class LeagueCommands(commands.Cog):
 
             # Get streaming channels
             try:
-                channel_ids = await Database.get_data("StreamingChannel", guild.id)
+                channel_ids = (await GuildSettings.get(guild.id)).value("StreamingChannel")
                 if channel_ids is None:
                     channel_ids = [inter.channel.id]
                 else:
@@ -1339,26 +1361,18 @@ class LeagueCommands(commands.Cog):
 
         guild = inter.guild
         has_rings = []
-        rings = await Database.get_data("RingRole", guild.id)
+        settings = await GuildSettings.get(guild.id)
+        rings = settings.value("RingRole")
         if rings is None:
             return await inter.send("This server has no ring roles set :sob:", ephemeral=True)
-
-        # Handle both list and dict formats
-        if isinstance(rings, list):
-            role_ids = rings
-        elif isinstance(rings, dict):
-            role_ids = rings.values()
-        else:
+        if not isinstance(rings, (list, dict)):
             return await inter.send("Invalid ring role data", ephemeral=True)
 
         has_rings = []
-        for role_id in role_ids:
-            try:
-                role = guild.get_role(int(role_id))
-                if role and role in member.roles:
-                    has_rings.append(role)
-            except (ValueError, TypeError):
-                continue
+        for role_id in settings.ids("RingRole"):
+            role = guild.get_role(role_id)
+            if role and role in member.roles:
+                has_rings.append(role)
 
         if not has_rings:
             roast = random.choice(NO_RINGS_ROAST)
@@ -1382,10 +1396,11 @@ class LeagueCommands(commands.Cog):
         await inter.response.defer()
         guild = inter.guild
         embed = Embed(title="Server Settings")
+        settings = await GuildSettings.get(guild.id)
 
         for value in SETTINGS.values():
             table = value["table"]
-            data = await Database.get_data(table, guild.id)
+            data = settings.value(table)
             if data is not None:
                 if isinstance(data, (dict, list)):
                     embed.add_field(
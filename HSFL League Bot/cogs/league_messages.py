@@ -1,5 +1,6 @@
 import random
 from io import BytesIO
+from typing import Optional
 
 import disnake
 from disnake.ext import commands
@@ -7,6 +8,8 @@ from disnake.ext import commands
 from utils.config import SPORTS_LEAGUES
 from utils.embed import Embed
 from utils.roles import Roles
+from utils.roster import RosterIndex
+from utils.stats_engine import StatsEngine
 from utils.tools import get_user_response, search_role_emoji
 
 # can make quick changes to it - edit button
@@ -387,6 +390,19 @@ class MessageDesign(disnake.ui.View):
         await inter.send(embed=embed, view=LeagueMessagesMenu(inter, self.teams, self.command_self, self.settings), ephemeral=True)
 
 
+def format_stat(value: float) -> str:
+  if float(value).is_integer():
+    return f"{int(value):,}"
+  return f"{value:,.2f}"
+
+
+def format_player(player: str) -> str:
+  """Imported players are stored by Discord id when the sheet matched them, by name otherwise"""
+  if player.isdigit():
+    return f"<@{player}>"
+  return disnake.utils.escape_markdown(player)
+
+
 class LeagueMessagesCommands(commands.Cog):
   def __init__(self, bot):
     self.bot = bot
@@ -415,9 +431,62 @@ class LeagueMessagesCommands(commands.Cog):
 
   @commands.slash_command()
   @commands.cooldown(1, 20, commands.BucketType.user)
-  async def leaderboard(self, inter):
-    """Use /league-messages"""
-    await inter.response.send_message("You `/league_messages`, you can also edit and make the leaderboard look better with `/embed`")
+  async def leaderboard(
+    self,
+    inter: disnake.GuildCommandInteraction,
+    stat: str = commands.Param(description="The stat to rank by, like PASSING / Yds"),
+    week: Optional[int] = commands.Param(default=None, ge=1, le=100, description="Only count this week (leave empty for the whole season)"),
+    team: Optional[disnake.Role] = commands.Param(default=None, description="Only rank players on this team"),
+    by_team: bool = commands.Param(default=False, description="Rank teams by their players' combined stat"),
+    lowest: bool = commands.Param(default=False, description="Lowest first, for stats like interceptions"),
+    limit: int = commands.Param(default=10, ge=1, le=25, description="How many places to show"),
+  ):
+    """Show the stat leaders from the imported stat sheets"""
+    stats = await StatsEngine.get(inter.guild.id)
+    key = stats.labels.get(stat)
+    if key is None:
+      matches = stats.search(stat, 1)
+      if not matches:
+        embed = Embed("No Stat Found", f"No imported stat matches `{stat}`, pick one from the list").danger_embed()
+        return await inter.response.send_message(embed=embed, ephemeral=True)
+      stat = matches[0]
+      key = stats.labels[stat]
+    category, stat_name = key
+
+    if by_team:
+      roster = await RosterIndex.get(inter.guild)
+      ranked = stats.team_totals(category, stat_name, roster.teams, week)
+      if lowest:
+        ranked.reverse()
+      lines = [f"**{place}.** <@&{team_id}> - {format_stat(value)}" for place, (team_id, value) in enumerate(ranked[:limit], start=1)]
+    else:
+      players = None
+      if team is not None:
+        members = await RosterIndex.team_members(inter.guild, team)
+        if members is None:
+          embed = Embed("Not A Team", f"{team.mention} isn't a team role").danger_embed()
+          return await inter.response.send_message(embed=embed, ephemeral=True)
+        players = [str(member.id) for member in members]
+
+      ranked = stats.leaderboard(category, stat_name, week, limit, lowest, players)
+      lines = [f"**{place}.** {format_player(player)} - {format_stat(value)}" for place, (player, value) in enumerate(ranked, start=1)]
+
+    title = f"{stat} Leaders"
+    if week is not None:
+      title += f" (Week {week})"
+    if not lines:
+      embed = Embed(title, "Nobody has a number for this stat yet").warn_embed()
+      return await inter.response.send_message(embed=embed, ephemeral=True)
+
+    embed = Embed(title, "\n".join(lines), guild=inter.guild)
+    if team is not None and not by_team:
+      embed.add_field(name="Team", value=team.mention)
+    await inter.response.send_message(embed=embed)
+
+  @leaderboard.autocomplete("stat")
+  async def leaderboard_stat_autocomplete(self, inter: disnake.ApplicationCommandInteraction, string: str):
+    stats = await StatsEngine.get(inter.guild.id)
+    return stats.search(string)
 
 
 def setup(bot):
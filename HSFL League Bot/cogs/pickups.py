@@ -3,72 +3,37 @@ import urllib.parse
 import disnake
 from disnake.ext import commands
 
-from utils.database import Database
 from utils.embed import Embed
+from utils.settings import GuildSettings
 
 async def pickup_host(guild_id, member):
-  data = await Database.get_data('PickupHostRole', guild_id)
-  if data is None:
-    return True
-  
-  # Handle both list and dict formats
-  if isinstance(data, list):
-    role_ids = data
-  elif isinstance(data, dict):
-    role_ids = data.values()
-  else:
+  settings = await GuildSettings.get(guild_id)
+  if not isinstance(settings.value('PickupHostRole'), (list, dict)):
     return True
       
-  for row in role_ids:
-    try:
-      for role in member.roles:
-        if int(role.id) == int(row):
-          return True
-    except (ValueError, TypeError):
-      continue
-            
-  return False
+  return settings.has_any('PickupHostRole', member)
 
 async def get_pickup_roles(guild):
   roles = []
-  pickup_role = await Database.get_data('PickupRole', guild.id)
-  if pickup_role is None:
-    return
-  
-  # Handle both list and dict formats
-  if isinstance(pickup_role, list):
-    role_ids = pickup_role
-  elif isinstance(pickup_role, dict):
-    role_ids = pickup_role.values()
-  else:
+  settings = await GuildSettings.get(guild.id)
+  if not isinstance(settings.value('PickupRole'), (list, dict)):
     return
     
-  for role_id in role_ids:
-    try:
-      role = guild.get_role(int(role_id))
-      if role:
-        roles.append(role.mention)
-    except (ValueError, TypeError):
-      continue
+  for role_id in settings.ids('PickupRole'):
+    role = guild.get_role(role_id)
+    if role:
+      roles.append(role.mention)
       
   return roles
 
 async def get_pickup_channels(guild):
   channels = []
-  pickup_channel = await Database.get_data('PickupChannel', guild.id)
-  if pickup_channel is None:
-    return
-  
-  # Handle both list and dict formats
-  if isinstance(pickup_channel, list):
-    channel_ids = pickup_channel
-  elif isinstance(pickup_channel, dict):
-    channel_ids = pickup_channel.values()
-  else:
+  settings = await GuildSettings.get(guild.id)
+  if not isinstance(settings.value('PickupChannel'), (list, dict)):
     return
     
-  for channel_id in channel_ids:
-    channel = guild.get_channel_or_thread(int(channel_id))
+  for channel_id in settings.ids('PickupChannel'):
+    channel = guild.get_channel_or_thread(channel_id)
     if channel:
       channels.append(channel)
       
@@ -86,11 +51,14 @@ class PickupGameLink(disnake.ui.View):
 class PickupCommands(commands.Cog):
   def __init__(self, bot):
     self.bot = bot
+    bot.component_router.register("pickup", self.end_pickup_button)
+
+  def cog_unload(self):
+    self.bot.component_router.unregister("pickup")
 
-  @commands.Cog.listener()
-  async def on_button_click(self, inter):
-    custom_id = inter.component.custom_id
-    if custom_id == f"pickup-{inter.author.id}":
+  async def end_pickup_button(self, inter, host_id):
+    """End Game button, only the host can end it"""
+    if host_id == str(inter.author.id):
       await inter.message.delete()
     
   
@@ -1,16 +1,20 @@
+import asyncio
+
 import disnake
 from disnake.ext import commands
 
 from utils.config import BotEmojis, not_premium_message
 from utils.database import Database
 from utils.embed import Embed
+from utils.settings import GuildSettings
 from utils.signing_tools import (demand_limit_check, roster_cap,
                                  send_notfication_channel, suspension_check,
                                  team_check, under_contract, get_coach_team,
                                  validate_team_ownership, auto_detect_team,
-                                 get_team_coaches, check_channel_config, send_to_channel_type)
+                                 get_team_coaches, check_channel_config, send_to_channel_type,
+                                 sign_roles, release_roles)
 from utils.tools import (format_database_data, has_perms, has_role,
-                         premium_guild_check, add_roles, remove_roles)
+                         premium_guild_check)
 
 # add demand amount to leaugeinto and userinfo
 
@@ -21,36 +25,20 @@ def error_embed(title, description):
 
 async def check_toggle(table: str, guild_id: int):
   """Checks if a command is able to be used"""
-  data = await Database.get_data(table, guild_id)
-  if data is None:
-      return True  # If no data, command is enabled by default
-  if data == "Off":
-      return False
-  return True
+  settings = await GuildSettings.get(guild_id)
+  return settings.toggle(table) # If no data, command is enabled by default
 
 async def check_channel(table: str, inter):
   """Checks if a command is being used in the right channel"""
-  data = await Database.get_data(table, inter.guild.id)
+  settings = await GuildSettings.get(inter.guild.id)
 
-  if data is None: # no data, does not matter where you do the command
+  # no data, does not matter where you do the command
+  if not isinstance(settings.value(table), (list, dict)):
     return True
 
-  # Handle both list and dict formats
-  if isinstance(data, list):
-    channel_ids = data
-  elif isinstance(data, dict):
-    channel_ids = data.values()
-  else:
+  if inter.channel.id in settings.id_set(table):
     return True
 
-  current_channel = inter.channel.id
-  for channel_id in channel_ids:
-    try:
-      if int(current_channel) == int(channel_id):
-        return True
-    except (ValueError, TypeError):
-      continue
-
   return await format_database_data(inter, table, inter.guild.id) 
 
 async def transaction_checks(inter, on_table: str, channel_type: str, team: disnake.Role):
@@ -105,26 +93,18 @@ async def promote_member(inter, member: disnake.Member, coach_role: disnake.Role
     if not author_coach_role:
         return False, "Your franchise role was not found"
   
-    coach_roles = await Database.get_data("FranchiseRole", inter.guild.id)
+    settings = await GuildSettings.get(inter.guild.id)
+    coach_roles = settings.value("FranchiseRole")
     if coach_roles is None:
         return False, "No franchise roles configured"
-    
-    # Handle both list and dict formats
-    if isinstance(coach_roles, list):
-        role_ids = coach_roles
-    elif isinstance(coach_roles, dict):
-        role_ids = coach_roles.values()
-    else:
+    if not isinstance(coach_roles, (list, dict)):
         return False, "Invalid franchise role data"
     
     member_coach_role = None
-    for ref in role_ids:
-        try:
-            if int(ref) == int(coach_role.id):
-                member_coach_role = inter.guild.get_role(int(ref))
-                break
-        except (ValueError, TypeError):
-            continue
+    for ref in settings.ids("FranchiseRole"):
+        if ref == coach_role.id:
+            member_coach_role = inter.guild.get_role(ref)
+            break
 
     if member_coach_role is None:
         return False, 'That role is not in the database'
@@ -172,7 +152,7 @@ async def sign_checks(inter, team, member):
   if signed_check:
     return False, 'You are already signed to a team'
 
-  suspension_check_ = await suspension_check(inter, member)
+  suspension_check_ = await suspension_check(inter.guild.id, member)
   if suspension_check_[0]:
     return False, suspension_check_[1]
 
@@ -186,9 +166,7 @@ async def accept_release(inter, kwargs):
     await inter.response.defer()
 
     try:
-      await member.remove_roles(team)
-      await remove_roles(inter, 'AfterSignRole', member, guild)  
-      await add_roles(inter, 'FreeAgentRole', member, guild)
+      await release_roles(inter, member, team, guild=guild)
     except Exception as e:
       await command_inter.send(e)
 
@@ -311,10 +289,7 @@ class DemoteThenRelease(disnake.ui.View):
     async def button(self, button: disnake.ui.Button, inter: disnake.MessageInteraction):
       await inter.response.defer()
       try:
-        await self.member.remove_roles(self.coach)
-        await self.member.remove_roles(self.team)
-        await remove_roles(inter, 'AfterSignRole', self.member, self.guild)  
-        await add_roles(inter, 'FreeAgentRole', self.member, self.guild)
+        await release_roles(inter, self.member, self.coach, self.team, guild=self.guild)
       except Exception as e:
         await self.inter.send(e)
 
@@ -377,15 +352,15 @@ class OfferButtons(disnake.ui.View):
     await embed.league_embed(user=self.inter.author, guild=self.inter.guild, role=self.team)
     
     #await self.inter.message.edit(embed=embed, view=None)
-    await self.inter.edit_original_message(embed=embed, view=None)
-    await inter.send(f"You have been signed to the {self.team}", ephemeral=True)
-    
-    await send_to_channel_type(self.inter.guild, 'Transactions', embed)
+    # Independent round trips, send them together
+    await asyncio.gather(
+      self.inter.edit_original_message(embed=embed, view=None),
+      inter.send(f"You have been signed to the {self.team}", ephemeral=True),
+      send_to_channel_type(self.inter.guild, 'Transactions', embed),
+    )
 
     try:
-      await self.member.add_roles(self.team)
-      await add_roles(inter, 'AfterSignRole', self.member, self.guild)  
-      await remove_roles(inter, 'FreeAgentRole', self.member, self.guild)
+      await sign_roles(inter, self.member, self.team, self.guild)
     except Exception as e:
         await self.inter.send(e)
 
@@ -490,7 +465,8 @@ class SignCommands(commands.Cog):
     contract = contract or None
     view = OfferButtons(inter, member, team, inter.guild, contract)
 
-    offer_dm = await Database.get_data('OfferDM', inter.guild.id)
+    settings = await GuildSettings.get(inter.guild.id)
+    offer_dm = settings.value('OfferDM')
     if offer_dm is not None and (offer_dm == 'On' or offer_dm == 'on'):
       try:
           m_embed = embed.copy()
@@ -595,9 +571,7 @@ class SignCommands(commands.Cog):
         pass
 
     try:
-      await member.remove_roles(team)
-      await remove_roles(inter, 'AfterSignRole', member, inter.guild)  
-      await add_roles(inter, 'FreeAgentRole', member, inter.guild)
+      await release_roles(inter, member, team)
     except Exception as e:
         await inter.send(e)
 
@@ -613,14 +587,12 @@ class SignCommands(commands.Cog):
     await inter.response.defer()
     
     if team is None:
-      team_data = await Database.get_data("TeamRole", inter.guild.id)
-      if team_data:
-        team_ids = team_data if isinstance(team_data, list) else list(team_data.values())
-        for team_id in team_ids:
-          team_role = inter.guild.get_role(int(team_id))
-          if team_role and team_role in inter.author.roles:
-            team = team_role
-            break
+      settings = await GuildSettings.get(inter.guild.id)
+      for team_id in settings.ids("TeamRole"):
+        team_role = inter.guild.get_role(team_id)
+        if team_role and team_role in inter.author.roles:
+          team = team_role
+          break
       
       if team is None:
         return await inter.send(embed=error_embed("Not On Team", "You must be on a team to demand a release"), delete_after=10)
@@ -672,9 +644,7 @@ class SignCommands(commands.Cog):
           await Database.add_data('Users', {inter.guild.id: {inter.author.id: {'demands': 1}}})    
         
     try:
-      await inter.author.remove_roles(team)
-      await remove_roles(inter, 'AfterSignRole', inter.author, inter.guild)  
-      await add_roles(inter, 'FreeAgentRole', inter.author, inter.guild)
+      await release_roles(inter, inter.author, team)
     except Exception as e:
       await inter.send(e)
 
@@ -4,52 +4,103 @@ from textwrap import shorten
 import disnake
 from disnake.ext import commands
 
-from utils.database import Database
 from utils.embed import Embed
+from utils.settings import GuildSettings
+from utils.snipe_store import SNIPE_HISTORY, DeletedMessage, EditedMessage, SnipeStore
+
+GHOST_PING = "<:ghostping:782060673730740275>"
+# Messages listed in one bulk delete summary
+BULK_SUMMARY_LIMIT = 10
+
+
+def deleted_record(message: disnake.Message) -> DeletedMessage:
+  try:
+    file_attachment = message.attachments[0].proxy_url
+    attachment_name = message.attachments[0].filename
+  except IndexError:
+    file_attachment = None
+    attachment_name = None
+
+  return DeletedMessage(
+    author=message.author.name,
+    avatar_url=message.author.display_avatar.url,
+    content=message.content,
+    attachment=file_attachment,
+    file_name=attachment_name,
+  )
+
+
+def pings_someone(message: disnake.Message) -> bool:
+  """Could deleting this message be a ghost ping, checked before any settings are loaded"""
+  return bool(message.guild and message.mentions and not message.author.bot)
+
+
+async def ghost_pings_on(guild_id) -> bool:
+  # No data or not "Off" means on
+  return (await GuildSettings.get(guild_id)).toggle("GhostPing")
+
+
+def ghost_ping_embed(message: disnake.Message, title: str) -> Embed:
+  content = message.content if message.content else "No Message"
+  if len(content) > 768:
+    content = shorten(content, width=756, placeholder="...")
+
+  embed = Embed(
+    color=message.author.color,
+    title=f"{GHOST_PING} {title} {GHOST_PING}",
+  )
+  embed.add_field(name="Pinged By", value=message.author.mention)
+  embed.set_footer(text="To turn this off use /setup")
+  embed.add_field(name="Content", value=content)
+  return embed
 
 
 class SnipeCommands(commands.Cog):
   def __init__(self, bot):
     self.bot = bot
-    self.delsniped = defaultdict(lambda: defaultdict(dict))
-    self.editsniped = defaultdict(lambda: defaultdict(dict))
+    self.delsniped = SnipeStore()
+    self.editsniped = SnipeStore()
 
   @commands.Cog.listener()
   async def on_message_delete(self, message: disnake.Message):
+    self.delsniped.add(message.channel.id, deleted_record(message))
+
+    if not pings_someone(message) or not await ghost_pings_on(message.guild.id):
+      return
+
     try:
-      file_attachment = message.attachments[0].proxy_url
-      attachment_name = message.attachments[0].filename
-    except IndexError:
-      file_attachment = None
-      attachment_name = None
-
-    self.delsniped[message.channel.id] = {
-      "author": message.author.name,
-      "avatar_url": message.author.display_avatar,
-      "content": message.content,
-      "attachments": file_attachment,
-      "file_name": attachment_name,
-    }
-
-    for member in message.mentions:
-      gp_data = await Database.get_data('GhostPing', message.guild.id)
-      # No data or not "Off" means on
-      if gp_data != "Off" and not message.author.bot:
-        content = message.content if message.content else "No Message"
-        if len(content) > 768:
-            content = shorten(content, width=756, placeholder="...") 
-
-            embed = Embed(
-              color=message.author.color,
-              title="<:ghostping:782060673730740275> Ghost Ping Found <:ghostping:782060673730740275>",
-            )
-            embed.add_field(name="Pinged By", value=message.author.mention)
-            embed.set_footer(text="To turn this off use /setup")
-            embed.add_field(name="Content", value=content)
-            try:
-              await message.channel.send(embed=embed)
-            except (disnake.Forbidden, disnake.HTTPException):
-              return
+      await message.channel.send(embed=ghost_ping_embed(message, "Ghost Ping Found"))
+    except (disnake.Forbidden, disnake.HTTPException):
+      return
+
+  @commands.Cog.listener()
+  async def on_bulk_message_delete(self, messages: list[disnake.Message]):
+    """Purges: one ghost ping summary per channel instead of one embed per message"""
+    pings = defaultdict(list)
+    for message in sorted(messages, key=lambda message: message.id):
+      self.delsniped.add(message.channel.id, deleted_record(message))
+      if pings_someone(message):
+        pings[message.channel].append(message)
+
+    if not pings or not await ghost_pings_on(messages[0].guild.id):
+      return
+
+    for channel, found in pings.items():
+      embed = Embed(
+        title=f"{GHOST_PING} Ghost Pings Found {GHOST_PING}",
+        description=f"**{len(found)}** bulk deleted messages pinged someone",
+      )
+      for message in found[-BULK_SUMMARY_LIMIT:]:
+        embed.add_field(
+          name=message.author.display_name,
+          value=shorten(message.content or "No Message", width=256, placeholder="..."),
+          inline=False,
+        )
+      embed.set_footer(text="To turn this off use /setup")
+      try:
+        await channel.send(embed=embed)
+      except (disnake.Forbidden, disnake.HTTPException):
+        continue
 
   @commands.Cog.listener()
   async def on_raw_reaction_remove(self, payload: disnake.RawReactionActionEvent):
@@ -59,12 +110,12 @@ class SnipeCommands(commands.Cog):
     except Exception:
       return
       
-    self.delsniped[message.channel.id] = {
-      "author": message.author.name,
-      "avatar_url": message.author.display_avatar,
-      "content": message.content,
-      "reaction": payload.emoji,
-    }
+    self.delsniped.add(message.channel.id, DeletedMessage(
+      author=message.author.name,
+      avatar_url=message.author.display_avatar.url,
+      content=message.content,
+      reaction=str(payload.emoji),
+    ))
 
   @commands.Cog.listener()
   async def on_message_edit(self, before: disnake.Message, after: disnake.Message):
@@ -82,60 +133,55 @@ class SnipeCommands(commands.Cog):
       af_file_attachment = None
       af_attachment_name = None
 
-    self.editsniped[before.channel.id] = {
-      "author": before.author.name,
-      "avatar_url": before.author.display_avatar,
-      # Before
-      "bf_content": before.content or "No content",
-      "bf_attachments": bf_file_attachment,
-      "bf_file_name": bf_attachment_name,
-      # After
-      "af_content": after.content or "No content",
-      "af_attachments": af_file_attachment,
-      "af_file_name": af_attachment_name,
-    }
+    self.editsniped.add(before.channel.id, EditedMessage(
+      author=before.author.name,
+      avatar_url=before.author.display_avatar.url,
+      before=before.content or "No content",
+      before_attachment=bf_file_attachment,
+      before_file_name=bf_attachment_name,
+      after=after.content or "No content",
+      after_attachment=af_file_attachment,
+      after_file_name=af_attachment_name,
+    ))
     
     if before.type == disnake.MessageType.reply:
       return 
-    
-    for member in before.mentions:
-      if str(member.id) in after.content:
-        return
-
-      gp_data = await Database.get_data('GhostPing', before.guild.id)
-      # No data or not "Off" means on
-      if gp_data != "Off" and not before.author.bot:
-        content = before.content if before.content else "No Message"
-        if len(content) > 768:
-          content = shorten(content, width=756, placeholder="...")  
-
-        embed = Embed(
-          color=before.author.color,
-          title="<:ghostping:782060673730740275> Edited Ghost Ping Found <:ghostping:782060673730740275>",
-        )
-        embed.add_field(name="Pinged By", value=before.author.mention)
-        embed.set_footer(text="To turn this off use /setup")
-        embed.add_field(name="Content", value=content)
-        try:
-          await before.channel.send(embed=embed)
-        except (disnake.Forbidden, disnake.HTTPException):
-          return
+
+    if not pings_someone(before):
+      return
+    # A ghost ping if a mention was edited out
+    if all(str(member.id) in after.content for member in before.mentions):
+      return
+    if not await ghost_pings_on(before.guild.id):
+      return
+
+    try:
+      await before.channel.send(embed=ghost_ping_embed(before, "Edited Ghost Ping Found"))
+    except (disnake.Forbidden, disnake.HTTPException):
+      return
 
   @commands.slash_command()
   async def snipe(
     self,
     inter: disnake.GuildCommandInteraction,
     channel: disnake.TextChannel = None,
+    index: commands.Range[int, 1, SNIPE_HISTORY] = 1,
     ):
-      """*Snipe* the last deleted message or reaction in a channel"""
+      """
+      *Snipe* the last deleted message or reaction in a channel
+      Parameters
+      ----------
+      channel: The channel to snipe, defaults to this one
+      index: 1 for the last deleted message, 2 for the one before it...
+      """
       if not channel: channel = inter.channel
 
-      snipe = self.delsniped.get(channel.id, {})
+      snipe = self.delsniped.get(channel.id, index)
       if not snipe:
         return await inter.response.send_message("There's nothing to snipe!", ephemeral=True)
 
       # Text
-      content = snipe["content"]
+      content = snipe.content
       if len(content) > 768:
         content = shorten(content, width=756, placeholder="...")
 
@@ -144,19 +190,21 @@ class SnipeCommands(commands.Cog):
         description=content,
         color=inter.author.color,
       )
-      embed.set_author(name=snipe["author"], icon_url=snipe["avatar_url"])
+      embed.set_author(name=snipe.author, icon_url=snipe.avatar_url)
 
       # Image
-      attachment = snipe.get("attachments")
-      file_name = snipe.get("file_name")
-      if attachment:
+      if snipe.attachment:
         embed.add_field(
-          name="Attachments", value=f"||[{file_name}]({attachment})||"
+          name="Attachments", value=f"||[{snipe.file_name}]({snipe.attachment})||"
         )
 
       # Reaction
-      if snipe.get("reaction"):
-        embed.add_field(name="Reaction", value=snipe["reaction"])
+      if snipe.reaction:
+        embed.add_field(name="Reaction", value=snipe.reaction)
+
+      count = self.delsniped.count(channel.id)
+      if count > 1:
+        embed.set_footer(text=f"{index} of {count}, use index to see older ones")
 
       await inter.response.send_message(embed=embed)
 
@@ -165,19 +213,25 @@ class SnipeCommands(commands.Cog):
     self,
     inter: disnake.GuildCommandInteraction,
     channel: disnake.TextChannel = None,
+    index: commands.Range[int, 1, SNIPE_HISTORY] = 1,
   ):
-    """*Snipe* the last message someone edited"""
+    """
+    *Snipe* the last message someone edited
+    Parameters
+    ----------
+    channel: The channel to snipe, defaults to this one
+    index: 1 for the last edited message, 2 for the one before it...
+    """
     try:
       if not channel: 
         channel = inter.channel
 
-      snipe = self.editsniped.get(channel.id, {})
+      snipe = self.editsniped.get(channel.id, index)
       if not snipe:
         return await inter.response.send_message("There's nothing to snipe! No messages have been edited in this channel.", ephemeral=True)
 
-      # Get content with defaults
-      bf_content = snipe.get("bf_content", "No content")
-      af_content = snipe.get("af_content", "No content")
+      bf_content = snipe.before
+      af_content = snipe.after
 
       if len(bf_content) > 768:
         bf_content = shorten(bf_content, width=756, placeholder="...")
@@ -188,16 +242,16 @@ class SnipeCommands(commands.Cog):
         title=f"Message Edit Sniped - {channel.name}", 
         color=inter.author.color
       )
-      embed.set_author(name=snipe.get("author", "Unknown"), icon_url=snipe.get("avatar_url"))
+      embed.set_author(name=snipe.author, icon_url=snipe.avatar_url)
       embed.add_field(name="Before", value=bf_content, inline=False)
       embed.add_field(name="After", value=af_content, inline=False)
 
       # Image attachments
-      bf_attachment = snipe.get("bf_attachments")
-      bf_file_name = snipe.get("bf_file_name")
+      bf_attachment = snipe.before_attachment
+      bf_file_name = snipe.before_file_name
 
-      af_attachment = snipe.get("af_attachments")
-      af_file_name = snipe.get("af_file_name")
+      af_attachment = snipe.after_attachment
+      af_file_name = snipe.after_file_name
       
       if bf_attachment:
         embed.add_field(
@@ -221,6 +275,25 @@ class SnipeCommands(commands.Cog):
       except Exception:
         await inter.send(f"Error: {str(e)}", ephemeral=True)
 
+  @commands.slash_command()
+  @commands.is_owner()
+  async def snipe_memory(self, inter: disnake.ApplicationCommandInteraction):
+    """Shows how much memory the snipe stores use (owner only)"""
+    embed = Embed(title="Snipe Memory")
+    for name, store in (("Deleted", self.delsniped), ("Edited", self.editsniped)):
+      stats = store.get_stats()
+      embed.add_field(
+        name=name,
+        value=(
+          f"Channels: {stats['channels']}\n"
+          f"Messages: {stats['entries']}/{stats['max_entries']}\n"
+          f"Size: {stats['bytes'] / 1024:.1f}/{stats['max_bytes'] / 1024:.0f} KiB\n"
+          f"Evicted: {stats['evicted']}, expired: {stats['expired']}"
+        ),
+      )
+    embed.set_footer(text=f"Messages expire after {self.delsniped.ttl // 3600:.0f} hours, {SNIPE_HISTORY} kept per channel")
+    await inter.response.send_message(embed=embed, ephemeral=True)
+
 
 
 def setup(bot):
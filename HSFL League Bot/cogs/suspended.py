@@ -1,17 +1,30 @@
+import asyncio
+import heapq
+import logging
 from datetime import datetime
+from typing import Optional
 
 import disnake
-from disnake.ext import commands, tasks
+from disnake.ext import commands
 
 from utils.config import not_premium_message
 from utils.database import Database
 from utils.embed import Embed
+from utils.role_planner import RolePlan
 from utils.signing_tools import send_notfication_channel
 from utils.tools import parse_duration, premium_guild_check
 
+logger = logging.getLogger(__name__)
+
+# Longest the expiry loop sleeps in one go, so changes to the wall clock (DST) are picked up
+MAX_SLEEP = 3600
+
 
 async def suspension_duration(duration):
+    """When a suspension of this length ends, None if the duration can't be read"""
     duration = await parse_duration(duration)
+    if not duration:
+        return None
     duration = duration + datetime.now()
     d_str = str(duration)
 
@@ -21,30 +34,76 @@ async def suspension_duration(duration):
 
     return d_str
 
+
+def parse_expiry(duration) -> Optional[datetime]:
+  """
+  When a stored suspension ends, None for permanent ones
+  Older suspensions only stored the date, those end at midnight
+  """
+  if not isinstance(duration, str) or duration == "Permanently":
+    return None
+  try:
+    return datetime.fromisoformat(duration)
+  except ValueError:
+    logger.warning(f"Unreadable suspension duration: {duration!r}")
+    return None
+
+
+class SuspensionQueue:
+  """
+  Min-heap of timed suspensions keyed on when they end
+
+  Unsuspending (or suspending again) doesn't search the heap, the live
+  deadline of every suspension is kept next to it and heap entries that
+  don't match it anymore are skipped when they come up
+  """
+
+  def __init__(self):
+    self._heap = []
+    self._deadlines = {}
+
+  def __len__(self):
+    return len(self._deadlines)
+
+  def add(self, guild_id, user_id, expires: datetime):
+    key = (int(guild_id), int(user_id))
+    self._deadlines[key] = expires
+    heapq.heappush(self._heap, (expires, *key))
+
+  def remove(self, guild_id, user_id):
+    self._deadlines.pop((int(guild_id), int(user_id)), None)
+
+  def next_expiry(self) -> Optional[datetime]:
+    """When the next live suspension ends"""
+    while self._heap:
+      expires, *key = self._heap[0]
+      if self._deadlines.get(tuple(key)) == expires:
+        return expires
+      heapq.heappop(self._heap)
+    return None
+
+  def pop_expired(self, now: datetime) -> list:
+    """Take every suspension that has ended by now, as (guild_id, user_id, expires)"""
+    expired = []
+    while True:
+      expires = self.next_expiry()
+      if expires is None or expires > now:
+        return expired
+      _, guild_id, user_id = heapq.heappop(self._heap)
+      del self._deadlines[(guild_id, user_id)]
+      expired.append((guild_id, user_id, expires))
+
+
 async def handle_suspension_role(member, action):
-  suspension_role = await Database.get_data("SuspensionRole", member.guild.id)
-  if suspension_role is None:
-    return
-  
-  # Handle both list and dict formats
-  if isinstance(suspension_role, list):
-    role_ids = suspension_role
-  elif isinstance(suspension_role, dict):
-    role_ids = suspension_role.values()
-  else:
-    return
-  
-  for role_id in role_ids:
-    try:
-      role = member.guild.get_role(int(role_id))
-      if role:
-        if action == "add":
-          await member.add_roles(role)
-        elif action == "remove":
-          await member.remove_roles(role)
-    except (ValueError, TypeError, Exception) as e:
-      print(f"Error handling suspension role {role_id}: {e}")
-      continue
+  plan = RolePlan(member.guild)
+  if action == "add":
+    await plan.add_table(member, "SuspensionRole")
+  elif action == "remove":
+    await plan.remove_table(member, "SuspensionRole")
+
+  result = await plan.apply()
+  for failed_member, reason in result.failed.items():
+    logger.warning(f"Error handling suspension roles of {failed_member.id}: {reason}")
 
 async def send_embed_to_member(member, embed):
   try:
@@ -58,45 +117,94 @@ async def send_embed_to_member(member, embed):
 class SuspenedCommands(commands.Cog):
   def __init__(self, bot):
     self.bot = bot
+    self.queue = SuspensionQueue()
+    self.wakeup = asyncio.Event()
+    self.expiry_task = asyncio.create_task(self.expiry_loop())
 
-  @tasks.loop(minutes=5)
-  async def suspend_check(self):
-    await self.bot.wait_until_ready()
+  def cog_unload(self):
+    self.expiry_task.cancel()
+
+  async def load_suspensions(self):
+    """Fill the queue from the Suspensions table, once at startup"""
     suspension_data = await Database.get_data("Suspensions")
     if suspension_data is None or not isinstance(suspension_data, dict):
       return
 
-    for guild_id, user_id in suspension_data.items():
-      if not isinstance(user_id, dict):
+    for guild_id, users in suspension_data.items():
+      if not isinstance(users, dict):
         continue
-      for user_id_, user_data in user_id.items():
-        current_time = datetime.now()
-        duration = user_data["duration"]
-        if duration == "Permanently":
+      for user_id, user_data in users.items():
+        if not isinstance(user_data, dict):
           continue
-          duration = datetime.fromisoformat(duration)
+        expires = parse_expiry(user_data.get("duration"))
+        if expires is not None:
+          self.queue.add(guild_id, user_id, expires)
 
-          if current_time >= duration:
-            await Database.delete_data(
-              "Suspensions", f"{int(guild_id)}/{int(user_id_)}"
-            )
+  def schedule(self, guild_id, user_id, duration):
+    """Track a new or changed suspension, waking the loop if it ends sooner than anything queued"""
+    expires = parse_expiry(duration)
+    if expires is None:
+      self.queue.remove(guild_id, user_id)
+      return
+    self.queue.add(guild_id, user_id, expires)
+    self.wakeup.set()
 
-            guild = self.bot.get_guild(int(guild_id))
-            member = await guild.get_or_fetch_member(int(user_id_))
+  async def expiry_loop(self):
+    """Sleep until the next suspension ends, no database reads in between"""
+    await self.bot.wait_until_ready()
+    try:
+      await self.load_suspensions()
+    except Exception as e:
+      logger.error(f"Error loading suspensions: {e}", exc_info=True)
+    logger.info(f"Tracking {len(self.queue)} timed suspensions")
 
-            embed = Embed(
-              title="Player Unsuspended",
-              description=f"**{member.mention} has been unsuspended**\n`Suspension Reason:` {user_data['reason']}\n`Unsuspended Reason:` Serverd your time",
-            )
-            embed.set_thumbnail(member.display_avatar)
+    while True:
+      for guild_id, user_id, expires in self.queue.pop_expired(datetime.now()):
+        try:
+          await self.expire_suspension(guild_id, user_id, expires)
+        except Exception as e:
+          logger.error(f"Error ending suspension of {user_id} in {guild_id}: {e}", exc_info=True)
 
-            await send_notfication_channel(guild, embed)
-            await handle_suspension_role(member, "remove")
+      next_expiry = self.queue.next_expiry()
+      timeout = MAX_SLEEP
+      if next_expiry is not None:
+        timeout = min(max((next_expiry - datetime.now()).total_seconds(), 0), MAX_SLEEP)
 
-            await send_embed_to_member(member, embed)
+      self.wakeup.clear()
+      try:
+        await asyncio.wait_for(self.wakeup.wait(), timeout)
+      except asyncio.TimeoutError:
+        pass
+
+  async def expire_suspension(self, guild_id, user_id, expires):
+    # The table can change without going through /suspend (e.g. the guild's data was wiped)
+    user_data = await Database.get_data("Suspensions", f"{guild_id}/{user_id}")
+    if not isinstance(user_data, dict) or parse_expiry(user_data.get("duration")) != expires:
+      return
+
+    await Database.delete_data("Suspensions", f"{guild_id}/{user_id}")
+
+    guild = self.bot.get_guild(guild_id)
+    if guild is None:
+      return
+    try:
+      member = await guild.get_or_fetch_member(user_id)
+    except disnake.HTTPException:
+      member = None
+
+    mention = member.mention if member else f"<@{user_id}>"
+    embed = Embed(
+      title="Player Unsuspended",
+      description=f"**{mention} has been unsuspended**\n`Suspension Reason:` {user_data.get('reason')}\n`Unsuspended Reason:` Served their time",
+    )
+    if member:
+      embed.set_thumbnail(member.display_avatar)
+
+    await send_notfication_channel(guild, embed)
+    if member:
+      await handle_suspension_role(member, "remove")
+      await send_embed_to_member(member, embed)
 
-            break
-  
   @commands.slash_command()
   @commands.has_permissions(manage_roles=True)
   async def suspend(
@@ -123,7 +231,8 @@ class SuspenedCommands(commands.Cog):
       
     if not duration == "Permanently":
       duration = await suspension_duration(duration)
-      duration = duration[:10]
+      if duration is None:
+        return await inter.response.send_message("Invalid duration, use something like `3d`, `12h` or `1w 2d`", ephemeral=True)
 
     await Database.add_data(
       "Suspensions",
@@ -133,6 +242,7 @@ class SuspenedCommands(commands.Cog):
           }
         },
     )
+    self.schedule(inter.guild.id, member.id, duration)
 
     embed = Embed(
       title="Player Suspended",
@@ -174,6 +284,7 @@ class SuspenedCommands(commands.Cog):
       return await inter.response.send_message("Invalid suspension data", ephemeral=True)
 
     await Database.delete_data("Suspensions", f"{inter.guild.id}/{member.id}")
+    self.queue.remove(inter.guild.id, member.id)
     embed = Embed(
         title="Player Unsuspended",
         description=f"**{member.mention} has been unsuspended**\n`Suspension Reason:` {suspension_data['reason']}\n`Unsuspended Reason:` {reason}",
@@ -15,6 +15,7 @@ from utils.signing_tools import (
     get_channel_config,
     get_all_channel_config,
 )
+from utils.roster import RosterIndex
 from utils.tools import has_role, guild_members
 
 
@@ -107,25 +108,33 @@ class TeamManagementCommands(commands.Cog):
             description=f"Total teams: **{len(team_ids)}**",
         )
 
+        # Group coaches by team once instead of scanning the mapping per team
+        team_coaches = {}
+        if coach_mapping and isinstance(coach_mapping, dict):
+            for coach_id, assigned_team_id in coach_mapping.items():
+                team_coaches.setdefault(str(assigned_team_id), []).append(coach_id)
+
+        roster_sizes = await RosterIndex.team_sizes(inter.guild)
+
         for team_id in team_ids:
             team = inter.guild.get_role(int(team_id))
             if not team:
                 continue
 
             coaches = []
-            if coach_mapping and isinstance(coach_mapping, dict):
-                for coach_id, assigned_team_id in coach_mapping.items():
-                    if str(assigned_team_id) == str(team_id):
-                        member = inter.guild.get_member(int(coach_id))
-                        if member:
-                            coaches.append(member.mention)
-
-            team_members = await guild_members(inter.guild, team)
+            for coach_id in team_coaches.get(str(team_id), []):
+                member = inter.guild.get_member(int(coach_id))
+                if member:
+                    coaches.append(member.mention)
+
+            roster_size = roster_sizes.get(team.id)
+            if roster_size is None:
+                roster_size = len(await guild_members(inter.guild, team))
             coach_info = ", ".join(coaches) if coaches else "None assigned"
 
             embed.add_field(
                 name=f"{team.name}",
-                value=f"Coaches: {coach_info}\nRoster: {len(team_members)} members",
+                value=f"Coaches: {coach_info}\nRoster: {roster_size} members",
                 inline=False,
             )
 
@@ -284,8 +293,7 @@ class TeamManagementCommands(commands.Cog):
                 ephemeral=True,
             )
 
-        del all_config[channel_type]
-        await Database.add_data("ChannelConfig", {inter.guild.id: all_config})
+        await Database.delete_data("ChannelConfig", f"{inter.guild.id}/{channel_type}")
 
         embed = success_embed(
             "Channels Cleared",
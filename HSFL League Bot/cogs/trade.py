@@ -1,3 +1,4 @@
+import asyncio
 import re
 from datetime import datetime
 
@@ -6,47 +7,21 @@ from disnake.ext import commands
 
 from utils.database import Database
 from utils.embed import Embed
-from utils.tools import has_role, premium_user_check, guild_members, search_embed_ids
+from utils.role_planner import RolePlan
+from utils.tools import has_role, premium_user_check, guild_members, search_embed_ids, send_role_warnings
 from utils.signing_tools import team_check, send_notfication_channel, get_team_owner, roster_cap, auto_detect_team, check_channel_config
 from utils.config import SETTINGS, Links, BotEmojis
+from utils.settings import GuildSettings
 
 async def get_trade_channel(inter):
   """Looks for TradingChannel then SigningChannel then current channel"""
-  trade_channel_id = await Database.get_data('TradingChannel', inter.guild.id)
-  if trade_channel_id:
-    # Handle both list and dict formats
-    if isinstance(trade_channel_id, list) and trade_channel_id:
-      channel_id = trade_channel_id[0]
-    elif isinstance(trade_channel_id, dict) and trade_channel_id:
-      channel_id = list(trade_channel_id.values())[0]
-    else:
-      channel_id = None
-    
-    if channel_id:
-      try:
-        trade_channel = inter.guild.get_channel_or_thread(int(channel_id))
-        if trade_channel:
-          return trade_channel
-      except (ValueError, TypeError):
-        pass
-
-  sign_channel_id = await Database.get_data('SigningChannel', inter.guild.id)
-  if sign_channel_id:
-    # Handle both list and dict formats
-    if isinstance(sign_channel_id, list) and sign_channel_id:
-      channel_id = sign_channel_id[0]
-    elif isinstance(sign_channel_id, dict) and sign_channel_id:
-      channel_id = list(sign_channel_id.values())[0]
-    else:
-      channel_id = None
-    
-    if channel_id:
-      try:
-        sign_channel = inter.guild.get_channel_or_thread(int(channel_id))
-        if sign_channel:
-          return sign_channel
-      except (ValueError, TypeError):
-        pass
+  settings = await GuildSettings.get(inter.guild.id)
+  for table in ('TradingChannel', 'SigningChannel'):
+    channel_ids = settings.ids(table)
+    if channel_ids:
+      channel = inter.guild.get_channel_or_thread(channel_ids[0])
+      if channel:
+        return channel
 
   return inter.channel
 
@@ -236,122 +211,136 @@ class TradeBlockRemovePlayer(disnake.ui.View):
 class TradeCommands(commands.Cog):
   def __init__(self, bot):
     self.bot = bot
-
-  @commands.Cog.listener()
-  async def on_button_click(self, inter):
-      custom_id = inter.component.custom_id
-      if custom_id == f"accept_trade-{inter.guild.id}":    
-          guild = inter.guild
-          await inter.response.defer(ephemeral=True)
-
-          # Getting teams again
-          teams = await search_embed_ids(inter.message.embeds[0].description, 'role', guild)
-          author_team = teams[0] # author_team
-          team = teams[1] # team
-
-          team_members = await guild_members(inter.guild, team)
-          owner = await get_team_owner(inter.guild, team)
-          if not inter.author in team_members and not owner:
-             return await inter.send(f"You are not the owner of the {team.mention}", ephemeral=True)
-
-          # Getting users
-          author_trade_users = await search_embed_ids(inter.message.embeds[0].fields[1].value, 'user', guild)
-          team_trade_users = await search_embed_ids(inter.message.embeds[0].fields[0].value, 'user', guild)
-
-          # Adding and remove roles
-          # team1 role go to users2, etc
-          for user in author_trade_users:
-             await user.add_roles(team)
-             await user.remove_roles(author_team)
-             await Database.delete_data('TradeBlock', f'{guild.id}/{user.id}')
-          for user in team_trade_users:
-             await user.add_roles(author_team)
-             await user.remove_roles(team)
-             await Database.delete_data('TradeBlock', f'{guild.id}/{user.id}')
-
-          # Sending messages
-          # trade channel
-          trade_embed = Embed(
-            title = f'Trade Accepted',
-            description = f"The {team.mention} have **accepted** the {author_team.mention} trade offer",
-          )
-          await trade_embed.league_embed(inter.guild, inter.author, team)
-          fields = inter.message.embeds[0].fields
-          trade_embed.add_field(name = f"{team} Receives", value = fields[0].value)
-          trade_embed.add_field(name = f"{author_team} Receives", value = fields[1].value)
-
-          author_team_owner = await get_team_owner(inter.guild, author_team)
-
-          channel = await get_trade_channel(inter)
-          await channel.send(embed=trade_embed, content=author_team_owner.mention if author_team_owner else None, allowed_mentions=disnake.AllowedMentions(users=True))
-
-
-          # coach who clicked button
-          await inter.send("Trade Accepted", ephemeral=True)
-
-          # notfi owner
-          await send_notfication_channel(inter.guild, trade_embed, inter.guild.owner.mention) 
-
-          # get rid of buttons
-          await inter.message.edit(content=f"This trade has been accepted", view=None)
-
-
-      if custom_id == f"decline_trade-{inter.guild.id}":    
-          guild = inter.guild
-          await inter.response.defer(ephemeral=True)
-          # check who is clicking, on team1, is coach
-
-          # Getting teams again
-          teams = await search_embed_ids(inter.message.embeds[0].description, 'role', guild)
-          author_team = teams[0] # author_team
-          team = teams[1] # team
-
-          team_members = await guild_members(inter.guild, team)
-          owner = await get_team_owner(inter.guild, team)
-          if not inter.author in team_members and not owner:
-             return await inter.send(f"You are not the owner of the {team.mention}", ephemeral=True)
-
-
-          # Sending messages
-          # trade channel
-          trade_embed = Embed(
-            title = f'Trade Declined',
-            description = f"The {team.mention} have **declined** the {author_team.mention} trade offer, below was what was offered",
-          )
-          await trade_embed.league_embed(inter.guild, inter.author, team)
-          fields = inter.message.embeds[0].fields
-          trade_embed.add_field(name = f"{team} Receives", value = fields[0].value)
-          trade_embed.add_field(name = f"{author_team} Receives", value = fields[1].value)
-
-          author_team_owner = await get_team_owner(inter.guild, author_team)
-
-          channel = await get_trade_channel(inter)
-          await channel.send(embed=trade_embed, content=author_team_owner.mention if author_team_owner else None, allowed_mentions=disnake.AllowedMentions(users=True))
-
-
-
-          # coach who clicked button
-          await inter.send("Trade Declined", ephemeral=True)
-
-          # get rid of buttons
-          await inter.message.edit(content=f"This trade has been declined", view=None)
-
-      if custom_id == f'trade_block_remove-{inter.guild.id}':
-         guild = inter.guild
-         await inter.response.defer(ephemeral=True)
-
-         # Getting teams again
-         teams = await search_embed_ids(inter.message.embeds[0].description, 'role', guild)
-         team = teams[0] # team
-
-         team_members = await guild_members(guild, team)
-         owner = await get_team_owner(guild, team)
-         if not inter.author in team_members and not owner:
-            return await inter.send(f"You are not the owner of the {team.mention}", ephemeral=True)
-
-         player = await search_embed_ids(inter.message.embeds[0].description, 'user', guild)
-         await Database.delete_data('TradeBlock', f'{guild.id}/{player[0].id}')
-         await inter.delete_original_message()
+    # custom_id is "<prefix>-<guild id>"
+    self.buttons = {
+      "accept_trade": self.accept_trade_button,
+      "decline_trade": self.decline_trade_button,
+      "trade_block_remove": self.trade_block_remove_button,
+    }
+    for prefix, handler in self.buttons.items():
+      bot.component_router.register(prefix, handler)
+
+  def cog_unload(self):
+    self.bot.component_router.unregister(*self.buttons)
+
+  async def accept_trade_button(self, inter, guild_id):
+      if guild_id != str(inter.guild.id):
+        return
+      guild = inter.guild
+      await inter.response.defer(ephemeral=True)
+
+      # Getting teams again
+      teams = await search_embed_ids(inter.message.embeds[0].description, 'role', guild)
+      author_team = teams[0] # author_team
+      team = teams[1] # team
+
+      team_members = await guild_members(inter.guild, team)
+      owner = await get_team_owner(inter.guild, team)
+      if not inter.author in team_members and not owner:
+         return await inter.send(f"You are not the owner of the {team.mention}", ephemeral=True)
+
+      # Getting users
+      author_trade_users = await search_embed_ids(inter.message.embeds[0].fields[1].value, 'user', guild)
+      team_trade_users = await search_embed_ids(inter.message.embeds[0].fields[0].value, 'user', guild)
+
+      # Adding and remove roles
+      # team1 role go to users2, etc
+      # One role edit per user for the whole trade
+      plan = RolePlan(guild)
+      for user in author_trade_users:
+         plan.add(user, team).remove(user, author_team)
+      for user in team_trade_users:
+         plan.add(user, author_team).remove(user, team)
+      await send_role_warnings(inter, await plan.apply(reason="Trade accepted"))
+
+      for user in author_trade_users + team_trade_users:
+         await Database.delete_data('TradeBlock', f'{guild.id}/{user.id}')
+
+      # Sending messages
+      # trade channel
+      trade_embed = Embed(
+        title = f'Trade Accepted',
+        description = f"The {team.mention} have **accepted** the {author_team.mention} trade offer",
+      )
+      await trade_embed.league_embed(inter.guild, inter.author, team)
+      fields = inter.message.embeds[0].fields
+      trade_embed.add_field(name = f"{team} Receives", value = fields[0].value)
+      trade_embed.add_field(name = f"{author_team} Receives", value = fields[1].value)
+
+      author_team_owner = await get_team_owner(inter.guild, author_team)
+
+      channel = await get_trade_channel(inter)
+
+      # notfi owner, nobody waits on it
+      await send_notfication_channel(inter.guild, trade_embed, inter.guild.owner.mention, background=True)
+
+      # trade channel, coach who clicked button and getting rid of buttons go out together
+      await asyncio.gather(
+        channel.send(embed=trade_embed, content=author_team_owner.mention if author_team_owner else None, allowed_mentions=disnake.AllowedMentions(users=True)),
+        inter.send("Trade Accepted", ephemeral=True),
+        inter.message.edit(content=f"This trade has been accepted", view=None),
+      )
+
+  async def decline_trade_button(self, inter, guild_id):
+      if guild_id != str(inter.guild.id):
+        return
+      guild = inter.guild
+      await inter.response.defer(ephemeral=True)
+      # check who is clicking, on team1, is coach
+
+      # Getting teams again
+      teams = await search_embed_ids(inter.message.embeds[0].description, 'role', guild)
+      author_team = teams[0] # author_team
+      team = teams[1] # team
+
+      team_members = await guild_members(inter.guild, team)
+      owner = await get_team_owner(inter.guild, team)
+      if not inter.author in team_members and not owner:
+         return await inter.send(f"You are not the owner of the {team.mention}", ephemeral=True)
+
+
+      # Sending messages
+      # trade channel
+      trade_embed = Embed(
+        title = f'Trade Declined',
+        description = f"The {team.mention} have **declined** the {author_team.mention} trade offer, below was what was offered",
+      )
+      await trade_embed.league_embed(inter.guild, inter.author, team)
+      fields = inter.message.embeds[0].fields
+      trade_embed.add_field(name = f"{team} Receives", value = fields[0].value)
+      trade_embed.add_field(name = f"{author_team} Receives", value = fields[1].value)
+
+      author_team_owner = await get_team_owner(inter.guild, author_team)
+
+      channel = await get_trade_channel(inter)
+      await channel.send(embed=trade_embed, content=author_team_owner.mention if author_team_owner else None, allowed_mentions=disnake.AllowedMentions(users=True))
+
+
+
+      # coach who clicked button
+      await inter.send("Trade Declined", ephemeral=True)
+
+      # get rid of buttons
+      await inter.message.edit(content=f"This trade has been declined", view=None)
+
+  async def trade_block_remove_button(self, inter, guild_id):
+      if guild_id != str(inter.guild.id):
+        return
+      guild = inter.guild
+      await inter.response.defer(ephemeral=True)
+
+      # Getting teams again
+      teams = await search_embed_ids(inter.message.embeds[0].description, 'role', guild)
+      team = teams[0] # team
+
+      team_members = await guild_members(guild, team)
+      owner = await get_team_owner(guild, team)
+      if not inter.author in team_members and not owner:
+         return await inter.send(f"You are not the owner of the {team.mention}", ephemeral=True)
+
+      player = await search_embed_ids(inter.message.embeds[0].description, 'user', guild)
+      await Database.delete_data('TradeBlock', f'{guild.id}/{player[0].id}')
+      await inter.delete_original_message()
 
  
   @commands.slash_command(name='trade-block')
@@ -2,6 +2,8 @@ import disnake, os, traceback, warnings, asyncio, logging
 from disnake.ext import commands
 from dotenv import load_dotenv
 from utils.database import Database
+from utils.components import ComponentRouter
+from utils.chunker import ChunkScheduler
 
 logging.basicConfig(
     level=logging.INFO,
@@ -28,24 +30,30 @@ class Bread(commands.AutoShardedInteractionBot):
         # Removed test_guilds to allow global command syncing to all servers
         super().__init__(intents=intents, activity=disnake.Game(name="nothing"), allowed_mentions=disnake.AllowedMentions(roles=False, everyone=False, users=False), chunk_guilds_at_startup = False, sync_commands_debug=False)
         self.bot = self
+        self.deep_check_started = False
+        # Cogs register their persistent button prefixes here, see utils/components.py
+        self.component_router = ComponentRouter()
 
     async def start(self, *args, **kwargs):
       logger.info("Initializing database...")
       db_instance = Database()
+      Database.clear_temp_files()
       
-      logger.info("Verifying database integrity...")
       try:
-        integrity_report = await Database.verify_integrity()
-        if integrity_report["corrupted"] > 0:
-          logger.warning(f"Found {integrity_report['corrupted']} corrupted files")
-          logger.info(f"Successfully recovered {integrity_report['recovered']} files")
-        else:
-          logger.info("All database files healthy")
+        migrated = await Database.migrate_to_shards()
+        if migrated:
+          logger.info(f"Split into per-guild shards: {', '.join(migrated)}")
         
-        if integrity_report["errors"]:
-          logger.error("Errors during database verification:")
-          for error in integrity_report["errors"]:
-            logger.error(f"  {error}")
+        copied = await Database.migrate_to_sqlite()
+        if copied:
+          logger.info(f"Copied {copied} tables from JSON files into SQLite")
+      except Exception as e:
+        logger.error(f"Error migrating database: {e}", exc_info=True)
+      
+      # Quick check: only files changed since they were last saved get parsed
+      logger.info("Verifying database integrity...")
+      try:
+        self.log_integrity_report(await Database.verify_integrity())
       except Exception as e:
         logger.error(f"Error during integrity check: {e}", exc_info=True)
 
@@ -65,9 +73,59 @@ class Bread(commands.AutoShardedInteractionBot):
       logger.info(f'Logged in as {self.user}')
       logger.info(f'Bot is in {len(self.guilds)} guilds')
       
+      # on_ready fires again after reconnects, only run the deep check once
+      if not self.deep_check_started:
+        self.deep_check_started = True
+        asyncio.create_task(self.deep_integrity_check())
+
+      await self.schedule_chunking()
+      
       # Commands will sync automatically with AutoShardedInteractionBot
       # Manual sync can be done via the /sync command if needed
 
+    async def on_button_click(self, inter):
+      await self.component_router.dispatch(inter)
+
+    async def schedule_chunking(self):
+      """
+      Queue every guild with teams set up to be chunked in the background
+      Other guilds are chunked the first time a command needs their members
+      """
+      try:
+        team_data = await Database.get_data("TeamRole") or {}
+      except Exception as e:
+        logger.error(f"Error loading teams for chunking: {e}", exc_info=True)
+        return
+
+      league_guilds = [guild for guild in self.guilds if str(guild.id) in team_data]
+      ChunkScheduler.schedule(league_guilds)
+      logger.info(f"Queued {len(league_guilds)} league guilds for chunking")
+
+    def log_integrity_report(self, report):
+      if report["corrupted"] > 0:
+        logger.warning(f"Found {report['corrupted']} corrupted files")
+        logger.info(f"Successfully recovered {report['recovered']} files")
+      else:
+        logger.info(f"All database files healthy ({report['skipped']} of {report['checked']} unchanged, {report['duration']} ms)")
+      
+      if report["errors"]:
+        logger.error("Errors during database verification:")
+        for error in report["errors"]:
+          logger.error(f"  {error}")
+
+    async def deep_integrity_check(self):
+      """
+      Parse every database file in the background once the bot is online
+      """
+      try:
+        report = await Database.verify_integrity(deep=True)
+        self.log_integrity_report(report)
+        slowest = sorted(report["timings"].items(), key=lambda item: item[1], reverse=True)[:5]
+        if slowest:
+          logger.info("Slowest database files: " + ", ".join(f"{name} ({ms} ms)" for name, ms in slowest))
+      except Exception as e:
+        logger.error(f"Error during deep integrity check: {e}", exc_info=True)
+
 bot = Bread()
 
 @bot.slash_command()
@@ -141,6 +199,37 @@ async def sync(inter):
         await inter.response.send_message("❌ Command tree not available. Commands should sync automatically.")
     except Exception as e:
       await inter.response.send_message(f"❌ Failed to sync commands: {e}")
+
+@bot.slash_command()
+@commands.is_owner()
+async def button_stats(inter):
+    """
+    Shows how long each button handler takes (owner only)
+    """
+    stats = bot.component_router.get_stats()
+    lines = [
+      f"`{prefix}`: {data['calls']} clicks, avg {data['avg_ms']:.1f} ms, p95 <= {data['p95_ms']} ms, max {data['max_ms']:.1f} ms, {data['errors']} errors"
+      for prefix, data in stats.items()
+    ]
+    await inter.response.send_message("\n".join(lines) or "No button handlers registered", ephemeral=True)
+
+@bot.slash_command()
+@commands.is_owner()
+async def chunk_status(inter):
+    """
+    Shows the background member chunking queue (owner only)
+    """
+    status = ChunkScheduler.get_status()
+    chunked = sum(1 for guild in bot.guilds if guild.chunked)
+    lines = [
+      f"Chunked guilds: {chunked}/{len(bot.guilds)}",
+      f"Queued: {status['queued']} ({', '.join(f'shard {shard}: {count}' for shard, count in status['shards'].items()) or 'empty'})",
+      f"Chunking now: {', '.join(f'{guild_id} ({seconds}s)' for guild_id, seconds in status['in_flight'].items()) or 'none'}",
+      f"Done: {status['chunked']}, failed: {status['failed']}, duplicate requests: {status['deduplicated']}",
+    ]
+    if status["recent"]:
+      lines.append("Recent: " + ", ".join(f"{item['guild']} ({item['members']} members, {item['ms']} ms)" for item in status["recent"]))
+    await inter.response.send_message("\n".join(lines), ephemeral=True)
             
 token = os.getenv("DISCORD_TOKEN")
 if not token:
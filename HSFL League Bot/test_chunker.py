@@ -0,0 +1,100 @@
+"""
+Tests for utils.chunker
+Run from the bot folder: python -m pytest -q test_chunker.py
+"""
+import asyncio
+
+import pytest
+
+from utils import chunker
+from utils.chunker import LEAGUE, ChunkScheduler
+
+
+class FakeGuild:
+    chunks = []
+    running = 0
+    most_running = 0
+
+    def __init__(self, guild_id, shard_id=0):
+        self.id = guild_id
+        self.shard_id = shard_id
+        self.chunked = False
+        self.members = []
+
+    async def chunk(self):
+        FakeGuild.chunks.append(self.id)
+        FakeGuild.running += 1
+        FakeGuild.most_running = max(FakeGuild.most_running, FakeGuild.running)
+        await asyncio.sleep(0.01)
+        FakeGuild.running -= 1
+        self.chunked = True
+
+
+@pytest.fixture(autouse=True)
+def scheduler(monkeypatch):
+    monkeypatch.setattr(chunker, "CHUNK_INTERVAL", 0)
+    FakeGuild.chunks = []
+    FakeGuild.most_running = 0
+    ChunkScheduler.stop()
+    yield
+    ChunkScheduler.stop()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_requests_share_one_chunk():
+    guild = FakeGuild(1)
+
+    async def scenario():
+        futures = [ChunkScheduler.request(guild) for _ in range(5)]
+        return await asyncio.gather(*futures)
+
+    assert run(scenario()) == [True] * 5
+    assert FakeGuild.chunks == [1]
+    assert ChunkScheduler.get_status()["deduplicated"] == 4
+
+
+def test_urgent_and_active_guilds_go_first():
+    quiet, busy, waiting = FakeGuild(1), FakeGuild(2), FakeGuild(3)
+
+    async def scenario():
+        ChunkScheduler.schedule([quiet, busy, waiting])
+        ChunkScheduler.touch(busy)
+        await ChunkScheduler.wait(waiting)
+        await ChunkScheduler.request(quiet)
+
+    run(scenario())
+    assert FakeGuild.chunks == [3, 2, 1]
+
+
+def test_wait_gives_up_after_timeout():
+    guild = FakeGuild(1)
+
+    async def slow_chunk():
+        await asyncio.sleep(1)
+
+    guild.chunk = slow_chunk
+
+    async def scenario():
+        started = asyncio.get_running_loop().time()
+        chunked = await ChunkScheduler.wait(guild, 0.05)
+        return chunked, asyncio.get_running_loop().time() - started, ChunkScheduler.get_status()
+
+    chunked, elapsed, status = run(scenario())
+    assert not chunked
+    assert elapsed < 0.5
+    assert list(status["in_flight"]) == [1]
+
+
+def test_shards_chunk_in_parallel():
+    guilds = [FakeGuild(guild_id, shard_id=guild_id % 2) for guild_id in range(4)]
+
+    async def scenario():
+        await asyncio.gather(*(ChunkScheduler.request(guild, LEAGUE) for guild in guilds))
+
+    run(scenario())
+    assert sorted(FakeGuild.chunks) == [0, 1, 2, 3]
+    # One chunk at a time per shard, both shards at once
+    assert FakeGuild.most_running == 2
@@ -0,0 +1,76 @@
+"""
+Tests for utils.components
+Run from the bot folder: python -m pytest -q test_components.py
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils.components import ComponentRouter
+
+
+def click(custom_id):
+    return SimpleNamespace(component=SimpleNamespace(custom_id=custom_id))
+
+
+def test_parse_splits_on_last_dash():
+    assert ComponentRouter.parse("trade_block_remove-123") == ("trade_block_remove", "123")
+    assert ComponentRouter.parse("a-b-123") == ("a-b", "123")
+    assert ComponentRouter.parse("edit_embed") == ("edit_embed", "")
+
+
+def test_dispatch_runs_one_handler():
+    router = ComponentRouter()
+    calls = []
+
+    async def game_time(inter, arg):
+        calls.append(("gametime", arg))
+
+    async def notes(inter, arg):
+        calls.append(("notes", arg))
+
+    router.register("gametime", game_time)
+    router.register("notes", notes)
+
+    async def scenario():
+        return [
+            await router.dispatch(click("gametime-42")),
+            await router.dispatch(click("unknown-42")),
+            await router.dispatch(SimpleNamespace(component=None)),
+        ]
+
+    assert asyncio.run(scenario()) == [True, False, False]
+    assert calls == [("gametime", "42")]
+    assert router.get_stats()["gametime"]["calls"] == 1
+    assert router.get_stats()["notes"]["calls"] == 0
+
+
+def test_handler_errors_are_counted():
+    router = ComponentRouter()
+
+    async def broken(inter, arg):
+        raise RuntimeError("boom")
+
+    router.register("broken", broken)
+    asyncio.run(router.dispatch(click("broken-1")))
+    stats = router.get_stats()["broken"]
+    assert (stats["calls"], stats["errors"]) == (1, 1)
+    assert sum(stats["buckets"].values()) == 1
+
+
+def test_unregister_and_duplicate_prefixes():
+    router = ComponentRouter()
+
+    async def first(inter, arg):
+        pass
+
+    async def second(inter, arg):
+        pass
+
+    router.register("pickup", first)
+    with pytest.raises(ValueError):
+        router.register("pickup", second)
+    router.unregister("pickup")
+    router.register("pickup", second)
+    assert asyncio.run(router.dispatch(click("pickup-1")))
@@ -0,0 +1,470 @@
+"""
+Tests for utils.database
+Run from the bot folder: python -m pytest -q test_database.py
+Every test runs in a temporary folder, the parity tests run once per backend
+"""
+import asyncio
+import copy
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from utils.database import Database
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Database.invalidate_cache()
+    yield tmp_path
+    Database.use_backend("json")
+    Database.invalidate_cache()
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request, workdir):
+    Database.use_backend(request.param, workdir / "league.db")
+    return request.param
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_add_data_merges_nested_values(backend):
+    async def scenario():
+        await Database.add_data("Users", {1: {10: {"contract": "2 seasons"}}})
+        await Database.add_data("Users", {"1": {"10": {"demands": 1}, "11": {"demands": 2}}})
+        return await Database.get_data("Users", 1), await Database.get_data("Users", "1/10/contract")
+
+    guild, contract = run(scenario())
+    assert guild == {"10": {"contract": "2 seasons", "demands": "1"}, "11": {"demands": "2"}}
+    assert contract == "2 seasons"
+
+
+def test_get_data_paths(backend):
+    async def scenario():
+        await Database.add_data("TeamRole", {5: ["100", "200"]})
+        await Database.add_data("Premium", {"42": ["5"]})
+        return (
+            await Database.get_data("TeamRole", 5),
+            await Database.get_data("TeamRole", [5]),
+            await Database.get_data("TeamRole", 6),
+            await Database.get_data("Premium"),
+            await Database.get_data("Missing"),
+            await Database.get_data("Premium", "42/missing/deeper"),
+        )
+
+    assert run(scenario()) == (["100", "200"], ["100", "200"], None, {"42": ["5"]}, None, None)
+
+
+def test_non_dict_values_replace(backend):
+    async def scenario():
+        await Database.add_data("Signing", {7: "Off"})
+        await Database.add_data("Signing", {7: "On"})
+        await Database.add_data("RosterCap", {7: {"old": 1}})
+        await Database.add_data("RosterCap", {7: 25})
+        return await Database.get_data("Signing", 7), await Database.get_data("RosterCap", 7)
+
+    assert run(scenario()) == ("On", "25")
+
+
+def test_delete_data_levels(backend):
+    async def scenario():
+        await Database.add_data("Users", {1: {10: {"a": 1, "b": 2}, 11: {"a": 3}}, 2: {20: {"a": 4}}})
+        await Database.delete_data("Users", "1/10/a")
+        await Database.delete_data("Users", [1, 11])
+        after_nested = await Database.get_data("Users")
+        await Database.delete_data("Users", 2)
+        after_guild = await Database.get_data("Users")
+        await Database.delete_data("Users")
+        return after_nested, after_guild, await Database.get_data("Users")
+
+    after_nested, after_guild, after_table = run(scenario())
+    assert after_nested == {"1": {"10": {"b": "2"}}, "2": {"20": {"a": "4"}}}
+    assert after_guild == {"1": {"10": {"b": "2"}}}
+    assert after_table is None
+
+
+def test_deleting_last_entity_keeps_empty_guild(backend):
+    async def scenario():
+        await Database.add_data("CoachTeamMapping", {1: {10: "500"}})
+        await Database.delete_data("CoachTeamMapping", "1/10")
+        return await Database.get_data("CoachTeamMapping", 1)
+
+    assert run(scenario()) == {}
+
+
+def test_prefix_and_keys(backend):
+    async def scenario():
+        await Database.add_data("Users", {1: {10: {"a": 1}}})
+        await Database.add_data("Premium", {"42": ["1"]})
+        return (
+            sorted(await Database.get_db_keys()),
+            await Database.get_db_prefix("Us"),
+            sorted(await Database.get_db_all()),
+        )
+
+    keys, prefixed, everything = run(scenario())
+    assert keys == ["Premium", "Users"]
+    assert prefixed == {"Users": {"1": {"10": {"a": "1"}}}}
+    assert everything == ["Premium", "Users"]
+
+
+def test_batch_commits_together(backend):
+    async def scenario():
+        await Database.add_data("Users", {1: {10: {"demands": 1}}})
+        async with Database.batch() as batch:
+            for user_id in range(10, 15):
+                record = await batch.get_data("Users", f"1/{user_id}") or {}
+                record["seen"] = "yes"
+                await batch.add_data("Users", {1: {user_id: record}})
+            await batch.delete_data("Users", "1/14")
+            staged = await batch.get_data("Users", "1/10")
+        return staged, await Database.get_data("Users", 1)
+
+    staged, guild = run(scenario())
+    assert staged == {"demands": "1", "seen": "yes"}
+    assert sorted(guild) == ["10", "11", "12", "13"]
+
+
+def test_batch_discards_on_error(backend):
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            async with Database.batch() as batch:
+                await batch.add_data("Users", {1: {10: {"a": 1}}})
+                raise RuntimeError
+        return await Database.get_data("Users")
+
+    assert run(scenario()) is None
+
+
+def test_return_values_match_between_backends(workdir):
+    async def scenario():
+        # The JSON backend hands back its cached data, so each result is copied before the next write
+        calls = [
+            lambda: Database.add_data("Users", {1: {10: {"a": 1}}, 2: {20: {"b": 2}}}),
+            lambda: Database.add_data("Users", {1: {10: {"c": 3}}}),
+            lambda: Database.add_data("Premium", {"42": ["5"]}),
+            lambda: Database.add_data("Premium", {"43": ["6"]}),
+            lambda: Database.delete_data("Users", "1/10/a"),
+            lambda: Database.delete_data("Users", "1/10"),
+            lambda: Database.delete_data("Users", "3/30"),
+            lambda: Database.delete_data("Users", 2),
+            lambda: Database.delete_data("Users", 9),
+            lambda: Database.delete_data("Premium", "42"),
+            lambda: Database.delete_data("Missing", "1/2"),
+            lambda: Database.delete_data("Premium"),
+            lambda: Database.delete_data("Premium"),
+        ]
+        return [copy.deepcopy(await call()) for call in calls]
+
+    results = {}
+    for name in ("json", "sqlite"):
+        Database.use_backend(name, workdir / "league.db")
+        results[name] = run(scenario())
+    assert results["sqlite"] == results["json"]
+    assert results["json"][1] == {"1": {"10": {"a": "1", "c": "3"}}}
+    assert results["json"][3] == {"42": ["5"], "43": ["6"]}
+
+
+def test_batch_does_not_block_other_tasks(backend):
+    async def scenario():
+        async with Database.batch() as batch:
+            await batch.add_data("Users", {1: {10: {"a": 1}}})
+            # A task spawned inside the block, and one that has nothing to do with it
+            await asyncio.gather(
+                Database.add_data("Users", {1: {11: {"a": 2}}}),
+                asyncio.create_task(Database.get_data("Users", "1/11")),
+            )
+            assert await Database.get_data("Users", "1/10") is None
+            assert await batch.get_data("Users", "1/10") == {"a": "1"}
+        return await Database.get_data("Users", 1)
+
+    assert run(asyncio.wait_for(scenario(), 10)) == {"10": {"a": "1"}, "11": {"a": "2"}}
+
+
+def test_failed_batch_call_stages_nothing(backend):
+    async def scenario():
+        async with Database.batch() as batch:
+            for user_id, value in ((10, 1), (11, object()), (12, 3)):
+                try:
+                    await batch.add_data("Users", {1: {user_id: {"a": value}}})
+                except ValueError:
+                    pass
+        return await Database.get_data("Users", 1)
+
+    assert run(scenario()) == {"10": {"a": "1"}, "12": {"a": "3"}}
+
+
+def test_clear_all_removes_every_table(backend, workdir):
+    async def scenario():
+        await Database.add_data("Users", {1: {10: {"a": 1}}})
+        # A second write goes to the journal
+        await Database.add_data("Users", {1: {11: {"a": 2}}})
+        await Database.add_data("Premium", {"42": ["5"]})
+        cleared = await Database.clear_all()
+        return cleared, await Database.get_data("Users"), await Database.get_data("Premium"), await Database.get_db_keys()
+
+    cleared, users, premium, keys = run(scenario())
+    assert cleared == ["Premium", "Users"]
+    assert users is None and premium is None and keys == []
+    assert not (workdir / "database" / "Users").exists()
+
+
+def test_guild_tables_need_dicts(backend):
+    with pytest.raises(ValueError):
+        run(Database.add_data("Users", ["not", "a", "dict"]))
+
+
+def test_sqlite_migration_copies_json(workdir):
+    async def scenario():
+        await Database.add_data("Users", {1: {10: {"a": 1}}})
+        await Database.add_data("Premium", {"42": ["1"]})
+        Database.use_backend("sqlite", workdir / "league.db")
+        copied = await Database.migrate_to_sqlite()
+        again = await Database.migrate_to_sqlite()
+        return copied, again, await Database.get_db_all()
+
+    copied, again, data = run(scenario())
+    assert (copied, again) == (2, 0)
+    assert data == {"Premium": {"42": ["1"]}, "Users": {"1": {"10": {"a": "1"}}}}
+
+
+def test_shard_migration_splits_flat_files(workdir):
+    (workdir / "database").mkdir(exist_ok=True)
+    (workdir / "database" / "Users.json").write_text('{"1": {"10": {"a": "1"}}, "2": {}}')
+
+    async def scenario():
+        first = await Database.migrate_to_shards()
+        second = await Database.migrate_to_shards()
+        return first, second, await Database.get_data("Users")
+
+    first, second, data = run(scenario())
+    assert (first, second) == (["Users"], [])
+    assert data == {"1": {"10": {"a": "1"}}, "2": {}}
+    assert sorted(path.name for path in (workdir / "database" / "Users").iterdir()) == ["1.json", "2.json"]
+
+
+def test_cache_serves_repeat_reads(workdir):
+    async def scenario():
+        await Database.add_data("Users", {1: {10: {"a": 1}}})
+        before = Database.get_cache_stats()["hits"]
+        result = await Database.get_data("Users", "1/10")
+        result["a"] = "changed"
+        return before, Database.get_cache_stats()["hits"], await Database.get_data("Users", "1/10/a")
+
+    before, after, value = run(scenario())
+    assert after > before
+    assert value == "1"
+
+
+def test_concurrent_writes_keep_every_update(workdir):
+    async def scenario():
+        await asyncio.gather(*(Database.add_data("Users", {1: {user_id: {"a": 1}}}) for user_id in range(40)))
+        Database.invalidate_cache()
+        return await Database.get_data("Users", 1)
+
+    assert len(run(scenario())) == 40
+    assert Database.get_lock_stats()["acquired"] >= 40
+
+
+def _write_from_other_process(workdir, key, value):
+    script = f"import asyncio; from utils.database import Database; asyncio.run(Database.add_data({key!r}, {value!r}))"
+    env = dict(os.environ, PYTHONPATH=str(Path(__file__).parent))
+    subprocess.run([sys.executable, "-c", script], cwd=workdir, env=env, check=True)
+
+
+@pytest.mark.parametrize("key", ["Premium", "CoachTeamMapping", "Users"])
+def test_writes_from_another_process_are_kept(workdir, key):
+    async def scenario():
+        await Database.add_data(key, {"1": {"a": 1}})
+        _write_from_other_process(workdir, key, {"1": {"b": 2}})
+        result = await Database.add_data(key, {"1": {"c": 3}})
+        Database.invalidate_cache()
+        return result, await Database.get_data(key, 1)
+
+    result, stored = run(scenario())
+    assert result["1"] == stored == {"a": "1", "b": "2", "c": "3"}
+
+
+def test_batch_keeps_writes_made_during_it(backend):
+    async def scenario():
+        async with Database.batch() as batch:
+            await batch.add_data("Users", {1: {10: {"a": 1}}})
+            await Database.add_data("Users", {1: {11: {"a": 2}}})
+            during = await Database.get_data("Users", "1/11")
+        return during, await Database.get_data("Users", 1)
+
+    # Fails instead of hanging if a call inside the batch waits on it
+    during, after = run(asyncio.wait_for(scenario(), 10))
+    assert during == {"a": "2"}
+    assert after == {"10": {"a": "1"}, "11": {"a": "2"}}
+
+
+def test_clear_temp_files_keeps_locks(workdir):
+    lock_dir = workdir / "database" / "locks"
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    (lock_dir / "Users-1.lock").touch()
+    shard_dir = workdir / "database" / "Users"
+    shard_dir.mkdir()
+    (shard_dir / ".1.json.123.tmp").touch()
+
+    assert Database.clear_temp_files() == 1
+    assert not (shard_dir / ".1.json.123.tmp").exists()
+    assert (lock_dir / "Users-1.lock").exists()
+
+
+def test_failed_save_keeps_old_file(workdir, monkeypatch):
+    async def scenario():
+        await Database.add_data("Premium", {"42": ["1"]})
+
+        def broken_replace(src, dst):
+            raise OSError("disk full")
+
+        with monkeypatch.context() as patch:
+            patch.setattr("utils.database.os.replace", broken_replace)
+            with pytest.raises(OSError):
+                await Database.add_data("Premium", {"43": ["2"]})
+        return await Database.get_data("Premium")
+
+    assert run(scenario()) == {"42": ["1"]}
+    assert not list((workdir / "database").rglob("*.tmp"))
+
+
+def test_snapshots_are_rate_limited(workdir, monkeypatch):
+    monkeypatch.setattr(Database, "_last_snapshot", {})
+
+    async def scenario():
+        for value in range(5):
+            await Database.add_data("Premium", {"42": [value]})
+
+    run(scenario())
+    assert len(list((workdir / "database" / "backups").glob("Premium_*.json"))) == 1
+
+
+def _journal(workdir, guild_id=1):
+    return workdir / "database" / "Users" / f"{guild_id}.log"
+
+
+def test_journal_appends_small_writes(workdir):
+    async def scenario():
+        await Database.add_data("Users", {1: {10: {"demands": 0}}})
+        for demands in range(1, 4):
+            await Database.add_data("Users", {1: {10: {"demands": demands}}})
+        await Database.delete_data("Users", "1/10/contract")
+        Database.invalidate_cache()
+        return await Database.get_data("Users", "1/10")
+
+    assert run(scenario()) == {"demands": "3"}
+    assert len(_journal(workdir).read_text().splitlines()) == 4
+
+
+def test_journal_torn_record_is_dropped(workdir):
+    async def scenario():
+        await Database.add_data("Users", {1: {10: {"demands": 0}}})
+        await Database.add_data("Users", {1: {10: {"demands": 1}}})
+        await Database.add_data("Users", {1: {11: {"demands": 5}}})
+
+    run(scenario())
+    journal = _journal(workdir)
+    # Crash halfway through writing the last record
+    journal.write_bytes(journal.read_bytes()[:-9])
+
+    async def reload():
+        Database.invalidate_cache()
+        before = await Database.get_data("Users", 1)
+        await Database.add_data("Users", {1: {12: {"demands": 2}}})
+        Database.invalidate_cache()
+        return before, await Database.get_data("Users", 1)
+
+    before, after = run(reload())
+    assert before == {"10": {"demands": "1"}}
+    assert after == {"10": {"demands": "1"}, "12": {"demands": "2"}}
+
+
+def test_journal_garbage_record_stops_replay(workdir):
+    async def scenario():
+        await Database.add_data("Users", {1: {10: {"demands": 0}}})
+        await Database.add_data("Users", {1: {10: {"demands": 1}}})
+
+    run(scenario())
+    with open(_journal(workdir), "ab") as journal:
+        journal.write(b'{"op":"merge","val\n{"op":"merge","value":{"1":{"10":{"demands":"9"}}}}\n')
+
+    Database.invalidate_cache()
+    assert run(Database.get_data("Users", "1/10/demands")) == "1"
+
+
+def test_journal_is_compacted_past_threshold(workdir, monkeypatch):
+    monkeypatch.setattr("utils.database.JOURNAL_COMPACT_BYTES", 200)
+
+    async def scenario():
+        await Database.add_data("Users", {1: {10: {"demands": 0}}})
+        for demands in range(1, 10):
+            await Database.add_data("Users", {1: {10: {"demands": demands}}})
+        await asyncio.gather(*Database._compactions.values())
+        return await Database.compact_journals()
+
+    run(scenario())
+    assert not _journal(workdir).exists()
+    Database.invalidate_cache()
+    assert run(Database.get_data("Users", "1/10/demands")) == "9"
+
+
+def test_integrity_accepts_empty_tables(workdir):
+    async def scenario():
+        await Database.add_data("Premium", {"42": ["1"]})
+        (workdir / "database" / "Blacklist.json").write_text("{}")
+        return await Database.verify_integrity(deep=True)
+
+    report = run(scenario())
+    assert (report["checked"], report["corrupted"], report["errors"]) == (2, 0, [])
+    assert sorted(report["timings"]) == ["Blacklist.json", "Premium.json"]
+    assert (workdir / "database" / "Blacklist.json").read_text() == "{}"
+
+
+def test_quick_integrity_check_skips_unchanged_files(workdir):
+    async def scenario():
+        await Database.add_data("Premium", {"42": ["1"]})
+        await Database.add_data("Users", {1: {10: {"a": 1}}})
+        await Database.flush_manifest()
+        Database.invalidate_cache()
+        first = await Database.verify_integrity()
+        (workdir / "database" / "Premium.json").write_text('{"42": [')
+        return first, await Database.verify_integrity()
+
+    first, second = run(scenario())
+    assert (first["checked"], first["skipped"], first["corrupted"]) == (2, 2, 0)
+    assert (second["skipped"], second["corrupted"]) == (1, 1)
+    assert list(second["timings"]) == ["Premium.json"]
+
+
+def test_summary_counts_entries(backend):
+    async def scenario():
+        await Database.add_data("Users", {1: {10: {"a": 1}}, 2: {20: {"a": 2}}})
+        await Database.add_data("Premium", {"42": ["1"], "43": ["2"]})
+        return await Database.get_db_summary()
+
+    summary = run(scenario())
+    assert sorted(summary) == ["Premium", "Users"]
+    assert (summary["Users"]["entries"], sorted(summary["Users"]["preview"])) == (2, ["1", "2"])
+    assert (summary["Premium"]["entries"], summary["Premium"]["preview"]) == (2, ["42", "43"])
+    assert summary["Premium"]["size"] > 0
+
+
+def test_summary_does_not_parse_saved_files(workdir, monkeypatch):
+    async def scenario():
+        await Database.add_data("Premium", {"42": ["1"]})
+
+        def no_parse(raw):
+            raise AssertionError("parsed a file the manifest already describes")
+
+        with monkeypatch.context() as patch:
+            patch.setattr("utils.database.codec.loads", no_parse)
+            return await Database.get_db_summary()
+
+    assert run(scenario())["Premium"]["entries"] == 1
@@ -0,0 +1,91 @@
+"""
+Tests for utils.fanout
+Run from the bot folder: python -m pytest -q test_fanout.py
+"""
+import asyncio
+from types import SimpleNamespace
+
+import disnake
+import pytest
+
+from utils.fanout import Fanout
+
+
+class FakeChannel:
+    def __init__(self, channel_id, log, error=None):
+        self.id = channel_id
+        self.log = log
+        self.error = error
+
+    async def send(self, **kwargs):
+        self.log.append(("start", self.id))
+        await asyncio.sleep(0.01)
+        self.log.append(("end", self.id))
+        if self.error:
+            raise self.error
+
+
+def guild_with(channels):
+    return SimpleNamespace(id=1, get_channel_or_thread=lambda channel_id: channels.get(channel_id))
+
+
+@pytest.fixture(autouse=True)
+def fresh_fanout(monkeypatch):
+    # Queues and locks belong to one event loop, every test runs its own
+    monkeypatch.setattr(Fanout, "_channel_locks", {})
+    monkeypatch.setattr(Fanout, "_semaphore", None)
+    monkeypatch.setattr(Fanout, "_queue", None)
+    monkeypatch.setattr(Fanout, "_worker", None)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_channels_are_sent_to_together():
+    log = []
+    guild = guild_with({channel_id: FakeChannel(channel_id, log) for channel_id in (1, 2, 3)})
+
+    result = run(Fanout.send(guild, ["1", 2, 3, 3], "Transactions", content="hi"))
+    assert sorted(result.sent) == [1, 2, 3]
+    # Every send started before the first one finished, duplicates are dropped
+    assert [event for event, _ in log] == ["start"] * 3 + ["end"] * 3
+
+
+def test_failures_are_collected():
+    log = []
+    response = SimpleNamespace(status=403, reason="Forbidden")
+    guild = guild_with({
+        1: FakeChannel(1, log),
+        2: FakeChannel(2, log, disnake.Forbidden(response, "Missing Access")),
+    })
+
+    result = run(Fanout.send(guild, [1, 2, 3, "x"], "Notification", content="hi"))
+    assert result.sent == [1]
+    assert result.failed == {2: "no permission", 3: "missing", "x": "bad id"}
+    assert result.summary("Notification").startswith("Sent to 1/4 Notification channels")
+
+
+def test_same_channel_sends_wait_for_each_other():
+    log = []
+    guild = guild_with({1: FakeChannel(1, log)})
+
+    async def scenario():
+        await asyncio.gather(Fanout.send(guild, [1]), Fanout.send(guild, [1]))
+
+    run(scenario())
+    assert [event for event, _ in log] == ["start", "end", "start", "end"]
+
+
+def test_send_later_goes_out_in_the_background():
+    log = []
+    guild = guild_with({1: FakeChannel(1, log), 2: FakeChannel(2, log)})
+
+    async def scenario():
+        Fanout.send_later(guild, [1, 2], "Notification", content="hi")
+        queued = list(log)
+        await Fanout.join()
+        return queued
+
+    assert run(scenario()) == []
+    assert sorted(channel_id for event, channel_id in log if event == "end") == [1, 2]
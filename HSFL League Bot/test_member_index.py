@@ -0,0 +1,37 @@
+"""
+Tests for utils.member_index
+Run from the bot folder: python -m pytest -q test_member_index.py
+"""
+from types import SimpleNamespace
+
+from utils.member_index import MemberIndex
+
+
+def member(member_id, name, nick=None, global_name=None):
+    return SimpleNamespace(
+        id=member_id,
+        name=name,
+        global_name=global_name,
+        display_name=nick or global_name or name,
+    )
+
+
+def test_names_are_case_folded():
+    index = MemberIndex([member(1, "bread", nick="Loaf", global_name="Bread Man")])
+    assert index.get("BREAD") == 1
+    assert index.get(" loaf ") == 1
+    assert index.get("bread man") == 1
+    assert index.get("toast") is None
+
+
+def test_first_member_wins_like_a_scan():
+    members = [member(1, "alice"), member(2, "bob", nick="Alice"), member(3, "carol")]
+    assert MemberIndex(members).get("alice") == 1
+    assert MemberIndex(members[1:]).get("alice") == 2
+
+
+def test_fuzzy_needs_the_cutoff():
+    index = MemberIndex([member(1, "breadwinner"), member(2, "toaster")])
+    assert index.fuzzy("breadwiner")[0] == 1
+    assert index.fuzzy("bagel") is None
+    assert index.fuzzy("toastr", cutoff=80)[0] == 2
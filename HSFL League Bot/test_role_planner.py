@@ -0,0 +1,125 @@
+"""
+Tests for utils.role_planner
+Run from the bot folder: python -m pytest -q test_role_planner.py
+"""
+import asyncio
+from types import SimpleNamespace
+
+import disnake
+import pytest
+from disnake.utils import SnowflakeList
+
+from utils.database import Database
+from utils.role_planner import RolePlan
+
+GUILD_ID = 1
+TEAM, AFTER_SIGN, FREE_AGENT, COACH = 100, 200, 300, 400
+
+
+class FakeMember:
+    def __init__(self, member_id, role_ids, error=None):
+        self.id = member_id
+        self._roles = SnowflakeList(role_ids)
+        self.edits = []
+        # ("add" or "remove", role id) for each per-role request
+        self.role_requests = []
+        self.error = error
+
+    async def edit(self, roles, reason=None):
+        self.edits.append(sorted(role.id for role in roles))
+        if self.error:
+            raise self.error
+        self._roles = SnowflakeList(role.id for role in roles)
+
+    async def add_roles(self, role, reason=None):
+        self.role_requests.append(("add", role.id))
+        if self.error:
+            raise self.error
+        self._roles.add(role.id)
+
+    async def remove_roles(self, role, reason=None):
+        self.role_requests.append(("remove", role.id))
+        if self.error:
+            raise self.error
+        self._roles.remove(role.id)
+
+
+guild = SimpleNamespace(id=GUILD_ID, get_role=lambda role_id: role_id if role_id in (TEAM, AFTER_SIGN, FREE_AGENT, COACH) else None)
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(RolePlan, "_semaphores", {})
+    Database.invalidate_cache()
+    yield tmp_path
+    Database.invalidate_cache()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_signing_is_one_edit():
+    member = FakeMember(10, [FREE_AGENT, 999])
+
+    async def scenario():
+        await Database.add_data("AfterSignRole", {GUILD_ID: [str(AFTER_SIGN), "12345"]})
+        await Database.add_data("FreeAgentRole", {GUILD_ID: [str(FREE_AGENT)]})
+        plan = RolePlan(guild)
+        plan.add(member, TEAM)
+        await plan.add_table(member, "AfterSignRole")
+        await plan.remove_table(member, "FreeAgentRole")
+        return await plan.apply()
+
+    result = run(scenario())
+    # The deleted 12345 role is skipped, roles the plan doesn't touch are kept
+    assert member.edits == [[TEAM, AFTER_SIGN, 999]]
+    assert result.edited == [member]
+
+
+def test_members_with_nothing_to_change_are_skipped():
+    member = FakeMember(10, [TEAM])
+
+    result = run(RolePlan(guild).add(member, TEAM).remove(member, COACH).apply())
+    assert member.edits == []
+    assert result.unchanged == [member]
+
+
+def test_last_change_wins_and_failures_are_collected():
+    traded = FakeMember(10, [TEAM])
+    locked = FakeMember(11, [TEAM], disnake.Forbidden(SimpleNamespace(status=403, reason="Forbidden"), "Missing Permissions"))
+    progress = []
+
+    async def on_progress(done, total):
+        progress.append((done, total))
+
+    plan = RolePlan(guild)
+    plan.remove(traded, TEAM).add(traded, COACH).remove(traded, COACH)
+    plan.remove(locked, TEAM)
+    result = run(plan.apply(on_progress))
+
+    # COACH was never held, so only TEAM changes and that's one per-role request
+    assert traded.edits == []
+    assert traded.role_requests == [("remove", TEAM)]
+    assert list(traded._roles) == []
+    assert result.ok(traded)
+    assert not result.ok(locked)
+    assert result.failed[locked] == "Missing permissions"
+    assert progress == [(1, 2), (2, 2)]
+
+
+def test_single_role_changes_do_not_replace_the_role_list():
+    signed = FakeMember(10, [999])
+    traded = FakeMember(11, [TEAM, FREE_AGENT])
+
+    plan = RolePlan(guild)
+    plan.add(signed, TEAM).remove(signed, FREE_AGENT)
+    plan.remove(traded, TEAM, FREE_AGENT)
+    result = run(plan.apply())
+
+    # One role to change is an add/remove for that role, roles changed elsewhere can't be undone by it
+    assert signed.edits == [] and signed.role_requests == [("add", TEAM)]
+    # Two or more is one full replace
+    assert traded.edits == [[]] and traded.role_requests == []
+    assert result.edited == [signed, traded]
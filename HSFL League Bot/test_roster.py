@@ -0,0 +1,129 @@
+"""
+Tests for utils.roster
+Run from the bot folder: python -m pytest -q test_roster.py
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from disnake.utils import SnowflakeList
+
+from utils.database import Database
+from utils.roster import RosterIndex
+from utils.tools import guild_members
+
+GUILD_ID = 1
+TEAM_A, TEAM_B, OTHER = 100, 200, 300
+
+
+class FakeGuild:
+    def __init__(self, members):
+        self.id = GUILD_ID
+        self.chunked = True
+        self._members = {}
+        self._roles = {TEAM_A, TEAM_B, OTHER}
+        for member_id, role_ids in members.items():
+            self.add(member_id, role_ids)
+
+    def add(self, member_id, role_ids):
+        member = SimpleNamespace(id=member_id, guild=self, _roles=SnowflakeList(role_ids))
+        self._members[member_id] = member
+        return member
+
+    @property
+    def members(self):
+        return list(self._members.values())
+
+    def get_member(self, member_id):
+        return self._members.get(member_id)
+
+    def get_role(self, role_id):
+        return role_id if role_id in self._roles else None
+
+
+def role(role_id, guild, members=()):
+    return SimpleNamespace(id=role_id, guild=guild, members=list(members))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Database.invalidate_cache()
+    RosterIndex.forget()
+    yield tmp_path
+    RosterIndex.forget()
+    Database.invalidate_cache()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def ids(members):
+    return sorted(member.id for member in members)
+
+
+def test_rosters_follow_member_events(workdir):
+    guild = FakeGuild({1: [TEAM_A], 2: [TEAM_A, OTHER], 3: [TEAM_B], 4: [OTHER]})
+    team_a, team_b = role(TEAM_A, guild), role(TEAM_B, guild)
+
+    async def scenario():
+        await Database.add_data("TeamRole", {GUILD_ID: [str(TEAM_A), str(TEAM_B)]})
+        results = [ids(await guild_members(guild, team_a))]
+
+        # 1 gets traded to B, 4 joins A, 2 leaves, 5 joins the server on A
+        guild.get_member(1)._roles = SnowflakeList([TEAM_B])
+        RosterIndex.update_member(guild.get_member(1))
+        guild.get_member(4)._roles = SnowflakeList([OTHER, TEAM_A])
+        RosterIndex.update_member(guild.get_member(4))
+        del guild._members[2]
+        RosterIndex.remove_member(GUILD_ID, 2)
+        RosterIndex.update_member(guild.add(5, [TEAM_A]))
+
+        results.append(ids(await guild_members(guild, team_a)))
+        results.append(ids(await guild_members(guild, team_b)))
+        results.append(await RosterIndex.member_teams(guild, 1))
+        results.append(await RosterIndex.team_sizes(guild))
+        return results
+
+    before, after_a, after_b, teams_of_1, sizes = run(scenario())
+    assert before == [1, 2]
+    assert after_a == [4, 5]
+    assert after_b == [1, 3]
+    assert teams_of_1 == {TEAM_B}
+    assert sizes == {TEAM_A: 2, TEAM_B: 2}
+    assert RosterIndex.get_stats()["builds"] == 1
+
+
+def test_non_team_roles_fall_back_to_role_members(workdir):
+    guild = FakeGuild({1: [TEAM_A], 2: [OTHER]})
+    other = role(OTHER, guild, [guild.get_member(2)])
+
+    async def scenario():
+        await Database.add_data("TeamRole", {GUILD_ID: [str(TEAM_A)]})
+        return await guild_members(guild, other)
+
+    assert ids(run(scenario())) == [2]
+
+
+def test_index_rebuilds_when_teams_change(workdir):
+    guild = FakeGuild({1: [TEAM_A], 2: [TEAM_B]})
+
+    async def scenario():
+        await Database.add_data("TeamRole", {GUILD_ID: [str(TEAM_A)]})
+        first = await RosterIndex.team_sizes(guild)
+        await Database.add_data("TeamRole", {GUILD_ID: [str(TEAM_A), str(TEAM_B)]})
+        second = await RosterIndex.team_sizes(guild)
+        # Deleting a role leaves its id in member._roles
+        guild._roles.discard(TEAM_B)
+        RosterIndex.remove_role(role(TEAM_B, guild))
+        third = await RosterIndex.member_teams(guild, 2)
+        RosterIndex.forget(GUILD_ID)
+        fourth = await RosterIndex.team_sizes(guild)
+        return first, second, third, fourth
+
+    first, second, third, fourth = run(scenario())
+    assert first == {TEAM_A: 1}
+    assert second == {TEAM_A: 1, TEAM_B: 1}
+    assert third == frozenset()
+    assert fourth == {TEAM_A: 1}
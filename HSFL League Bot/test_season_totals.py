@@ -0,0 +1,117 @@
+"""
+Tests for utils.season_totals
+Run from the bot folder: python -m pytest -q test_season_totals.py
+"""
+import asyncio
+import copy
+import random
+
+from utils import season_totals
+from utils.database import Database
+from utils.season_totals import apply_week_fields, recalculate_season_totals, verify_season_totals
+
+
+def recomputed(stats):
+    expected = copy.deepcopy(stats)
+    recalculate_season_totals(expected)
+    return expected["season_totals"]
+
+
+def test_reimporting_a_week_replaces_its_contribution():
+    stats = {}
+    apply_week_fields(stats, "week_1", "PASSING", {"Yds": "100", "TD": "2"})
+    apply_week_fields(stats, "week_2", "PASSING", {"Yds": "1,050", "TD": "1"})
+    assert stats["season_totals"] == {"PASSING": {"Yds": 1150, "TD": 3}}
+
+    apply_week_fields(stats, "week_1", "PASSING", {"Yds": "90"})
+    assert stats["season_totals"] == {"PASSING": {"Yds": 1140, "TD": 3}}
+    assert stats["meta"]["season_sums"]["PASSING"]["Yds"] == ["1140", "2"]
+
+
+def test_strings_and_numbers():
+    stats = {}
+    apply_week_fields(stats, "week_1", "RUSHING", {"Long": "45T", "Pct": "50%"})
+    apply_week_fields(stats, "week_2", "RUSHING", {"Long": "60T", "Pct": "12.5%"})
+    assert stats["season_totals"] == {"RUSHING": {"Long": "60T", "Pct": 62.5}}
+
+    # A number beats the strings, and the strings come back once it's gone
+    apply_week_fields(stats, "week_1", "RUSHING", {"Long": "30"})
+    assert stats["season_totals"]["RUSHING"]["Long"] == 30
+    apply_week_fields(stats, "week_1", "RUSHING", {"Long": "30T"})
+    assert stats["season_totals"]["RUSHING"]["Long"] == "60T"
+    assert stats["meta"]["season_sums"]["RUSHING"]["Long"] == ["0", "0"]
+
+
+def test_decimals_do_not_drift():
+    stats = {}
+    for week in range(1, 11):
+        apply_week_fields(stats, f"week_{week}", "KICKING", {"Avg": "0.1"})
+    assert stats["season_totals"]["KICKING"]["Avg"] == 1
+    assert isinstance(stats["season_totals"]["KICKING"]["Avg"], int)
+
+
+def test_existing_players_are_seeded_once():
+    stats = {"weeks": {"week_1": {"PASSING": {"Yds": "100"}}}, "season_totals": {"PASSING": {"Yds": 100}}}
+    apply_week_fields(stats, "week_2", "PASSING", {"Yds": "20"})
+    assert stats["season_totals"] == {"PASSING": {"Yds": 120}}
+    assert stats["meta"]["season_sums"] == {"PASSING": {"Yds": ["120", "2"]}}
+
+
+def test_infinite_values_fall_back_to_a_full_recompute():
+    stats = {}
+    apply_week_fields(stats, "week_1", "PASSING", {"Yds": "100"})
+    apply_week_fields(stats, "week_2", "PASSING", {"Yds": "inf"})
+    assert stats["season_totals"] == recomputed(stats)
+    assert stats["meta"]["season_sums"] is None
+
+    apply_week_fields(stats, "week_3", "PASSING", {"Yds": "5"})
+    assert stats["season_totals"] == recomputed(stats)
+
+
+def test_random_imports_match_a_full_recompute():
+    rng = random.Random(7)
+    values = ["", "0", "3", "12", "1,200", "7.25", "33.3%", "-4", "DNP", "45T"]
+    stats = {}
+    for _ in range(500):
+        fields = {f"Stat{rng.randint(1, 6)}": rng.choice(values) for _ in range(rng.randint(1, 4))}
+        apply_week_fields(stats, f"week_{rng.randint(1, 8)}", rng.choice(["PASSING", "RUSHING"]), fields)
+        assert stats["season_totals"] == recomputed(stats)
+
+
+def test_verify_repairs_drift(monkeypatch):
+    stats = {}
+    apply_week_fields(stats, "week_1", "PASSING", {"Yds": "100"})
+    stats["season_totals"]["PASSING"]["Yds"] = 99
+    stats["meta"]["season_sums"]["PASSING"]["Yds"] = ["99", "1"]
+
+    monkeypatch.setattr(season_totals, "VERIFY_TOTALS", True)
+    apply_week_fields(stats, "week_2", "PASSING", {"Yds": "1"})
+    assert stats["season_totals"] == {"PASSING": {"Yds": 101}}
+    assert verify_season_totals(stats)
+
+
+def test_sums_survive_a_save(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Database.invalidate_cache()
+
+    async def save_and_reload(stats):
+        await Database.add_data("Users", {1: {"10": {"stats": stats}}})
+        Database.invalidate_cache()
+        return await Database.get_data("Users", "1/10/stats")
+
+    stats = {}
+    apply_week_fields(stats, "week_1", "PASSING", {"Yds": "100", "TD": "2"})
+    stats = asyncio.run(save_and_reload(stats))
+    assert stats["meta"]["season_sums"]["PASSING"]["Yds"] == ["100", "1"]
+
+    # Re-imports week 1 and adds week 2 on top of what was read back
+    apply_week_fields(stats, "week_1", "PASSING", {"Yds": "90"})
+    apply_week_fields(stats, "week_2", "PASSING", {"Yds": "10", "TD": "1"})
+    stats = asyncio.run(save_and_reload(stats))
+    assert stats["season_totals"] == {"PASSING": {"Yds": "100", "TD": "3"}}
+    assert stats["meta"]["season_sums"]["PASSING"]["Yds"] == ["100", "2"]
+
+    monkeypatch.setattr(season_totals, "VERIFY_TOTALS", True)
+    apply_week_fields(stats, "week_3", "PASSING", {"Yds": "5"})
+    assert verify_season_totals(stats)
+    Database.invalidate_cache()
@@ -0,0 +1,103 @@
+"""
+Tests for utils.settings
+Run from the bot folder: python -m pytest -q test_settings.py
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from disnake.utils import SnowflakeList
+
+from utils.database import Database
+from utils.settings import GuildSettings, parse_ids
+from utils.tools import has_role
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Database.invalidate_cache()
+    yield tmp_path
+    Database.use_backend("json")
+    Database.invalidate_cache()
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request, workdir):
+    Database.use_backend(request.param, workdir / "league.db")
+    return request.param
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_parse_ids_skips_bad_entries():
+    assert parse_ids(["1", 2, "x", None]) == (1, 2)
+    assert parse_ids({"a": "5"}) == (5,)
+    assert parse_ids("On") == ()
+
+
+def test_snapshot_parses_every_kind(backend):
+    async def scenario():
+        await Database.add_data("FranchiseRole", {1: ["100", "200"]})
+        await Database.add_data("RosterCap", {1: 20})
+        await Database.add_data("Signing", {1: "Off"})
+        return await GuildSettings.get(1)
+
+    settings = run(scenario())
+    assert settings.ids("FranchiseRole") == (100, 200)
+    assert settings.ids("TeamRole") == ()
+    assert settings.limit("RosterCap") == 20
+    assert settings.limit("DemandLimit") is None
+    assert not settings.toggle("Signing")
+    assert settings.toggle("Demand")
+
+
+def test_snapshot_is_cached_until_a_setting_changes(backend):
+    async def scenario():
+        await Database.add_data("TeamRole", {1: ["100"]})
+        first = await GuildSettings.get(1)
+        cached = await GuildSettings.get(1)
+        await Database.add_data("Users", {1: {10: {"a": 1}}})
+        unrelated = await GuildSettings.get(1)
+        await Database.add_data("TeamRole", {1: ["100", "200"]})
+        changed = await GuildSettings.get(1)
+        async with Database.batch() as batch:
+            await batch.delete_data("TeamRole", 1)
+        after_batch = await GuildSettings.get(1)
+        return first, cached, unrelated, changed, after_batch
+
+    first, cached, unrelated, changed, after_batch = run(scenario())
+    assert first is cached is unrelated
+    assert changed.ids("TeamRole") == (100, 200)
+    assert after_batch.ids("TeamRole") == ()
+
+
+def test_other_guilds_stay_cached(workdir):
+    async def scenario():
+        await Database.add_data("TeamRole", {1: ["100"], 2: ["300"]})
+        other = await GuildSettings.get(2)
+        await Database.add_data("TeamRole", {1: ["101"]})
+        return other, await GuildSettings.get(2)
+
+    before, after = run(scenario())
+    assert before is after
+
+
+def _member(guild_id, *role_ids):
+    return SimpleNamespace(_roles=SnowflakeList(role_ids), guild=SimpleNamespace(id=guild_id))
+
+
+def test_has_role_uses_table_order(workdir):
+    async def scenario():
+        await Database.add_data("FranchiseRole", {1: ["300", "100", "200"]})
+        member = _member(1, 100, 200, 999)
+        return (
+            await has_role("FranchiseRole", 1, member),
+            await has_role("FranchiseRole", 1, member, "id"),
+            await has_role("FranchiseRole", 1, _member(1, 999)),
+            await has_role("TeamRole", 1, member),
+        )
+
+    assert run(scenario()) == (True, 100, False, False)
@@ -0,0 +1,180 @@
+"""
+Tests for utils.sheet_cache, against a local http.server standing in for Google's CSV export
+Run from the bot folder: python -m pytest -q test_sheet_cache.py
+"""
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils import sheet_cache
+from utils.database import Database
+from utils.sheet_cache import SheetCache
+
+
+class FakeSheets:
+    """
+    Serves sheets[sheet_id] as CSV with an ETag, answers 304 when it matches
+    """
+
+    def __init__(self):
+        self.sheets = {}
+        self.requests = []
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                sheet_id, gid = self.path.strip("/").split("/")
+                fake.requests.append((sheet_id, self.headers.get("If-None-Match")))
+                if sheet_id not in fake.sheets:
+                    self.send_response(403)
+                    self.end_headers()
+                    return
+
+                body = fake.sheets[sheet_id].encode("utf-8")
+                etag = f'"{hash(body) & 0xffffffff:x}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/csv; charset=utf-8")
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", "Sat, 17 Oct 2026 12:00:00 GMT")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+
+@pytest.fixture
+def sheets(tmp_path, monkeypatch):
+    fake = FakeSheets()
+    monkeypatch.setattr(sheet_cache, "SHEET_CACHE_DIR", tmp_path / "sheet_cache")
+    monkeypatch.setattr(sheet_cache, "SHEET_EXPORT_URL", f"http://127.0.0.1:{fake.server.server_port}/{{sheet_id}}/{{gid}}")
+    monkeypatch.setattr(SheetCache, "_imports", None)
+    monkeypatch.setattr(SheetCache, "_pending_forgets", set())
+    monkeypatch.setattr(SheetCache, "_save_lock", None)
+    yield fake
+    fake.server.shutdown()
+    fake.server.server_close()
+
+
+def run(coro):
+    async def scenario():
+        try:
+            return await coro
+        finally:
+            await SheetCache.close()
+
+    return asyncio.run(scenario())
+
+
+def test_unchanged_sheet_is_a_304(sheets):
+    sheets.sheets["abc"] = "Name,Yds\nbread,10\n"
+
+    first = run(SheetCache.fetch("abc", 5))
+    second = run(SheetCache.fetch("abc", 5))
+
+    assert first.text == second.text == "Name,Yds\nbread,10\n"
+    assert first.content_hash == second.content_hash
+    assert not first.not_modified
+    assert second.not_modified
+    # The second request sent the ETag back
+    assert sheets.requests[0][1] is None
+    assert sheets.requests[1][1] is not None
+
+
+def test_changed_sheet_is_downloaded_again(sheets):
+    sheets.sheets["abc"] = "Name,Yds\nbread,10\n"
+    first = run(SheetCache.fetch("abc"))
+    sheets.sheets["abc"] = "Name,Yds\nbread,20\n"
+    second = run(SheetCache.fetch("abc"))
+
+    assert not second.not_modified
+    assert second.text.endswith("20\n")
+    assert second.content_hash != first.content_hash
+
+
+def test_import_markers(sheets):
+    sheets.sheets["abc"] = "Name,Yds\nbread,10\n"
+    fetch = run(SheetCache.fetch("abc"))
+
+    async def scenario():
+        assert not await SheetCache.already_imported(fetch, 1, 3)
+        await SheetCache.mark_imported(fetch, 1, 3)
+        assert await SheetCache.already_imported(fetch, 1, 3)
+        # Other weeks and guilds aren't affected
+        assert not await SheetCache.already_imported(fetch, 1, 4)
+        assert not await SheetCache.already_imported(fetch, 2, 3)
+
+        await SheetCache.mark_imported(fetch, 1, 4)
+        SheetCache.forget_imports(1, 3)
+        assert not await SheetCache.already_imported(fetch, 1, 3)
+        assert await SheetCache.already_imported(fetch, 1, 4)
+        SheetCache.forget_imports(1)
+        assert not await SheetCache.already_imported(fetch, 1, 4)
+        await SheetCache.mark_imported(fetch, 1, 3)
+
+    run(scenario())
+    # The markers were saved, a fresh process reads them back
+    SheetCache._imports = None
+    assert run(SheetCache.already_imported(run(SheetCache.fetch("abc")), 1, 3))
+
+    # A changed sheet isn't the one that was imported
+    sheets.sheets["abc"] = "Name,Yds\nbread,99\n"
+    assert not run(SheetCache.already_imported(run(SheetCache.fetch("abc")), 1, 3))
+
+
+def test_stats_changes_drop_markers(sheets, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Database.invalidate_cache()
+    sheets.sheets["abc"] = "Name,Yds\nbread,10\n"
+    fetch = run(SheetCache.fetch("abc"))
+
+    async def scenario():
+        for guild_id in (1, 2):
+            await Database.add_data("Users", {guild_id: {"bread": {"stats": {"PASSING": {"Yds": "10"}}}}})
+            await SheetCache.mark_imported(fetch, guild_id, 3)
+
+        # Contracts, demands and other player fields leave the import standing
+        await Database.add_data("Users", {1: {"bread": {"demands": 2, "contract": "2 seasons"}}})
+        await Database.delete_data("Users", "1/bread/demands")
+        assert await SheetCache.already_imported(fetch, 1, 3)
+
+        # Removing a player's stats, or the player, drops only that guild's markers
+        await Database.delete_data("Users", "1/bread/stats")
+        assert not await SheetCache.already_imported(fetch, 1, 3)
+        await SheetCache.mark_imported(fetch, 1, 3)
+        await Database.delete_data("Users", "1/bread")
+        assert not await SheetCache.already_imported(fetch, 1, 3)
+        assert await SheetCache.already_imported(fetch, 2, 3)
+
+        await SheetCache.mark_imported(fetch, 1, 3)
+        await Database.clear_all()
+        assert not await SheetCache.already_imported(fetch, 1, 3)
+        assert not await SheetCache.already_imported(fetch, 2, 3)
+
+    run(scenario())
+    Database.invalidate_cache()
+
+
+def test_denied_sheets_raise(sheets):
+    with pytest.raises(ValueError, match="denied"):
+        run(SheetCache.fetch("private"))
+
+
+def test_html_pages_are_rejected(sheets):
+    sheets.sheets["login"] = "<!DOCTYPE html><html>Sign in</html>"
+    with pytest.raises(ValueError, match="HTML"):
+        run(SheetCache.fetch("login"))
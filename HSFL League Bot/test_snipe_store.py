@@ -0,0 +1,69 @@
+"""
+Tests for utils.snipe_store
+Run from the bot folder: python -m pytest -q test_snipe_store.py
+"""
+import pytest
+
+from utils import snipe_store
+from utils.snipe_store import RECORD_OVERHEAD, DeletedMessage, SnipeStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(snipe_store.time, "monotonic", lambda: now[0])
+    return now
+
+
+def deleted(content):
+    return DeletedMessage(author="bread", avatar_url="", content=content)
+
+
+def test_history_is_newest_first(clock):
+    store = SnipeStore(history=3)
+    for number in range(5):
+        store.add(1, deleted(f"message {number}"))
+
+    assert [store.get(1, index).content for index in (1, 2, 3)] == ["message 4", "message 3", "message 2"]
+    assert store.get(1, 4) is None
+    assert store.get(2) is None
+    assert store.get_stats()["entries"] == 3
+
+
+def test_least_recently_written_channel_goes_first(clock):
+    store = SnipeStore(max_entries=3)
+    store.add(1, deleted("a"))
+    store.add(2, deleted("b"))
+    store.add(1, deleted("c"))
+    store.add(3, deleted("d"))
+
+    assert store.get(2) is None
+    assert [store.get(1, 1).content, store.get(1, 2).content] == ["c", "a"]
+    assert store.get_stats()["evicted"] == 1
+
+
+def test_byte_limit(clock):
+    store = SnipeStore(max_bytes=2 * (RECORD_OVERHEAD + len("bread") + 100))
+    for channel_id in range(3):
+        store.add(channel_id, deleted("x" * 100))
+
+    stats = store.get_stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] <= stats["max_bytes"]
+    assert store.get(0) is None
+
+
+def test_messages_expire(clock):
+    store = SnipeStore(ttl=60)
+    store.add(1, deleted("old"))
+    clock[0] += 30
+    store.add(1, deleted("newer"))
+    store.add(2, deleted("other"))
+    clock[0] += 40
+
+    assert store.count(1) == 1
+    assert store.get(1).content == "newer"
+    clock[0] += 60
+    stats = store.get_stats()
+    assert (stats["channels"], stats["entries"], stats["bytes"]) == (0, 0, 0)
+    assert stats["expired"] == 3
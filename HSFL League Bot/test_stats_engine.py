@@ -0,0 +1,99 @@
+"""
+Tests for utils.stats_engine
+Run from the bot folder: python -m pytest -q test_stats_engine.py
+The numpy cases are skipped when numpy isn't installed
+"""
+import asyncio
+
+import pytest
+
+from utils import stats_engine
+from utils.database import Database
+from utils.stats_engine import GuildStats, StatsEngine
+
+USERS = {
+    "1": {"stats": {"weeks": {
+        "week_1": {"PASSING": {"Yds": "100", "TD": "2"}},
+        "week_2": {"PASSING": {"Yds": "1,050", "TD": "DNP"}},
+    }, "season_totals": {}, "meta": {}}},
+    "2": {"stats": {"weeks": {
+        "week_1": {"PASSING": {"Yds": "300"}, "RUSHING": {"Yds": "12.5"}},
+    }}},
+    # Imported without a week
+    "bread": {"stats": {"PASSING": {"Yds": "700", "TD": "5"}}},
+    "3": {"contract": "2 seasons"},
+}
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(stats_engine, "np", None)
+    return request.param
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Database.invalidate_cache()
+    yield tmp_path
+    Database.invalidate_cache()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_players_and_labels(backend):
+    stats = GuildStats(USERS)
+    assert stats.players == ["1", "2", "bread"]
+    assert stats.weeks == (1, 2)
+    assert list(stats.labels) == ["PASSING / TD", "PASSING / Yds", "RUSHING / Yds"]
+    assert stats.search("yds") == ["PASSING / Yds", "RUSHING / Yds"]
+    assert stats.search("rush") == ["RUSHING / Yds"]
+
+
+def test_season_and_week_leaderboards(backend):
+    stats = GuildStats(USERS)
+    assert stats.leaderboard("PASSING", "Yds") == [("1", 1150.0), ("bread", 700.0), ("2", 300.0)]
+    assert stats.leaderboard("PASSING", "Yds", limit=1, ascending=True) == [("2", 300.0)]
+    assert stats.leaderboard("PASSING", "Yds", week=1) == [("2", 300.0), ("1", 100.0)]
+    assert stats.leaderboard("PASSING", "Yds", week=9) == []
+    # Non-numeric values are skipped
+    assert stats.leaderboard("PASSING", "TD") == [("bread", 5.0), ("1", 2.0)]
+    assert stats.leaderboard("PASSING", "Yds", players=["2", "bread", "nobody"]) == [("bread", 700.0), ("2", 300.0)]
+    assert stats.leaderboard("KICKING", "FG") == []
+
+
+def test_ties_keep_import_order(backend):
+    users = {str(player): {"stats": {"weeks": {"week_1": {"PASSING": {"TD": "1"}}}}} for player in (5, 4, 6)}
+    assert [player for player, _ in GuildStats(users).leaderboard("PASSING", "TD")] == ["5", "4", "6"]
+
+
+def test_week_and_team_totals(backend):
+    stats = GuildStats(USERS)
+    assert stats.week_totals("PASSING", "Yds") == {1: 400.0, 2: 1050.0}
+    assert stats.week_totals("RUSHING", "Yds") == {1: 12.5}
+
+    teams = {1: frozenset({10}), 2: frozenset({10, 20}), 3: frozenset({30})}
+    assert stats.team_totals("PASSING", "Yds", teams) == [(10, 1450.0), (20, 300.0)]
+    assert stats.team_totals("PASSING", "Yds", teams, week=2) == [(10, 1050.0)]
+    assert stats.team_totals("PASSING", "Yds", {}) == []
+
+
+def test_engine_is_rebuilt_when_users_change(workdir, backend):
+    async def scenario():
+        await Database.add_data("Users", {1: {"7": {"stats": {"weeks": {"week_1": {"PASSING": {"Yds": "10"}}}}}}})
+        first = await StatsEngine.get(1)
+        assert await StatsEngine.get(1) is first
+
+        await Database.add_data("Users", {1: {"8": {"stats": {"weeks": {"week_1": {"PASSING": {"Yds": "20"}}}}}}})
+        second = await StatsEngine.get(1)
+        return first, second
+
+    StatsEngine.invalidate()
+    first, second = run(scenario())
+    assert first is not second
+    assert second.leaderboard("PASSING", "Yds") == [("8", 20.0), ("7", 10.0)]
@@ -0,0 +1,67 @@
+"""
+Tests for utils.statsheet
+Run from the bot folder: python -m pytest -q test_statsheet.py
+"""
+from bench_statsheet import build, legacy_players, schema_players
+from utils.statsheet import PlayerRow, iter_player_rows
+
+
+def players(csv_text):
+    return list(iter_player_rows(csv_text))
+
+
+def test_categories_and_sections():
+    sheet = (
+        "PASSING,,,\n"
+        "Name,Yds,Name,Yds\n"
+        "alice,120,bob,80\n"
+        ",,carol,5\n"
+        "RUSHING,,,\n"
+        "Name,Yds,,\n"
+        "dave,40,,\n"
+    )
+    assert players(sheet) == [
+        PlayerRow(2, "PASSING", "alice", None, None, {"Yds": "120"}),
+        PlayerRow(2, "PASSING", "bob", None, None, {"Yds": "80"}),
+        PlayerRow(3, "PASSING", "carol", None, None, {"Yds": "5"}),
+        PlayerRow(4, "RUSHING", "dave", None, None, {"Yds": "40"}),
+    ]
+
+
+def test_rows_before_a_header_are_skipped():
+    assert players("some title,\nnotes,here\nuser_id,Yds\n123,4\n") == [
+        PlayerRow(2, "General", "123", None, None, {"Yds": "4"}),
+    ]
+
+
+def test_labels_and_team_rows_are_ignored():
+    sheet = "Player,Yds\nPlayer,Yds\nTeam Bread,300\nTotal,400\n  eve  ,10\n"
+    assert [player.identifier for player in players(sheet)] == ["eve"]
+
+
+def test_first_identifier_column_decides():
+    # user_id comes before name, an empty user_id skips the player even with a name
+    sheet = "Name,user_id,Yds\nalice,,10\nbob,42,20\n"
+    assert [player.identifier for player in players(sheet)] == ["42"]
+
+
+def test_contract_and_demands():
+    # Like the old parser only the exact lowercase contract/demands headers are read
+    sheet = "Name,contract,demands,Yds\nalice,,,10\nbob,2 seasons,3,\ncarol,,,\n"
+    # With the columns there contract/demands are "" rather than None, so carol is kept
+    assert players(sheet) == [
+        PlayerRow(2, "General", "alice", "", "", {"Yds": "10"}),
+        PlayerRow(3, "General", "bob", "2 seasons", "3", {}),
+        PlayerRow(4, "General", "carol", "", "", {}),
+    ]
+    # Without them a player with no stats has nothing to import
+    assert players("Name,Yds\ncarol,\n") == []
+
+
+def test_values_are_not_stripped():
+    assert players("Name,Yds\nalice, 10 \n")[0].stats == {"Yds": " 10 "}
+
+
+def test_matches_the_old_parser():
+    csv_text = build(200)
+    assert schema_players(csv_text) == legacy_players(csv_text)
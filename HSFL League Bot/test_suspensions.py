@@ -0,0 +1,48 @@
+"""
+Tests for the suspension expiry queue in cogs.suspended
+Run from the bot folder: python -m pytest -q test_suspensions.py
+"""
+from datetime import datetime, timedelta
+
+from cogs.suspended import SuspensionQueue, parse_expiry
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def test_parse_expiry():
+    assert parse_expiry("2024-01-02 08:30:00") == datetime(2024, 1, 2, 8, 30)
+    # Suspensions stored before times were kept
+    assert parse_expiry("2024-01-02") == datetime(2024, 1, 2)
+    assert parse_expiry("Permanently") is None
+    assert parse_expiry("next tuesday") is None
+    assert parse_expiry(None) is None
+
+
+def test_expired_suspensions_come_out_in_order():
+    queue = SuspensionQueue()
+    queue.add(1, 30, NOW + timedelta(hours=3))
+    queue.add(1, 10, NOW + timedelta(hours=1))
+    queue.add("2", "20", NOW + timedelta(hours=2))
+
+    assert queue.pop_expired(NOW) == []
+    assert queue.next_expiry() == NOW + timedelta(hours=1)
+    assert queue.pop_expired(NOW + timedelta(hours=2)) == [
+        (1, 10, NOW + timedelta(hours=1)),
+        (2, 20, NOW + timedelta(hours=2)),
+    ]
+    assert len(queue) == 1
+
+
+def test_unsuspended_and_changed_suspensions_are_skipped():
+    queue = SuspensionQueue()
+    queue.add(1, 10, NOW + timedelta(hours=1))
+    queue.add(1, 20, NOW + timedelta(hours=1))
+    queue.remove(1, 10)
+    # Suspended again for longer
+    queue.add(1, 20, NOW + timedelta(days=1))
+
+    assert queue.next_expiry() == NOW + timedelta(days=1)
+    assert queue.pop_expired(NOW + timedelta(hours=2)) == []
+    assert queue.pop_expired(NOW + timedelta(days=1)) == [(1, 20, NOW + timedelta(days=1))]
+    assert queue.next_expiry() is None
+    assert len(queue) == 0
@@ -0,0 +1,212 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Dict, List
+
+import disnake
+
+logger = logging.getLogger(__name__)
+
+# Priority levels, lower runs first
+URGENT = 0  # a command is running in the guild right now
+ACTIVE = 1  # someone used a command in the guild recently
+LEAGUE = 2  # the guild has teams set up
+
+# Seconds between chunk requests on one shard, on top of running them one at a time
+CHUNK_INTERVAL = 0.5
+# How long roster_cap waits for a chunk before counting the cached members
+CHUNK_WAIT_TIMEOUT = 5
+
+
+class ChunkScheduler:
+    """
+    Chunks guilds in the background instead of inside commands
+
+    Every shard has a worker that chunks its guilds one at a time, most urgent
+    first, leaving CHUNK_INTERVAL between requests so a burst of chunks
+    doesn't hit the gateway rate limit. A guild is only queued once, everyone
+    asking for it shares one future
+
+    ChunkScheduler.request(guild, URGENT)   # returns right away
+    await ChunkScheduler.wait(guild, 5)     # waits at most 5 seconds
+    """
+
+    _queues: Dict[int, list] = {}
+    _wakeups: Dict[int, asyncio.Event] = {}
+    _workers: Dict[int, asyncio.Task] = {}
+    # guild id -> (level, -last activity, seq) of its live queue entry
+    _queued: Dict[int, tuple] = {}
+    _guilds: Dict[int, disnake.Guild] = {}
+    _futures: Dict[int, asyncio.Future] = {}
+    _in_flight: Dict[int, float] = {}
+    _activity: Dict[int, float] = {}
+    _recent = deque(maxlen=10)
+    _seq = itertools.count()
+    _stats = {"chunked": 0, "failed": 0, "deduplicated": 0}
+
+    @staticmethod
+    def request(guild: disnake.Guild, level: int = LEAGUE) -> asyncio.Future:
+        """
+        Queue a guild to be chunked, or move it up if it's already queued
+        The future resolves to True once the guild is chunked
+        """
+        loop = asyncio.get_running_loop()
+        future = ChunkScheduler._futures.get(guild.id)
+        if guild.chunked and future is None:
+            future = loop.create_future()
+            future.set_result(True)
+            return future
+
+        if future is None:
+            future = ChunkScheduler._futures[guild.id] = loop.create_future()
+        else:
+            ChunkScheduler._stats["deduplicated"] += 1
+
+        if guild.id in ChunkScheduler._in_flight:
+            return future
+
+        key = (level, -ChunkScheduler._activity.get(guild.id, 0.0), next(ChunkScheduler._seq))
+        current = ChunkScheduler._queued.get(guild.id)
+        if current is None or key[:2] < current[:2]:
+            # The old entry stays in the heap and is skipped when it comes up
+            ChunkScheduler._queued[guild.id] = key
+            ChunkScheduler._guilds[guild.id] = guild
+            heapq.heappush(ChunkScheduler._queues.setdefault(guild.shard_id, []), (*key, guild.id))
+            ChunkScheduler._start_worker(guild.shard_id)
+        return future
+
+    @staticmethod
+    async def wait(guild: disnake.Guild, timeout: float = CHUNK_WAIT_TIMEOUT) -> bool:
+        """
+        Chunk a guild urgently and wait up to timeout seconds, returns guild.chunked
+        """
+        if guild.chunked:
+            return True
+        future = ChunkScheduler.request(guild, URGENT)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return guild.chunked
+
+    @staticmethod
+    def touch(guild: disnake.Guild):
+        """
+        Record league activity in a guild, chunking it soon if it isn't yet
+        """
+        ChunkScheduler._activity[guild.id] = time.time()
+        if not guild.chunked:
+            ChunkScheduler.request(guild, ACTIVE)
+
+    @staticmethod
+    def schedule(guilds: List[disnake.Guild], level: int = LEAGUE):
+        """
+        Queue every guild that isn't chunked yet
+        """
+        for guild in guilds:
+            if not guild.chunked:
+                ChunkScheduler.request(guild, level)
+
+    @staticmethod
+    def forget(guild_id: int):
+        """
+        Drop a guild from the queue (the bot left it)
+        """
+        ChunkScheduler._queued.pop(guild_id, None)
+        ChunkScheduler._guilds.pop(guild_id, None)
+        ChunkScheduler._activity.pop(guild_id, None)
+        future = ChunkScheduler._futures.pop(guild_id, None)
+        if future is not None and not future.done():
+            future.set_result(False)
+
+    @staticmethod
+    def stop():
+        """
+        Cancel the workers and clear the queues
+        """
+        for task in ChunkScheduler._workers.values():
+            task.cancel()
+        for guild_id in list(ChunkScheduler._futures):
+            ChunkScheduler.forget(guild_id)
+        ChunkScheduler._workers.clear()
+        ChunkScheduler._wakeups.clear()
+        ChunkScheduler._queues.clear()
+        ChunkScheduler._in_flight.clear()
+
+    @staticmethod
+    def get_status() -> dict:
+        """
+        Queue length per shard, guilds being chunked and the last few chunks
+        """
+        now = time.perf_counter()
+        return {
+            **ChunkScheduler._stats,
+            "queued": len(ChunkScheduler._queued),
+            "shards": {
+                shard_id: sum(1 for entry in queue if ChunkScheduler._queued.get(entry[-1]) == entry[:-1])
+                for shard_id, queue in sorted(ChunkScheduler._queues.items(), key=lambda item: item[0] or 0)
+            },
+            "in_flight": {guild_id: round(now - start, 1) for guild_id, start in ChunkScheduler._in_flight.items()},
+            "recent": list(ChunkScheduler._recent),
+        }
+
+    @staticmethod
+    def _start_worker(shard_id):
+        wakeup = ChunkScheduler._wakeups.get(shard_id)
+        if wakeup is None:
+            wakeup = ChunkScheduler._wakeups[shard_id] = asyncio.Event()
+        wakeup.set()
+
+        task = ChunkScheduler._workers.get(shard_id)
+        if task is None or task.done():
+            ChunkScheduler._workers[shard_id] = asyncio.create_task(ChunkScheduler._worker(shard_id))
+
+    @staticmethod
+    def _next(shard_id):
+        """
+        Pop the next live entry of a shard's queue
+        """
+        queue = ChunkScheduler._queues.get(shard_id, [])
+        while queue:
+            *key, guild_id = heapq.heappop(queue)
+            if ChunkScheduler._queued.get(guild_id) == tuple(key):
+                del ChunkScheduler._queued[guild_id]
+                return ChunkScheduler._guilds.pop(guild_id)
+        return None
+
+    @staticmethod
+    async def _worker(shard_id):
+        wakeup = ChunkScheduler._wakeups[shard_id]
+        while True:
+            guild = ChunkScheduler._next(shard_id)
+            if guild is None:
+                wakeup.clear()
+                await wakeup.wait()
+                continue
+
+            if not guild.chunked:
+                await ChunkScheduler._chunk(guild)
+                await asyncio.sleep(CHUNK_INTERVAL)
+
+            future = ChunkScheduler._futures.pop(guild.id, None)
+            if future is not None and not future.done():
+                future.set_result(guild.chunked)
+
+    @staticmethod
+    async def _chunk(guild: disnake.Guild):
+        start = ChunkScheduler._in_flight[guild.id] = time.perf_counter()
+        try:
+            await guild.chunk()
+            ChunkScheduler._stats["chunked"] += 1
+        except Exception as e:
+            ChunkScheduler._stats["failed"] += 1
+            logger.error(f"Failed to chunk guild {guild.id}: {e}")
+        finally:
+            del ChunkScheduler._in_flight[guild.id]
+
+        elapsed = round((time.perf_counter() - start) * 1000)
+        ChunkScheduler._recent.append({"guild": guild.id, "members": len(guild.members), "ms": elapsed})
+        logger.info(f"Chunked guild {guild.id} ({len(guild.members)} members) in {elapsed} ms")
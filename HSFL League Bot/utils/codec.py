@@ -0,0 +1,37 @@
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# DATABASE_CODEC=json forces the standard library even when orjson is installed
+USE_ORJSON = orjson is not None and os.getenv("DATABASE_CODEC", "").strip().lower() != "json"
+CODEC_NAME = "orjson" if USE_ORJSON else "json"
+
+
+def dumps(data, pretty: bool = False) -> bytes:
+    """
+    Serialize data to UTF-8 JSON bytes
+    Compact by default, pretty=True indents with 2 spaces for files people read
+    """
+    if USE_ORJSON:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+
+    if pretty:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(raw):
+    """
+    Parse JSON from bytes or str
+    Raises ValueError (json.JSONDecodeError is a subclass) on bad input
+    """
+    if USE_ORJSON:
+        return orjson.loads(raw)
+    return json.loads(raw)
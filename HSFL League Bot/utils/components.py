@@ -0,0 +1,128 @@
+import bisect
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets, the last bucket is everything slower
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LatencyHistogram:
+    """
+    Running latency histogram for one handler
+    """
+
+    __slots__ = ("counts", "calls", "errors", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, elapsed_ms: float, error: bool = False):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, elapsed_ms)] += 1
+        self.calls += 1
+        self.errors += error
+        self.total += elapsed_ms
+        self.max = max(self.max, elapsed_ms)
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Upper bound of the bucket holding the given fraction of calls (inf past the last bucket)
+        """
+        target = fraction * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), self.counts):
+            seen += count
+            if count and seen >= target:
+                return bound
+        return 0.0
+
+    def to_dict(self) -> dict:
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}ms"]
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_ms": self.total / self.calls if self.calls else 0.0,
+            "max_ms": self.max,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "buckets": {label: count for label, count in zip(labels, self.counts) if count},
+        }
+
+
+class ComponentRouter:
+    """
+    Routes button clicks to a single handler by custom_id prefix
+
+    Persistent buttons use custom_ids like "<prefix>-<arg>" (e.g. "gametime-<author_id>"),
+    the prefix is everything before the last "-". Cogs register their prefixes
+    when they load and unregister them in cog_unload:
+
+    bot.component_router.register("gametime", self.game_time_button)
+
+    async def game_time_button(self, inter, author_id: str): ...
+
+    Clicks with no registered prefix (views with their own callbacks) are ignored
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, Callable[..., Awaitable]] = {}
+        self._stats: Dict[str, LatencyHistogram] = {}
+
+    @staticmethod
+    def parse(custom_id: str) -> Tuple[str, str]:
+        """
+        Split a custom_id into (prefix, arg), arg is "" when there's no "-"
+        """
+        prefix, _, arg = custom_id.rpartition("-")
+        if not prefix:
+            return custom_id, ""
+        return prefix, arg
+
+    def register(self, prefix: str, handler: Callable[..., Awaitable]):
+        """
+        Route clicks on "<prefix>-..." buttons to handler(inter, arg)
+        """
+        if prefix in self._handlers and self._handlers[prefix] != handler:
+            raise ValueError(f"A handler is already registered for {prefix!r} buttons")
+        self._handlers[prefix] = handler
+        self._stats.setdefault(prefix, LatencyHistogram())
+
+    def unregister(self, *prefixes: str):
+        for prefix in prefixes:
+            self._handlers.pop(prefix, None)
+
+    async def dispatch(self, inter) -> bool:
+        """
+        Run the handler for a click, returns False if no handler matched
+        """
+        custom_id = getattr(getattr(inter, "component", None), "custom_id", None)
+        if not custom_id:
+            return False
+
+        prefix, arg = self.parse(custom_id)
+        handler = self._handlers.get(prefix)
+        if handler is None:
+            return False
+
+        start = time.perf_counter()
+        error = False
+        try:
+            await handler(inter, arg)
+        except Exception as e:
+            error = True
+            logger.error(f"Error in {prefix} button handler: {e}", exc_info=True)
+        finally:
+            self._stats[prefix].record((time.perf_counter() - start) * 1000, error)
+        return True
+
+    def get_stats(self) -> dict:
+        """
+        Latency histogram per registered prefix
+        """
+        return {prefix: stats.to_dict() for prefix, stats in sorted(self._stats.items())}
@@ -1,27 +1,105 @@
 import json
 import os
+import copy
 import asyncio
 from pathlib import Path
 from datetime import datetime
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, NamedTuple
 import shutil
 import logging
+import contextlib
+import time
+import weakref
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock
+    fcntl = None
+
+from utils import codec
+from utils.config import SETTINGS
 
 DATABASE_DIR = Path("database")
 BACKUP_DIR = Path("database/backups")
 LOCK_DIR = Path("database/locks")
+# Size, mtime and entry count of every file last seen intact. Lets startup skip
+# unchanged files and answers table summaries without parsing them
+MANIFEST_PATH = Path("database/meta/manifest.json")
+MANIFEST_FLUSH_DELAY = 5.0
+MANIFEST_PREVIEW_KEYS = 5
 MAX_BACKUPS = 10
+LOCK_TIMEOUT = 5.0
+# Minutes between backup snapshots of the same file
+BACKUP_INTERVAL_MINUTES = float(os.getenv("DATABASE_BACKUP_INTERVAL", "30"))
+
+# Guild tables with frequent small writes. Their changes are appended to a
+# journal (database/<Table>/<guild_id>.log) next to the shard instead of
+# rewriting it, and folded back into the shard once the journal gets large
+JOURNAL_TABLES = frozenset({"Users", "TradeBlock", "Suspensions"})
+JOURNAL_COMPACT_BYTES = int(os.getenv("DATABASE_JOURNAL_COMPACT_BYTES", str(256 * 1024)))
+
+# Tables whose top-level keys are guild ids. Each guild is stored in its own
+# file (database/<Table>/<guild_id>.json) so a write only touches that guild
+GUILD_TABLES = frozenset(
+    {setting["table"] for setting in SETTINGS.values() if setting.get("guild")}
+    | {"Users", "Suspensions", "TradeBlock", "CoachTeamMapping", "ChannelConfig", "AutoUpdateRoles"}
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+class Change(NamedTuple):
+    """
+    One write to a top-level key, passed to on_change(..., with_change=True) listeners
+    op "merge": value is what was merged in
+    op "delete": path is the deleted path below the top-level key, "" for all of it
+    """
+    op: str
+    value: Any = None
+    path: Optional[str] = None
+
+
 class Database:
     """
     Local JSON-based database system
     Stores all data in JSON files within the 'database' folder
     Maintains the same API as the remote database for compatibility
+    
+    Parsed tables stay resident in a process-wide cache keyed by file path.
+    Writes go through to disk, so the cache never holds unsaved data.
+    
+    Tables listed in GUILD_TABLES are sharded into one file per guild, each
+    holding {guild_id: value}, so nested paths resolve the same way
     """
     
+    _cache: Dict[Path, dict] = {}
+    # (mtime, size, inode) of each cached file and its journal when it was read or written
+    _cache_stamps: Dict[Path, tuple] = {}
+    _cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+    
+    # One asyncio.Lock per file, per event loop
+    _locks = weakref.WeakKeyDictionary()
+    _lock_stats = {"acquired": 0, "timeouts": 0, "wait_total": 0.0, "wait_max": 0.0, "keys": {}}
+    
+    # Time of the last backup snapshot per file, see _maybe_snapshot
+    _last_snapshot: Dict[str, float] = {}
+    
+    # Loaded from MANIFEST_PATH on first use, see _get_manifest
+    _manifest: Optional[Dict[str, dict]] = None
+    _manifest_flush_pending = False
+    
+    # Journal state: byte offset of a torn last record to cut off, and running compactions
+    _journal_tail: Dict[Path, int] = {}
+    _compactions: Dict[Path, asyncio.Task] = {}
+    
+    # SQLite backend when DATABASE_BACKEND=sqlite, None while using JSON files
+    _backend = None
+    _backend_loaded = False
+    
+    # Callbacks registered with on_change
+    _listeners: list = []
+    
     def __init__(self):
         """
         Initialize database directory if it doesn't exist
@@ -30,6 +108,77 @@ class Database:
         BACKUP_DIR.mkdir(exist_ok=True, parents=True)
         LOCK_DIR.mkdir(exist_ok=True, parents=True)
     
+    @staticmethod
+    def on_change(callback, with_change: bool = False):
+        """
+        Register callback(key, top_key), called after every write that succeeds
+        top_key is the changed top-level key as a string (usually a guild id),
+        None when the whole key changed. key is None when everything may have
+        changed (invalidate_cache()). Callbacks run inline, keep them cheap
+        with_change: call callback(key, top_key, change) with the write as a
+        Change, None when it isn't known (restores, whole keys)
+        Can be used as a decorator
+        """
+        Database._listeners.append((callback, with_change))
+        return callback
+    
+    @staticmethod
+    def _notify_change(key, changes=None):
+        """
+        Call the on_change listeners for each changed top-level key
+        changes: {top_key: Change or None}, None when the whole key changed
+        """
+        for callback, with_change in list(Database._listeners):
+            for top_key, change in (changes.items() if changes is not None else [(None, None)]):
+                try:
+                    if with_change:
+                        callback(None if key is None else str(key), top_key, change)
+                    else:
+                        callback(None if key is None else str(key), top_key)
+                except Exception as e:
+                    logger.error(f"Error in database change listener {callback}: {e}")
+    
+    def _changes(self, value=None, path=None) -> Optional[Dict[str, Change]]:
+        """
+        Get the write per top-level key it touches, from its value or its path
+        None means the whole key
+        """
+        if path is not None:
+            top_key, _, rest = self._normalize_path(path).partition('/')
+            return {top_key: Change("delete", path=rest)}
+        if isinstance(value, dict):
+            return {str(top_key): Change("merge", value=top_value) for top_key, top_value in value.items()}
+        return None
+    
+    @staticmethod
+    def _sql():
+        """
+        Get the SQLite backend if DATABASE_BACKEND=sqlite, otherwise None
+        Read on first use so a .env loaded after import is still honoured
+        """
+        if not Database._backend_loaded:
+            backend = os.getenv("DATABASE_BACKEND", "json").strip().lower()
+            Database.use_backend(backend, os.getenv("DATABASE_SQLITE_PATH"))
+        return Database._backend
+    
+    @staticmethod
+    def use_backend(backend: str, sqlite_path=None):
+        """
+        Switch storage backend ("json" or "sqlite")
+        sqlite_path: Database file for the SQLite backend, defaults to database/league.db
+        """
+        if Database._backend is not None:
+            Database._backend.close()
+            Database._backend = None
+        
+        if backend == "sqlite":
+            from utils.sqlite_backend import SQLiteBackend
+            Database._backend = SQLiteBackend(Path(sqlite_path) if sqlite_path else DATABASE_DIR / "league.db")
+        elif backend != "json":
+            raise ValueError(f"Unknown database backend: {backend}")
+        
+        Database._backend_loaded = True
+    
     def _get_lock_file(self, key: str) -> Path:
         """
         Get the lock file path for a database key
@@ -37,34 +186,96 @@ class Database:
         safe_key = str(key).replace("/", "_").replace("\\", "_")
         return LOCK_DIR / f"{safe_key}.lock"
     
-    async def _acquire_lock(self, key: str, timeout: float = 5.0) -> bool:
+    def _get_async_lock(self, key: str) -> asyncio.Lock:
         """
-        Acquire a lock for database operations
-        Returns True if lock acquired, False if timeout
+        Get the in-process lock for a key, created on first use
         """
-        lock_file = self._get_lock_file(key)
-        start_time = asyncio.get_event_loop().time()
-        
+        locks = Database._locks.setdefault(asyncio.get_running_loop(), {})
+        if key not in locks:
+            locks[key] = asyncio.Lock()
+        return locks[key]
+    
+    def _os_locks_enabled(self) -> bool:
+        """
+        Check if cross-process flock locks are used (on by default where fcntl exists)
+        """
+        return fcntl is not None and os.getenv("DATABASE_OS_LOCKS", "1") != "0"
+    
+    def _flock(self, lock_path: Path, timeout: float):
+        """
+        Take an exclusive flock on a lock file (blocking, run in an executor)
+        Returns the open file, or None on timeout
+        """
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        handle = open(lock_path, 'a')
+        deadline = time.monotonic() + timeout
+        delay = 0.001
         while True:
             try:
-                lock_file.touch(exist_ok=False)
-                return True
-            except FileExistsError:
-                elapsed = asyncio.get_event_loop().time() - start_time
-                if elapsed > timeout:
-                    logger.warning(f"Lock timeout for key: {key}")
-                    return False
-                await asyncio.sleep(0.1)
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return handle
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    handle.close()
+                    return None
+                time.sleep(delay)
+                delay = min(delay * 2, 0.05)
     
-    async def _release_lock(self, key: str):
+    def _record_lock_wait(self, key: str, waited: float):
         """
-        Release a lock after database operations
+        Add a lock wait to the metrics returned by get_lock_stats
         """
-        lock_file = self._get_lock_file(key)
+        stats = Database._lock_stats
+        stats["acquired"] += 1
+        stats["wait_total"] += waited
+        stats["wait_max"] = max(stats["wait_max"], waited)
+        key_stats = stats["keys"].setdefault(key, {"acquired": 0, "wait_total": 0.0, "wait_max": 0.0})
+        key_stats["acquired"] += 1
+        key_stats["wait_total"] += waited
+        key_stats["wait_max"] = max(key_stats["wait_max"], waited)
+    
+    @contextlib.asynccontextmanager
+    async def _locked(self, file_path: Path, timeout: float = LOCK_TIMEOUT):
+        """
+        Hold a file's lock for a whole read-modify-write
+        Coroutines in this process queue on an asyncio.Lock, other processes
+        are kept out with flock on database/locks/<key>.lock. Once both are
+        held, a cached copy is dropped if the file changed since it was read
+        Raises IOError if the lock can't be taken within the timeout
+        """
+        key = self._backup_stem(file_path)
+        lock = self._get_async_lock(key)
+        start = time.perf_counter()
+        
         try:
-            lock_file.unlink(missing_ok=True)
-        except Exception as e:
-            logger.error(f"Error releasing lock for {key}: {e}")
+            await asyncio.wait_for(lock.acquire(), timeout)
+        except asyncio.TimeoutError:
+            Database._lock_stats["timeouts"] += 1
+            logger.warning(f"Lock timeout for key: {key}")
+            raise IOError(f"Failed to acquire lock for {file_path} - concurrent write detected")
+        
+        handle = None
+        try:
+            if self._os_locks_enabled():
+                remaining = max(timeout - (time.perf_counter() - start), 0.0)
+                loop = asyncio.get_event_loop()
+                handle = await loop.run_in_executor(None, self._flock, self._get_lock_file(key), remaining)
+                if handle is None:
+                    Database._lock_stats["timeouts"] += 1
+                    logger.warning(f"Lock timeout for key: {key} (held by another process)")
+                    raise IOError(f"Failed to acquire lock for {file_path} - another process is writing")
+            
+            self._record_lock_wait(key, time.perf_counter() - start)
+            # Another process may have written the file since it was cached
+            if file_path in Database._cache and Database._cache_stamps.get(file_path) != self._stamp(file_path):
+                self._invalidate(file_path)
+                Database._journal_tail.pop(file_path, None)
+            yield
+        finally:
+            if handle is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                handle.close()
+            lock.release()
     
     async def _create_backup(self, file_path: Path) -> bool:
         """
@@ -75,7 +286,7 @@ class Database:
         
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_name = file_path.stem
+            file_name = self._backup_stem(file_path)
             backup_path = BACKUP_DIR / f"{file_name}_{timestamp}.json"
             
             loop = asyncio.get_event_loop()
@@ -88,6 +299,28 @@ class Database:
             logger.error(f"Error creating backup for {file_path}: {e}")
             return False
     
+    async def _maybe_snapshot(self, file_path: Path) -> bool:
+        """
+        Back up a file before it is overwritten, at most once per BACKUP_INTERVAL_MINUTES
+        Saves are atomic, so backups are there for rollbacks rather than torn writes
+        """
+        if not file_path.exists():
+            return False
+        
+        file_name = self._backup_stem(file_path)
+        last = Database._last_snapshot.get(file_name)
+        if last is None:
+            # First write since startup, carry on from the newest snapshot on disk
+            backups = sorted(BACKUP_DIR.glob(f"{file_name}_*.json"), reverse=True)
+            last = backups[0].stat().st_mtime if backups else 0.0
+            Database._last_snapshot[file_name] = last
+        
+        if time.time() - last < BACKUP_INTERVAL_MINUTES * 60:
+            return False
+        
+        Database._last_snapshot[file_name] = time.time()
+        return await self._create_backup(file_path)
+    
     async def _cleanup_old_backups(self, file_name: str):
         """
         Remove old backups, keeping only the most recent MAX_BACKUPS
@@ -107,25 +340,103 @@ class Database:
         safe_key = str(key).replace("/", "_").replace("\\", "_")
         return DATABASE_DIR / f"{safe_key}.json"
     
+    def _is_sharded(self, key) -> bool:
+        """
+        Check if a key is stored as one file per guild
+        """
+        return str(key) in GUILD_TABLES
+    
+    def _get_table_dir(self, key: str) -> Path:
+        """
+        Get the shard directory for a guild table
+        """
+        return DATABASE_DIR / str(key)
+    
+    def _get_shard_path(self, key: str, guild_id) -> Path:
+        """
+        Get the file path for one guild's shard of a guild table
+        """
+        safe_guild = str(guild_id).replace("/", "_").replace("\\", "_")
+        return self._get_table_dir(key) / f"{safe_guild}.json"
+    
+    def _backup_stem(self, file_path: Path) -> str:
+        """
+        Get the backup name prefix for a file
+        Shards are prefixed with their table so guild ids don't collide
+        """
+        if file_path.parent != DATABASE_DIR:
+            return f"{file_path.parent.name}-{file_path.stem}"
+        return file_path.stem
+    
+    def _table_sources(self) -> Dict[str, list]:
+        """
+        Map every stored key to the files that hold its data
+        Flat tables have one file, sharded tables have one file per guild
+        """
+        sources = {}
+        if not DATABASE_DIR.exists():
+            return sources
+        
+        for file_path in DATABASE_DIR.glob("*.json"):
+            sources[file_path.stem.replace("_", "/")] = [file_path]
+        
+        for table in sorted(GUILD_TABLES):
+            table_dir = self._get_table_dir(table)
+            if table_dir.is_dir():
+                shards = sorted(table_dir.glob("*.json"))
+                if shards:
+                    sources[table] = shards
+        
+        return sources
+    
+    async def _load_table(self, files: list) -> dict:
+        """
+        Load a table from its files, combining shards into one dict
+        """
+        data = {}
+        for file_path in files:
+            data.update(await self._load_file(file_path))
+        return data
+    
     async def _load_file(self, file_path: Path) -> dict:
         """
         Load data from a JSON file (async) with validation
         Returns empty dict if file doesn't exist or is corrupted
+        
+        The returned dict is the cached copy, so callers that change it
+        must save it (or invalidate the cache) afterwards
         """
+        cached = Database._cache.get(file_path)
+        if cached is not None:
+            Database._cache_stats["hits"] += 1
+            return cached
+        
+        Database._cache_stats["misses"] += 1
+        # Taken before reading, so a write that lands during the read shows up as a change
+        stamp = self._stamp(file_path)
+        
         if not file_path.exists():
-            return {}
+            data = {}
+            Database._cache[file_path] = data
+            Database._cache_stamps[file_path] = stamp
+            return data
         
         try:
             loop = asyncio.get_event_loop()
             def _read():
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with open(file_path, 'rb') as f:
+                    return codec.loads(f.read())
             data = await loop.run_in_executor(None, _read)
             
             if not isinstance(data, dict):
                 logger.warning(f"Invalid data structure in {file_path}, expected dict")
                 return {}
             
+            if self._journal_path(file_path) is not None:
+                data = await loop.run_in_executor(None, self._replay_journal, file_path, data)
+            
+            Database._cache[file_path] = data
+            Database._cache_stamps[file_path] = stamp
             return data
         except json.JSONDecodeError as e:
             logger.error(f"Corrupted JSON file {file_path}: {e}")
@@ -135,18 +446,134 @@ class Database:
             logger.error(f"Error loading database file {file_path}: {e}")
             return {}
     
+    def _stamp(self, file_path: Path) -> tuple:
+        """
+        Get the (mtime, size, inode) of a file and its journal, None for a missing one
+        A write from another process changes at least one of them
+        """
+        stamp = []
+        for path in (file_path, self._journal_path(file_path)):
+            if path is None:
+                continue
+            try:
+                stat = path.stat()
+                stamp.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+    
+    def _journal_path(self, file_path: Path) -> Optional[Path]:
+        """
+        Get the journal for a shard of a journaled table, None for every other file
+        """
+        if file_path.parent.parent != DATABASE_DIR or file_path.parent.name not in JOURNAL_TABLES:
+            return None
+        return file_path.with_suffix(".log")
+    
+    def _apply_journal_entry(self, data: dict, entry: dict) -> dict:
+        """
+        Apply one journal record to a shard's data
+        """
+        if entry["op"] == "merge":
+            return self._apply_update(data, entry["value"])
+        if entry["op"] == "delete":
+            self._delete_nested_value(data, entry["path"])
+            return data
+        raise ValueError(f"Unknown journal op: {entry['op']}")
+    
+    def _replay_journal(self, file_path: Path, data: dict) -> dict:
+        """
+        Apply a shard's journal on top of its snapshot (blocking, run in an executor)
+        Replay stops at the first torn or unreadable record, which is cut off
+        before the next append
+        """
+        journal_path = self._journal_path(file_path)
+        if not journal_path.exists():
+            return data
+        
+        offset = 0
+        with open(journal_path, 'rb') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("record is missing its newline")
+                    data = self._apply_journal_entry(data, codec.loads(line))
+                except (ValueError, KeyError) as e:
+                    logger.warning(f"Ignoring journal {journal_path} from byte {offset}: {e}")
+                    Database._journal_tail[file_path] = offset
+                    break
+                offset += len(line)
+        
+        return data
+    
+    def _write_journal(self, file_path: Path, entry: dict) -> int:
+        """
+        Append one record to a shard's journal and fsync it (blocking)
+        Returns the journal size
+        """
+        journal_path = self._journal_path(file_path)
+        tail = Database._journal_tail.pop(file_path, None)
+        if tail is not None:
+            os.truncate(journal_path, tail)
+        
+        line = codec.dumps(entry) + b"\n"
+        with open(journal_path, 'ab') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+    
+    async def _append_journal(self, file_path: Path, entry: dict):
+        """
+        Record a change to a journaled shard, the cached data already holds it
+        Callers hold the file's lock. Schedules a compaction once the journal is large
+        """
+        try:
+            loop = asyncio.get_event_loop()
+            size = await loop.run_in_executor(None, self._write_journal, file_path, entry)
+        except (IOError, OSError) as e:
+            self._invalidate(file_path)
+            logger.error(f"Error writing journal for {file_path}: {e}")
+            raise
+        Database._cache_stamps[file_path] = self._stamp(file_path)
+        
+        if size >= JOURNAL_COMPACT_BYTES and file_path not in Database._compactions:
+            task = asyncio.ensure_future(self._compact(file_path))
+            Database._compactions[file_path] = task
+            task.add_done_callback(lambda _: Database._compactions.pop(file_path, None))
+    
+    async def _compact(self, file_path: Path):
+        """
+        Fold a shard's journal into its snapshot
+        """
+        try:
+            async with self._locked(file_path):
+                data = await self._load_file(file_path)
+                await self._save_file(file_path, data)
+            logger.info(f"Compacted journal for {file_path}")
+        except Exception as e:
+            logger.error(f"Error compacting journal for {file_path}: {e}")
+    
+    def _uses_journal(self, file_path: Path) -> bool:
+        """
+        Check if a write to this file should be journaled
+        New shards are written in full so every shard has a snapshot file
+        """
+        return self._journal_path(file_path) is not None and file_path.exists()
+    
     async def _attempt_recovery(self, file_path: Path):
         """
         Attempt to recover from a corrupted file by using the latest backup
         """
         try:
-            file_name = file_path.stem
+            file_name = self._backup_stem(file_path)
             backups = sorted(BACKUP_DIR.glob(f"{file_name}_*.json"), reverse=True)
             
             if backups:
                 logger.info(f"Attempting recovery for {file_path} using {backups[0]}")
                 loop = asyncio.get_event_loop()
                 await loop.run_in_executor(None, shutil.copy2, backups[0], file_path)
+                self._invalidate(file_path)
                 logger.info(f"Successfully recovered {file_path}")
                 return True
         except Exception as e:
@@ -154,31 +581,185 @@ class Database:
         
         return False
     
+    def _write_atomic(self, file_path: Path, data):
+        """
+        Write a file through a temp file, fsync it and rename it into place
+        A crash leaves either the old file or the new one, never a partial write
+        """
+        temp_path = file_path.with_name(f".{file_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(codec.dumps(data))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, file_path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+        
+        # Persist the rename itself (not supported for directories on Windows)
+        if hasattr(os, "O_DIRECTORY"):
+            dir_fd = os.open(file_path.parent, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+    
     async def _save_file(self, file_path: Path, data: dict):
         """
-        Save data to a JSON file (async) with locking and backups
+        Save data to a JSON file (async) with an atomic write-rename
+        Callers hold the file's lock (see _locked) around the load and save
         Creates parent directories if needed
         """
         file_path.parent.mkdir(parents=True, exist_ok=True)
-        key = file_path.stem
-        
-        if not await self._acquire_lock(key):
-            raise IOError(f"Failed to acquire lock for {file_path} - concurrent write detected")
         
         try:
-            await self._create_backup(file_path)
+            await self._maybe_snapshot(file_path)
             
             loop = asyncio.get_event_loop()
-            def _write():
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-            await loop.run_in_executor(None, _write)
+            await loop.run_in_executor(None, self._write_atomic, file_path, data)
+            Database._cache[file_path] = data
+            self._record_file(file_path, data)
+            
+            # The snapshot now holds everything in the journal
+            journal_path = self._journal_path(file_path)
+            if journal_path is not None:
+                Database._journal_tail.pop(file_path, None)
+                journal_path.unlink(missing_ok=True)
+            Database._cache_stamps[file_path] = self._stamp(file_path)
             logger.info(f"Successfully saved {file_path}")
         except IOError as e:
+            # The cached copy may already hold the failed change
+            self._invalidate(file_path)
             logger.error(f"Error saving database file {file_path}: {e}")
             raise
-        finally:
-            await self._release_lock(key)
+    
+    def _manifest_key(self, file_path: Path) -> str:
+        return file_path.relative_to(DATABASE_DIR).as_posix()
+    
+    def _get_manifest(self) -> Dict[str, dict]:
+        """
+        Get the manifest of known-good files, loading it on first use
+        """
+        if Database._manifest is None:
+            try:
+                manifest = codec.loads(MANIFEST_PATH.read_bytes())
+                Database._manifest = manifest if isinstance(manifest, dict) else {}
+            except (OSError, ValueError):
+                Database._manifest = {}
+        return Database._manifest
+    
+    def _manifest_matches(self, file_path: Path) -> bool:
+        """
+        Check if a file is unchanged since it was last written or verified
+        """
+        entry = self._get_manifest().get(self._manifest_key(file_path))
+        if not entry:
+            return False
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return False
+        return entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns
+    
+    def _record_file(self, file_path: Path, data):
+        """
+        Mark a file as intact in the manifest (after a save or a successful check)
+        Stores its size, mtime, top-level key count and the first few keys
+        """
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return
+        keys = list(data) if isinstance(data, dict) else []
+        self._get_manifest()[self._manifest_key(file_path)] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "entries": len(keys),
+            "preview": [str(key) for key in keys[:MANIFEST_PREVIEW_KEYS]],
+        }
+        self._schedule_manifest_flush()
+    
+    def _forget_file(self, file_path: Path):
+        """
+        Drop a deleted file (or every file under a deleted folder) from the manifest
+        """
+        key = self._manifest_key(file_path)
+        manifest = self._get_manifest()
+        for entry in [name for name in manifest if name == key or name.startswith(f"{key}/")]:
+            del manifest[entry]
+        self._schedule_manifest_flush()
+    
+    def _schedule_manifest_flush(self):
+        """
+        Write the manifest a few seconds after the first change, so bursts of saves share one write
+        """
+        if Database._manifest_flush_pending:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        Database._manifest_flush_pending = True
+        loop.call_later(MANIFEST_FLUSH_DELAY, lambda: asyncio.ensure_future(Database.flush_manifest()))
+    
+    @staticmethod
+    async def flush_manifest():
+        """
+        Write the manifest to disk now
+        A stale or missing manifest only means the next startup parses more files
+        """
+        Database._manifest_flush_pending = False
+        if Database._manifest is None:
+            return
+        db = Database()
+        manifest = dict(Database._manifest)
+        try:
+            MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, db._write_atomic, MANIFEST_PATH, manifest)
+        except OSError as e:
+            logger.error(f"Error saving database manifest: {e}")
+    
+    def _check_file(self, file_path: Path):
+        """
+        Parse a file to check it (blocking, run in an executor)
+        Returns (data, seconds taken, error), data is None if the file is bad
+        An empty table {} is valid
+        """
+        start = time.perf_counter()
+        data = None
+        try:
+            data = codec.loads(file_path.read_bytes())
+            error = None if isinstance(data, dict) else "expected a dict at the top level"
+        except (OSError, ValueError) as e:
+            error = str(e)
+        if error is not None:
+            data = None
+        return data, time.perf_counter() - start, error
+    
+    def _invalidate(self, file_path: Path):
+        """
+        Drop a table from the cache so the next read goes back to disk
+        """
+        Database._cache_stamps.pop(file_path, None)
+        if Database._cache.pop(file_path, None) is not None:
+            Database._cache_stats["invalidations"] += 1
+    
+    def _invalidate_dir(self, table_dir: Path):
+        """
+        Drop every cached shard of a sharded table
+        """
+        for file_path in [path for path in Database._cache if path.parent == table_dir]:
+            self._invalidate(file_path)
+    
+    def _normalize_path(self, path) -> str:
+        """
+        Convert a path given as an int, list/tuple or string into "key1/key2" form
+        """
+        if isinstance(path, (list, tuple)):
+            return '/'.join(str(p) for p in path)
+        return str(path)
     
     def _get_nested_value(self, data: dict, path: str):
         """
@@ -237,12 +818,63 @@ class Database:
         Validate data before saving to ensure it's serializable
         """
         try:
-            json.dumps(data)
+            codec.dumps(data)
             return True
         except (TypeError, ValueError) as e:
             logger.error(f"Data validation failed: {e}")
             return False
     
+    def _stringify_ints(self, obj):
+        """
+        Convert integers to strings for JSON compatibility
+        Dict keys are converted too, so an int guild id merges into the
+        stored string key instead of shadowing it
+        """
+        if isinstance(obj, int):
+            return str(obj)
+        elif isinstance(obj, dict):
+            return {str(k): self._stringify_ints(v) for k, v in obj.items()}
+        elif isinstance(obj, list):
+            return [self._stringify_ints(elem) for elem in obj]
+        else:
+            return obj
+    
+    def _deep_merge(self, base: dict, update: dict) -> dict:
+        """
+        Deep merge two dictionaries
+        """
+        for key, val in update.items():
+            if key in base and isinstance(base[key], dict) and isinstance(val, dict):
+                self._deep_merge(base[key], val)
+            else:
+                base[key] = val
+        return base
+    
+    def _write_targets(self, key, value) -> list:
+        """
+        Validate a value for add_data and split it into (file_path, update) pairs
+        Guild tables get one pair per guild, flat tables a single pair
+        """
+        if not self._validate_data(value):
+            raise ValueError(f"Invalid data structure for key {key} - data is not JSON serializable")
+        
+        value = self._stringify_ints(value)
+        
+        if self._is_sharded(key):
+            if not isinstance(value, dict):
+                raise ValueError(f"Invalid data structure for key {key} - guild tables need a {{guild_id: data}} dict")
+            return [(self._get_shard_path(key, guild_id), {guild_id: data}) for guild_id, data in value.items()]
+        
+        return [(self._get_file_path(key), value)]
+    
+    def _apply_update(self, existing_data, update):
+        """
+        Merge an update into a table, dicts are deep merged and anything else replaces it
+        """
+        if isinstance(update, dict) and isinstance(existing_data, dict):
+            return self._deep_merge(existing_data, update)
+        return update
+    
     def _delete_nested_value(self, data: dict, path: str):
         """
         Delete a nested value from a dictionary using a path string
@@ -268,16 +900,15 @@ class Database:
         Get all database keys and their data
         Returns a dictionary of all keys and values
         """
+        if Database._sql():
+            return await Database._sql().get_db_prefix()
+        
         db = Database()
         result = {}
         
-        if not DATABASE_DIR.exists():
-            return result
-        
-        for file_path in DATABASE_DIR.glob("*.json"):
-            key = file_path.stem.replace("_", "/")
-            data = await db._load_file(file_path)
-            result[key] = data
+        for key, files in db._table_sources().items():
+            data = await db._load_table(files)
+            result[key] = copy.deepcopy(data)
         
         return result
     
@@ -287,43 +918,52 @@ class Database:
         Get data from the database
         key: The main database key (e.g., "Users", "FranchiseRole")
         path: Optional nested path (e.g., "123456789/987654321/contract" or integer guild_id)
+        
+        Returns a copy, so changing the result never touches the cache
         """
-        db = Database()
-        file_path = db._get_file_path(key)
-        data = await db._load_file(file_path)
+        if Database._sql():
+            return await Database._sql().get_data(key, path)
         
-        if path is None:
-            return data if data else None
+        db = Database()
         
-        # Convert path to string for consistency (keys are stored as strings)
-        if isinstance(path, int):
-            path = str(path)
-        elif isinstance(path, (list, tuple)):
-            path = '/'.join(str(p) for p in path)
+        if db._is_sharded(key):
+            if path is None:
+                files = sorted(db._get_table_dir(key).glob("*.json"))
+                data = await db._load_table(files)
+                return copy.deepcopy(data) if data else None
+            
+            path = db._normalize_path(path)
+            data = await db._load_file(db._get_shard_path(key, path.split('/')[0]))
         else:
-            path = str(path)
+            file_path = db._get_file_path(key)
+            data = await db._load_file(file_path)
+            
+            if path is None:
+                return copy.deepcopy(data) if data else None
+            
+            # Convert path to string for consistency (keys are stored as strings)
+            path = db._normalize_path(path)
         
         result = db._get_nested_value(data, path)
-        return result if result is not None else None
+        return copy.deepcopy(result) if result is not None else None
     
     @staticmethod
     async def get_db_prefix(prefix=None):
         """
         Get all keys that start with a prefix
         """
+        if Database._sql():
+            return await Database._sql().get_db_prefix(prefix)
+        
         db = Database()
         result = {}
         
-        if not DATABASE_DIR.exists():
-            return result
-        
         prefix_str = str(prefix) if prefix else ""
         
-        for file_path in DATABASE_DIR.glob("*.json"):
-            key = file_path.stem.replace("_", "/")
+        for key, files in db._table_sources().items():
             if key.startswith(prefix_str):
-                data = await db._load_file(file_path)
-                result[key] = data
+                data = await db._load_table(files)
+                result[key] = copy.deepcopy(data)
         
         return result
     
@@ -333,17 +973,57 @@ class Database:
         Get all database keys
         Returns a list of all keys
         """
+        if Database._sql():
+            return await Database._sql().get_db_keys()
+        
         db = Database()
-        keys = []
+        return list(db._table_sources())
+    
+    @staticmethod
+    async def get_db_summary():
+        """
+        Describe every database key without loading its data
+        Returns {key: {"files", "size", "entries", "preview", "modified"}} where
+        entries is the number of top-level keys (guilds for guild tables),
+        preview the first few of them and modified a unix timestamp
         
-        if not DATABASE_DIR.exists():
-            return keys
+        Answered from file stats and the manifest, a file is only parsed when
+        it changed outside the bot since it was last saved or checked
+        """
+        if Database._sql():
+            return await Database._sql().get_db_summary()
         
-        for file_path in DATABASE_DIR.glob("*.json"):
-            key = file_path.stem.replace("_", "/")
-            keys.append(key)
+        db = Database()
+        manifest = db._get_manifest()
+        loop = asyncio.get_event_loop()
+        summary = {}
         
-        return keys
+        for key, files in db._table_sources().items():
+            stats = [file_path.stat() for file_path in files]
+            info = {
+                "files": len(files),
+                "size": sum(stat.st_size for stat in stats),
+                "modified": max(stat.st_mtime for stat in stats),
+            }
+            
+            if db._is_sharded(key):
+                # One shard per guild, the file names are the top-level keys
+                info["entries"] = len(files)
+                info["preview"] = [file_path.stem for file_path in files[:MANIFEST_PREVIEW_KEYS]]
+            else:
+                file_path = files[0]
+                entry = manifest.get(db._manifest_key(file_path), {})
+                if "entries" not in entry or not db._manifest_matches(file_path):
+                    data, _, error = await loop.run_in_executor(None, db._check_file, file_path)
+                    if error is None:
+                        db._record_file(file_path, data)
+                    entry = manifest.get(db._manifest_key(file_path), {})
+                info["entries"] = entry.get("entries", 0)
+                info["preview"] = entry.get("preview", [])
+            
+            summary[key] = info
+        
+        return summary
     
     @staticmethod
     async def add_data(key, value):
@@ -354,48 +1034,30 @@ class Database:
         
         If value is a dict with nested paths like {guild_id: {user_id: data}},
         it will merge with existing data
+        Guild tables only accept {guild_id: data} dicts, one shard is written per guild
         """
         db = Database()
         
-        if not db._validate_data(value):
-            raise ValueError(f"Invalid data structure for key {key} - data is not JSON serializable")
+        if Database._sql():
+            result = await Database._sql().add_data(key, value)
+            Database._notify_change(key, db._changes(value))
+            return result
         
-        file_path = db._get_file_path(key)
-        existing_data = await db._load_file(file_path)
-        
-        def convert_ints_to_strings(obj):
-            """
-            Convert integers to strings for JSON compatibility
-            """
-            if isinstance(obj, int):
-                return str(obj)
-            elif isinstance(obj, dict):
-                return {k: convert_ints_to_strings(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_ints_to_strings(elem) for elem in obj]
-            else:
-                return obj
-        
-        value = convert_ints_to_strings(value)
-        
-        if isinstance(value, dict) and isinstance(existing_data, dict):
-            def deep_merge(base, update):
-                """
-                Deep merge two dictionaries
-                """
-                for key, val in update.items():
-                    if key in base and isinstance(base[key], dict) and isinstance(val, dict):
-                        deep_merge(base[key], val)
-                    else:
-                        base[key] = val
-                return base
-            
-            existing_data = deep_merge(existing_data, value)
-        else:
-            existing_data = value
+        result = {}
+        for file_path, update in db._write_targets(key, value):
+            async with db._locked(file_path):
+                existing_data = db._apply_update(await db._load_file(file_path), update)
+                if db._uses_journal(file_path):
+                    await db._append_journal(file_path, {"op": "merge", "value": update})
+                else:
+                    await db._save_file(file_path, existing_data)
+            if not db._is_sharded(key):
+                result = existing_data
+                break
+            result.update(existing_data)
         
-        await db._save_file(file_path, existing_data)
-        return existing_data
+        Database._notify_change(key, db._changes(value))
+        return result
     
     @staticmethod
     async def delete_data(key, path=None):
@@ -406,53 +1068,217 @@ class Database:
         If path is None, deletes the entire key
         """
         db = Database()
-        file_path = db._get_file_path(key)
+        if Database._sql():
+            result = await Database._sql().delete_data(key, path)
+        else:
+            result = await db._delete(key, path)
         
-        if not file_path.exists():
-            return None
+        if result is not None:
+            Database._notify_change(key, db._changes(path=path))
+        return result
+    
+    async def _delete(self, key, path=None):
+        """
+        Delete from the JSON files, see delete_data
+        """
+        loop = asyncio.get_event_loop()
         
-        data = await db._load_file(file_path)
+        if path is not None:
+            path = self._normalize_path(path)
         
-        if path is None:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, file_path.unlink)
-            return {"deleted": True}
+        if self._is_sharded(key):
+            if path is None:
+                table_dir = self._get_table_dir(key)
+                if not table_dir.exists():
+                    return None
+                await loop.run_in_executor(None, shutil.rmtree, table_dir)
+                self._invalidate_dir(table_dir)
+                self._forget_file(table_dir)
+                return {"deleted": True}
+            
+            guild_id, _, nested_path = path.partition('/')
+            file_path = self._get_shard_path(key, guild_id)
+            
+            if not file_path.exists():
+                return None
+            
+            # Removing a whole guild drops its shard file
+            if not nested_path:
+                async with self._locked(file_path):
+                    await loop.run_in_executor(None, file_path.unlink)
+                    journal_path = self._journal_path(file_path)
+                    if journal_path is not None:
+                        journal_path.unlink(missing_ok=True)
+                    self._invalidate(file_path)
+                    self._forget_file(file_path)
+                return {"deleted": True}
+        else:
+            file_path = self._get_file_path(key)
+            
+            if not file_path.exists():
+                return None
+            
+            if path is None:
+                async with self._locked(file_path):
+                    await loop.run_in_executor(None, file_path.unlink)
+                    self._invalidate(file_path)
+                    self._forget_file(file_path)
+                return {"deleted": True}
         
-        db._delete_nested_value(data, path)
-        await db._save_file(file_path, data)
+        async with self._locked(file_path):
+            data = await self._load_file(file_path)
+            self._delete_nested_value(data, path)
+            if self._uses_journal(file_path):
+                await self._append_journal(file_path, {"op": "delete", "path": path})
+            else:
+                await self._save_file(file_path, data)
         return data
     
     @staticmethod
-    async def verify_integrity():
+    @contextlib.asynccontextmanager
+    async def batch():
+        """
+        Stage many writes and commit them together
+        Each touched file is loaded once, backed up once and written once on exit
+        Nothing is written if the block raises
+        
+        async with Database.batch() as batch:
+            for user_id, data in rows:
+                await batch.add_data("Users", {guild_id: {user_id: data}})
+        """
+        if Database._sql():
+            async with Database._sql().batch() as batch:
+                yield batch
+        else:
+            batch = DatabaseBatch()
+            yield batch
+            await batch.commit()
+        
+        for key, changes in batch.changes:
+            Database._notify_change(key, changes)
+    
+    @staticmethod
+    async def migrate_to_shards():
+        """
+        Split flat guild table files (database/Users.json) into per-guild shards
+        Safe to run on every startup, tables that are already sharded are skipped
+        The flat file is moved into the backups folder once its shards are written
+        Returns the list of migrated tables
+        """
+        db = Database()
+        migrated = []
+        loop = asyncio.get_event_loop()
+        
+        if Database._sql():
+            return migrated
+        
+        for table in sorted(GUILD_TABLES):
+            flat_path = db._get_file_path(table)
+            if not flat_path.exists():
+                continue
+            
+            def _read():
+                with open(flat_path, 'rb') as f:
+                    return codec.loads(f.read())
+            try:
+                data = await loop.run_in_executor(None, _read)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.error(f"Skipping shard migration for {table}, {flat_path} could not be read: {e}")
+                continue
+            
+            if not isinstance(data, dict):
+                logger.error(f"Skipping shard migration for {table}, expected a dict in {flat_path}")
+                continue
+            
+            for guild_id, guild_data in data.items():
+                shard_path = db._get_shard_path(table, guild_id)
+                async with db._locked(shard_path):
+                    await db._save_file(shard_path, {guild_id: guild_data})
+            
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            archive_path = BACKUP_DIR / f"{table}_premigration_{timestamp}.json"
+            await loop.run_in_executor(None, shutil.move, str(flat_path), str(archive_path))
+            db._forget_file(flat_path)
+            
+            migrated.append(table)
+            logger.info(f"Migrated {table} into {len(data)} guild shards")
+        
+        return migrated
+    
+    @staticmethod
+    async def migrate_to_sqlite():
+        """
+        Copy the JSON files into SQLite when the SQLite backend is selected
+        Only runs while the SQLite database is still empty
+        Returns the number of tables copied
+        """
+        if not Database._sql():
+            return 0
+        return await Database._sql().migrate_from_json()
+    
+    @staticmethod
+    async def verify_integrity(deep: bool = False):
         """
         Verify database integrity and attempt recovery of corrupted files
-        Returns a report of issues found and fixed
+        Returns a report of issues found and fixed, with per-file parse times in ms
+        
+        deep: Parse every file. Otherwise files whose size and mtime match the
+        manifest (unchanged since they were last saved or checked) are skipped
+        Files are parsed concurrently on the default thread pool
         """
+        if Database._sql():
+            return await Database._sql().verify_integrity(deep)
+        
         db = Database()
         report = {
             "checked": 0,
+            "skipped": 0,
             "corrupted": 0,
             "recovered": 0,
-            "errors": []
+            "errors": [],
+            "timings": {},
+            "duration": 0.0
         }
+        start = time.perf_counter()
         
-        if not DATABASE_DIR.exists():
-            return report
-        
-        for file_path in DATABASE_DIR.glob("*.json"):
+        files = [file_path for sources in db._table_sources().values() for file_path in sources]
+        to_parse = []
+        for file_path in files:
             report["checked"] += 1
+            if not deep and db._manifest_matches(file_path):
+                report["skipped"] += 1
+            else:
+                to_parse.append(file_path)
+        
+        loop = asyncio.get_event_loop()
+        results = await asyncio.gather(
+            *(loop.run_in_executor(None, db._check_file, file_path) for file_path in to_parse)
+        )
+        
+        for file_path, (data, elapsed, error) in zip(to_parse, results):
+            report["timings"][db._manifest_key(file_path)] = round(elapsed * 1000, 2)
+            if error is None:
+                db._record_file(file_path, data)
+                continue
+            
+            report["corrupted"] += 1
+            logger.error(f"Corrupted database file {file_path}: {error}")
             try:
-                data = await db._load_file(file_path)
-                if not data and file_path.exists():
-                    report["corrupted"] += 1
-                    if await db._attempt_recovery(file_path):
-                        report["recovered"] += 1
-                    else:
-                        report["errors"].append(f"Failed to recover {file_path}")
+                async with db._locked(file_path):
+                    recovered = await db._attempt_recovery(file_path)
+                if recovered:
+                    report["recovered"] += 1
+                else:
+                    report["errors"].append(f"Failed to recover {file_path}")
             except Exception as e:
-                report["errors"].append(f"Error checking {file_path}: {e}")
+                report["errors"].append(f"Error recovering {file_path}: {e}")
         
-        logger.info(f"Database integrity check complete: {report}")
+        report["duration"] = round((time.perf_counter() - start) * 1000, 2)
+        await Database.flush_manifest()
+        logger.info(
+            f"Database integrity check complete: {report['checked']} files, {report['skipped']} unchanged, "
+            f"{report['corrupted']} corrupted, {report['recovered']} recovered in {report['duration']} ms"
+        )
         return report
     
     @staticmethod
@@ -464,7 +1290,8 @@ class Database:
             return {}
         
         backup_info = {}
-        for file_name in {f.stem.rsplit('_', 1)[0] for f in BACKUP_DIR.glob("*.json")}:
+        # Backup names end in _YYYYMMDD_HHMMSS
+        for file_name in {f.stem.rsplit('_', 2)[0] for f in BACKUP_DIR.glob("*.json")}:
             backups = sorted(BACKUP_DIR.glob(f"{file_name}_*.json"), reverse=True)
             backup_info[file_name] = {
                 "count": len(backups),
@@ -475,9 +1302,10 @@ class Database:
         return backup_info
     
     @staticmethod
-    async def restore_from_backup(key: str, backup_name: str):
+    async def restore_from_backup(key: str, backup_name: str, guild_id=None):
         """
         Restore a database file from a specific backup
+        guild_id: The shard to restore for guild tables (e.g. "Users-<guild_id>_... backups")
         """
         try:
             backup_path = BACKUP_DIR / backup_name
@@ -486,16 +1314,144 @@ class Database:
                 return False
             
             db = Database()
-            file_path = db._get_file_path(key)
+            if db._is_sharded(key):
+                if guild_id is None:
+                    logger.error(f"{key} is stored per guild, a guild_id is needed to restore it")
+                    return False
+                file_path = db._get_shard_path(key, guild_id)
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+            else:
+                file_path = db._get_file_path(key)
             
             loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, shutil.copy2, backup_path, file_path)
+            async with db._locked(file_path):
+                await loop.run_in_executor(None, shutil.copy2, backup_path, file_path)
+                # Journaled changes belong to the state being replaced
+                journal_path = db._journal_path(file_path)
+                if journal_path is not None:
+                    journal_path.unlink(missing_ok=True)
+                db._invalidate(file_path)
             logger.info(f"Successfully restored {key} from {backup_name}")
+            Database._notify_change(key, None if guild_id is None else {str(guild_id): None})
             return True
         except Exception as e:
             logger.error(f"Error restoring from backup: {e}")
             return False
     
+    @staticmethod
+    async def clear_all():
+        """
+        Delete every table: flat files, guild table shards and their journals,
+        or every row when the SQLite backend is on
+        Backups, lock files and the manifest folder are kept
+        Returns the keys that were deleted
+        """
+        if Database._sql():
+            keys = await Database._sql().get_db_keys()
+            await Database._sql().clear_all()
+        else:
+            db = Database()
+            keys = set(db._table_sources())
+            # A guild table folder left with only journals still holds data
+            keys.update(table for table in GUILD_TABLES if db._get_table_dir(table).is_dir())
+            keys = sorted(keys)
+            for key in keys:
+                await db._delete(key)
+        
+        logger.info(f"Cleared {len(keys)} database tables")
+        Database.invalidate_cache()
+        return keys
+    
+    @staticmethod
+    def invalidate_cache(key=None):
+        """
+        Drop cached tables so the next read reloads them from disk
+        key: The database key to drop, or None to clear the whole cache
+        Use this after editing files in the database folder by hand
+        """
+        db = Database()
+        if key is None:
+            Database._cache_stats["invalidations"] += len(Database._cache)
+            Database._cache.clear()
+            Database._cache_stamps.clear()
+            # The manifest is reloaded too, the files may have changed under it
+            Database._manifest = None
+            Database._notify_change(None)
+            return
+        
+        if db._is_sharded(key):
+            db._invalidate_dir(db._get_table_dir(key))
+        else:
+            db._invalidate(db._get_file_path(key))
+        Database._notify_change(key)
+    
+    @staticmethod
+    def clear_temp_files():
+        """
+        Remove temp files left behind by a save that was interrupted before its rename
+        Lock files are left alone: flock locks die with their process, and
+        unlinking a lock file lets two processes lock different files at one path
+        Returns the number of temp files removed
+        """
+        removed = 0
+        for temp_path in DATABASE_DIR.rglob(".*.tmp"):
+            try:
+                temp_path.unlink()
+                removed += 1
+                logger.info(f"Removed leftover temp file {temp_path}")
+            except OSError as e:
+                logger.error(f"Error removing temp file {temp_path}: {e}")
+        return removed
+    
+    @staticmethod
+    async def compact_journals():
+        """
+        Fold every journal into its shard snapshot, e.g. before shutting down
+        Returns the number of journals compacted
+        """
+        if Database._sql():
+            return 0
+        
+        db = Database()
+        compacted = 0
+        for table in sorted(JOURNAL_TABLES):
+            for journal_path in sorted(db._get_table_dir(table).glob("*.log")):
+                file_path = journal_path.with_suffix(".json")
+                if not file_path.exists():
+                    journal_path.unlink(missing_ok=True)
+                    continue
+                await db._compact(file_path)
+                compacted += 1
+        return compacted
+    
+    @staticmethod
+    def get_lock_stats():
+        """
+        Get lock wait metrics: acquisitions, timeouts, total/average/max wait (seconds)
+        and the same numbers per key
+        """
+        stats = Database._lock_stats
+        acquired = stats["acquired"]
+        return {
+            "acquired": acquired,
+            "timeouts": stats["timeouts"],
+            "wait_total": round(stats["wait_total"], 6),
+            "wait_avg": round(stats["wait_total"] / acquired, 6) if acquired else 0.0,
+            "wait_max": round(stats["wait_max"], 6),
+            "keys": copy.deepcopy(stats["keys"]),
+        }
+    
+    @staticmethod
+    def get_cache_stats():
+        """
+        Get cache hit/miss counters and the number of resident tables
+        """
+        stats = dict(Database._cache_stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["tables"] = len(Database._cache)
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+    
     @staticmethod
     async def export_database(export_path: str = None):
         """
@@ -512,8 +1468,8 @@ class Database:
             
             loop = asyncio.get_event_loop()
             def _export():
-                with open(export_path, 'w', encoding='utf-8') as f:
-                    json.dump(all_data, f, indent=2, ensure_ascii=False)
+                with open(export_path, 'wb') as f:
+                    f.write(codec.dumps(all_data, pretty=True))
             
             await loop.run_in_executor(None, _export)
             logger.info(f"Database exported to {export_path}")
@@ -521,3 +1477,151 @@ class Database:
         except Exception as e:
             logger.error(f"Error exporting database: {e}")
             return None
+
+
+class DatabaseBatch:
+    """
+    Staged writes created by Database.batch()
+    Supports the same get_data/add_data/delete_data calls as Database,
+    reads inside the batch see the staged changes
+    
+    Changes are recorded as operations and replayed on commit while the
+    file's lock is held, so writes made elsewhere during the batch are kept
+    """
+    
+    def __init__(self):
+        self._db = Database()
+        self._staged: Dict[Path, Any] = {}
+        self._ops: Dict[Path, list] = {}
+        self._deleted = set()
+        # (key, changes) of every staged write, for Database.on_change after commit
+        self.changes = []
+    
+    async def _working_copy(self, file_path: Path):
+        """
+        Get the staged copy of a file, loading it on first use
+        """
+        if file_path not in self._staged:
+            self._staged[file_path] = copy.deepcopy(await self._db._load_file(file_path))
+        return self._staged[file_path]
+    
+    def _stage_delete(self, file_path: Path):
+        """
+        Mark a whole file for deletion on commit
+        """
+        self._staged[file_path] = {}
+        self._ops.setdefault(file_path, []).append(("drop", None))
+        self._deleted.add(file_path)
+    
+    def _shard_paths(self, key) -> list:
+        """
+        Get every shard of a guild table, including ones only staged in this batch
+        """
+        table_dir = self._db._get_table_dir(key)
+        paths = set(table_dir.glob("*.json")) if table_dir.is_dir() else set()
+        paths.update(path for path in self._staged if path.parent == table_dir)
+        return sorted(path for path in paths if path not in self._deleted)
+    
+    async def get_data(self, key, path=None):
+        """
+        Get data from the database, including changes staged in this batch
+        """
+        db = self._db
+        
+        if db._is_sharded(key):
+            if path is None:
+                data = {}
+                for file_path in self._shard_paths(key):
+                    data.update(await self._working_copy(file_path))
+                return copy.deepcopy(data) if data else None
+            
+            path = db._normalize_path(path)
+            data = await self._working_copy(db._get_shard_path(key, path.split('/')[0]))
+        else:
+            data = await self._working_copy(db._get_file_path(key))
+            if path is None:
+                return copy.deepcopy(data) if data else None
+            path = db._normalize_path(path)
+        
+        result = db._get_nested_value(data, path)
+        return copy.deepcopy(result) if result is not None else None
+    
+    async def add_data(self, key, value):
+        """
+        Stage a merge, same rules as Database.add_data
+        """
+        for file_path, update in self._db._write_targets(key, value):
+            existing_data = await self._working_copy(file_path)
+            self._staged[file_path] = self._db._apply_update(existing_data, copy.deepcopy(update))
+            self._ops.setdefault(file_path, []).append(("merge", update))
+            self._deleted.discard(file_path)
+        self.changes.append((key, self._db._changes(value)))
+    
+    async def delete_data(self, key, path=None):
+        """
+        Stage a delete, same rules as Database.delete_data
+        """
+        db = self._db
+        self.changes.append((key, db._changes(path=path)))
+        
+        if path is not None:
+            path = db._normalize_path(path)
+        
+        if db._is_sharded(key):
+            if path is None:
+                for file_path in self._shard_paths(key):
+                    self._stage_delete(file_path)
+                return
+            
+            guild_id, _, nested_path = path.partition('/')
+            file_path = db._get_shard_path(key, guild_id)
+            if not nested_path:
+                self._stage_delete(file_path)
+                return
+        else:
+            file_path = db._get_file_path(key)
+            if path is None:
+                self._stage_delete(file_path)
+                return
+        
+        if file_path not in self._staged and not file_path.exists():
+            return
+        
+        data = await self._working_copy(file_path)
+        db._delete_nested_value(data, path)
+        self._ops.setdefault(file_path, []).append(("delete", path))
+    
+    async def commit(self):
+        """
+        Write every changed file, one backup and one save per file
+        """
+        db = self._db
+        loop = asyncio.get_event_loop()
+        
+        for file_path, ops in self._ops.items():
+            async with db._locked(file_path):
+                data = await db._load_file(file_path)
+                for op, arg in ops:
+                    if op == "merge":
+                        data = db._apply_update(data, arg)
+                    elif op == "delete":
+                        db._delete_nested_value(data, arg)
+                    else:
+                        data = {}
+                
+                if file_path in self._deleted:
+                    if file_path.exists():
+                        await loop.run_in_executor(None, file_path.unlink)
+                    journal_path = db._journal_path(file_path)
+                    if journal_path is not None:
+                        journal_path.unlink(missing_ok=True)
+                    db._invalidate(file_path)
+                    db._forget_file(file_path)
+                    continue
+                
+                await db._save_file(file_path, data)
+        
+        logger.info(f"Committed batch of {len(self._ops)} files")
+        self._staged.clear()
+        self._ops.clear()
+        self._deleted.clear()
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, List
+
+import disnake
+
+logger = logging.getLogger(__name__)
+
+# Most sends in flight at once across every fan-out
+FANOUT_CONCURRENCY = 10
+# Background sends waiting to go out, past this they're sent right away instead
+FANOUT_QUEUE_SIZE = 500
+
+
+class FanoutResult:
+    """
+    What happened to one fan-out: channel ids that got the message and the ones that didn't (with why)
+    """
+
+    __slots__ = ("sent", "failed")
+
+    def __init__(self):
+        self.sent: List[int] = []
+        self.failed: Dict[int, str] = {}
+
+    def __bool__(self):
+        return bool(self.sent)
+
+    def summary(self, label: str) -> str:
+        failures = ", ".join(f"{channel_id} ({reason})" for channel_id, reason in self.failed.items())
+        return f"Sent to {len(self.sent)}/{len(self.sent) + len(self.failed)} {label} channels, failed: {failures}"
+
+
+class Fanout:
+    """
+    Sends one message to several channels at once
+
+    Discord rate limits message sends per channel, so sends to the same
+    channel wait for each other while different channels go out together
+    (at most FANOUT_CONCURRENCY at a time). Failures don't stop the other
+    channels, they're collected and logged as one line
+
+    result = await Fanout.send(guild, channel_ids, "Transactions", embed=embed)
+    Fanout.send_later(guild, channel_ids, "Notification", embed=embed)
+    """
+
+    _channel_locks: Dict[int, asyncio.Lock] = {}
+    _semaphore = None
+    _queue = None
+    _worker = None
+
+    @staticmethod
+    async def send(guild: disnake.Guild, channel_ids: Iterable, label: str = "", **kwargs) -> FanoutResult:
+        """
+        Send to every channel concurrently, kwargs go to channel.send
+        """
+        result = FanoutResult()
+        channel_ids = list(dict.fromkeys(channel_ids))
+        if not channel_ids:
+            return result
+
+        if Fanout._semaphore is None:
+            Fanout._semaphore = asyncio.Semaphore(FANOUT_CONCURRENCY)
+        await asyncio.gather(*(Fanout._send_one(guild, channel_id, result, kwargs) for channel_id in channel_ids))
+
+        if result.failed:
+            logger.warning(f"{guild.id}: {result.summary(label)}")
+        return result
+
+    @staticmethod
+    def send_later(guild: disnake.Guild, channel_ids: Iterable, label: str = "", **kwargs):
+        """
+        Queue a send that nobody waits on (notifications), a background worker sends them in order
+        """
+        if Fanout._queue is None:
+            Fanout._queue = asyncio.Queue(FANOUT_QUEUE_SIZE)
+        if Fanout._worker is None or Fanout._worker.done():
+            Fanout._worker = asyncio.create_task(Fanout._drain())
+
+        try:
+            Fanout._queue.put_nowait((guild, list(channel_ids), label, kwargs))
+        except asyncio.QueueFull:
+            asyncio.create_task(Fanout.send(guild, channel_ids, label, **kwargs))
+
+    @staticmethod
+    async def join():
+        """
+        Wait for every queued send to go out
+        """
+        if Fanout._queue is not None:
+            await Fanout._queue.join()
+
+    @staticmethod
+    async def _drain():
+        while True:
+            guild, channel_ids, label, kwargs = await Fanout._queue.get()
+            try:
+                await Fanout.send(guild, channel_ids, label, **kwargs)
+            except Exception as e:
+                logger.error(f"Error sending queued {label} message: {e}", exc_info=True)
+            finally:
+                Fanout._queue.task_done()
+
+    @staticmethod
+    async def _send_one(guild: disnake.Guild, channel_id, result: FanoutResult, kwargs: dict):
+        try:
+            channel_id = int(channel_id)
+        except (ValueError, TypeError):
+            result.failed[channel_id] = "bad id"
+            return
+
+        channel = guild.get_channel_or_thread(channel_id)
+        if channel is None:
+            result.failed[channel_id] = "missing"
+            return
+
+        lock = Fanout._channel_locks.get(channel_id)
+        if lock is None:
+            lock = Fanout._channel_locks[channel_id] = asyncio.Lock()
+
+        async with lock, Fanout._semaphore:
+            try:
+                await channel.send(**kwargs)
+            except disnake.Forbidden:
+                result.failed[channel_id] = "no permission"
+            except disnake.HTTPException as e:
+                result.failed[channel_id] = f"HTTP {e.status}"
+            except Exception as e:
+                result.failed[channel_id] = type(e).__name__
+            else:
+                result.sent.append(channel_id)
@@ -0,0 +1,51 @@
+from typing import Dict, Iterable, Optional, Tuple
+
+import disnake
+from rapidfuzz import fuzz, process
+
+# Lowest similarity (0-100) a fuzzy name match is accepted at
+FUZZY_CUTOFF = 90
+
+
+class MemberIndex:
+    """
+    A guild's members by case-folded username, display name and global name
+
+    Finding a member by name with disnake.utils.find scans the whole guild,
+    so an import did that once per row. The index is built with one pass
+    over the members and every lookup after that is a dict hit. Like the
+    scan, a name shared by several members resolves to the first of them
+
+    index = MemberIndex(guild.members)
+    index.get("Bread")            # member id or None
+    index.fuzzy("Braed")          # (member id, score) or None
+    """
+
+    __slots__ = ("_ids", "_names")
+
+    def __init__(self, members: Iterable[disnake.Member]):
+        self._ids: Dict[str, int] = {}
+        for member in members:
+            for name in (member.name, member.display_name, member.global_name):
+                if name:
+                    self._ids.setdefault(name.casefold(), member.id)
+        # Only built if a fuzzy lookup happens
+        self._names = None
+
+    def __len__(self):
+        return len(self._ids)
+
+    def get(self, name: str) -> Optional[int]:
+        return self._ids.get(name.strip().casefold())
+
+    def fuzzy(self, name: str, cutoff: float = FUZZY_CUTOFF) -> Optional[Tuple[int, float]]:
+        """
+        The closest name scoring at least cutoff, for typos in sheets
+        """
+        if self._names is None:
+            self._names = list(self._ids)
+
+        match = process.extractOne(name.strip().casefold(), self._names, scorer=fuzz.ratio, score_cutoff=cutoff)
+        if match is None:
+            return None
+        return self._ids[match[0]], match[1]
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import disnake
+
+from utils.settings import table_ids
+
+logger = logging.getLogger(__name__)
+
+# Member edits in flight per guild, Discord buckets them on the guild
+ROLE_EDIT_CONCURRENCY = 5
+
+
+class RolePlanResult:
+    """
+    Members whose roles were edited, left alone (nothing to change) or failed (with why)
+    """
+
+    __slots__ = ("edited", "unchanged", "failed")
+
+    def __init__(self):
+        self.edited: List[disnake.Member] = []
+        self.unchanged: List[disnake.Member] = []
+        self.failed: Dict[disnake.Member, str] = {}
+
+    def ok(self, member: disnake.Member) -> bool:
+        return member not in self.failed
+
+
+class RolePlan:
+    """
+    Collects role changes for many members and applies each member's in one request
+
+    add_roles/remove_roles are a request per role, so signing someone (team,
+    AfterSign roles, FreeAgent roles) used to be 3+ requests. A plan works
+    out every member's final role set and sends it with one
+    member.edit(roles=...), members with nothing to change are skipped.
+    A member with a single role to change keeps the per-role add/remove
+
+    plan = RolePlan(guild)
+    plan.add(member, team)
+    await plan.add_table(member, "AfterSignRole")
+    await plan.remove_table(member, "FreeAgentRole")
+    result = await plan.apply()
+
+    The last call for a role wins if it's both added and removed. Final role
+    sets are worked out from the member cache when the plan is applied
+
+    member.edit(roles=...) replaces the whole role list, last writer wins:
+    a role another command or bot changed after the cache was read (or a
+    gateway update not applied yet) is put back the way the cache had it.
+    That's only risked when it saves requests, two or more roles for a member
+    """
+
+    _semaphores: Dict[int, asyncio.Semaphore] = {}
+
+    def __init__(self, guild: disnake.Guild):
+        self.guild = guild
+        # member id -> (member, role id -> True to add / False to remove), in the order members were added
+        self._changes: Dict[int, tuple] = {}
+
+    def __len__(self):
+        return len(self._changes)
+
+    def add(self, member: disnake.Member, *roles):
+        self._set(member, roles, True)
+        return self
+
+    def remove(self, member: disnake.Member, *roles):
+        self._set(member, roles, False)
+        return self
+
+    async def add_table(self, member: disnake.Member, table: str):
+        """
+        Add every role of a setting table (e.g. "AfterSignRole")
+        """
+        self._set(member, await self._table_roles(table), True)
+        return self
+
+    async def remove_table(self, member: disnake.Member, table: str):
+        self._set(member, await self._table_roles(table), False)
+        return self
+
+    def role_changes(self, member: disnake.Member) -> tuple:
+        """
+        (role ids to add, role ids to remove) that actually change the member, from the member cache
+        """
+        changes = self._changes.get(member.id, (member, {}))[1]
+        current = set(member._roles)
+        added = [role_id for role_id, add in changes.items() if add and role_id not in current and role_id != self.guild.id]
+        removed = [role_id for role_id, add in changes.items() if not add and role_id in current]
+        return added, removed
+
+    def final_roles(self, member: disnake.Member) -> Optional[List[int]]:
+        """
+        The member's role ids once the plan is applied, None if nothing changes
+        """
+        changes = self._changes.get(member.id, (member, {}))[1]
+        current = set(member._roles)
+        final = set(current)
+        for role_id, add in changes.items():
+            if add:
+                final.add(role_id)
+            else:
+                final.discard(role_id)
+        # @everyone isn't sent with a member's roles
+        final.discard(self.guild.id)
+
+        if final == current:
+            return None
+        return sorted(final)
+
+    async def apply(
+        self,
+        progress: Callable[[int, int], Awaitable] = None,
+        reason: str = None,
+    ) -> RolePlanResult:
+        """
+        Edit every member, ROLE_EDIT_CONCURRENCY at a time
+        progress(done, total) is awaited after each member
+        """
+        result = RolePlanResult()
+        semaphore = RolePlan._semaphores.get(self.guild.id)
+        if semaphore is None:
+            semaphore = RolePlan._semaphores[self.guild.id] = asyncio.Semaphore(ROLE_EDIT_CONCURRENCY)
+
+        total = len(self._changes)
+        done = 0
+
+        async def edit(member: disnake.Member):
+            nonlocal done
+            added, removed = self.role_changes(member)
+            if not added and not removed:
+                result.unchanged.append(member)
+            else:
+                async with semaphore:
+                    try:
+                        # One role is a single atomic request either way, so it can't undo anyone else's change
+                        if len(added) + len(removed) == 1:
+                            if added:
+                                await member.add_roles(disnake.Object(added[0]), reason=reason)
+                            else:
+                                await member.remove_roles(disnake.Object(removed[0]), reason=reason)
+                        else:
+                            final = self.final_roles(member)
+                            await member.edit(roles=[disnake.Object(role_id) for role_id in final], reason=reason)
+                        result.edited.append(member)
+                    except disnake.Forbidden:
+                        result.failed[member] = "Missing permissions"
+                    except disnake.HTTPException as e:
+                        result.failed[member] = f"HTTP {e.status}: {e.text}"
+
+            done += 1
+            if progress is not None:
+                try:
+                    await progress(done, total)
+                except Exception as e:
+                    logger.warning(f"Role plan progress callback failed: {e}")
+
+        await asyncio.gather(*(edit(member) for member, _ in self._changes.values()))
+        self._changes.clear()
+        return result
+
+    def _set(self, member: disnake.Member, roles, add: bool):
+        entry = self._changes.get(member.id)
+        if entry is None:
+            entry = self._changes[member.id] = (member, {})
+        changes = entry[1]
+
+        for role in roles:
+            if role is None:
+                continue
+            changes[role if isinstance(role, int) else role.id] = add
+
+    async def _table_roles(self, table: str) -> List[int]:
+        # Roles that were deleted are skipped, like add_roles/remove_roles did
+        return [role_id for role_id in await table_ids(table, self.guild.id) if self.guild.get_role(role_id)]
@@ -0,0 +1,176 @@
+from typing import Dict, FrozenSet, List, Optional, Set
+
+import disnake
+
+from utils.chunker import URGENT, ChunkScheduler
+from utils.settings import GuildSettings
+
+
+class GuildRoster:
+    """
+    Team rosters of one guild: team role id -> member ids, member id -> team role ids
+    """
+
+    __slots__ = ("settings_ids", "team_ids", "members", "teams")
+
+    def __init__(self, settings_ids: FrozenSet[int], team_ids: FrozenSet[int]):
+        # The TeamRole ids the index was built from, and the ones whose role still exists
+        self.settings_ids = settings_ids
+        self.team_ids = team_ids
+        self.members: Dict[int, Set[int]] = {team_id: set() for team_id in team_ids}
+        self.teams: Dict[int, FrozenSet[int]] = {}
+
+    def set_member(self, member_id: int, role_ids):
+        """
+        Put a member on the teams in role_ids (and take them off every other team)
+        """
+        teams = self.team_ids.intersection(role_ids)
+        old_teams = self.teams.get(member_id, frozenset())
+        if teams == old_teams:
+            return
+
+        for team_id in old_teams - teams:
+            self.members[team_id].discard(member_id)
+        for team_id in teams - old_teams:
+            self.members[team_id].add(member_id)
+
+        if teams:
+            self.teams[member_id] = teams
+        else:
+            self.teams.pop(member_id, None)
+
+    def remove_member(self, member_id: int):
+        self.set_member(member_id, ())
+
+    def remove_team(self, team_id: int):
+        self.team_ids = self.team_ids - {team_id}
+        for member_id in self.members.pop(team_id, ()):
+            teams = self.teams[member_id] - {team_id}
+            if teams:
+                self.teams[member_id] = teams
+            else:
+                del self.teams[member_id]
+
+
+class RosterIndex:
+    """
+    Per-guild index of who is on which team
+
+    role.members walks the whole member cache, so listing 32 teams meant 32
+    full scans. A guild is indexed with one pass over its members the first
+    time one of its rosters is needed once it's chunked, after that member/role events keep it
+    current (see cogs/events.py) and lookups only touch the roster itself
+
+    members = await RosterIndex.team_members(guild, team)
+    team_ids = await RosterIndex.member_teams(guild, member.id)
+
+    The index is rebuilt when the guild's TeamRole table changes
+    """
+
+    _guilds: Dict[int, GuildRoster] = {}
+    _stats = {"hits": 0, "builds": 0, "partial_builds": 0, "updates": 0}
+
+    @staticmethod
+    async def get(guild: disnake.Guild) -> GuildRoster:
+        """
+        The roster index of a guild, building it if needed
+        """
+        settings_ids = (await GuildSettings.get(guild.id)).id_set("TeamRole")
+        roster = RosterIndex._guilds.get(guild.id)
+        if roster is not None and roster.settings_ids == settings_ids:
+            RosterIndex._stats["hits"] += 1
+            return roster
+
+        # No awaits from here on, events can't change the member cache mid-build
+        # Deleted roles can linger in member._roles, skip teams whose role is gone
+        team_ids = frozenset(team_id for team_id in settings_ids if guild.get_role(team_id) is not None)
+        roster = GuildRoster(settings_ids, team_ids)
+        if team_ids:
+            for member in guild.members:
+                roster.set_member(member.id, member._roles)
+
+        # Until the guild is chunked the index only covers cached members, use it once and rebuild next time
+        if not guild.chunked:
+            ChunkScheduler.request(guild, URGENT)
+            RosterIndex._stats["partial_builds"] += 1
+            return roster
+
+        RosterIndex._guilds[guild.id] = roster
+        RosterIndex._stats["builds"] += 1
+        return roster
+
+    @staticmethod
+    async def team_members(guild: disnake.Guild, team: disnake.Role) -> Optional[List[disnake.Member]]:
+        """
+        Members on a team, None if the role isn't a team
+        """
+        roster = await RosterIndex.get(guild)
+        member_ids = roster.members.get(team.id)
+        if member_ids is None:
+            return None
+
+        members = []
+        for member_id in member_ids:
+            member = guild.get_member(member_id)
+            if member is not None:
+                members.append(member)
+        return members
+
+    @staticmethod
+    async def team_sizes(guild: disnake.Guild) -> Dict[int, int]:
+        """
+        Roster size of every team
+        """
+        roster = await RosterIndex.get(guild)
+        return {team_id: len(member_ids) for team_id, member_ids in roster.members.items()}
+
+    @staticmethod
+    async def member_teams(guild: disnake.Guild, member_id: int) -> FrozenSet[int]:
+        """
+        Team role ids a member is on
+        """
+        roster = await RosterIndex.get(guild)
+        return roster.teams.get(member_id, frozenset())
+
+    @staticmethod
+    def update_member(member: disnake.Member):
+        """
+        Call when a member joins or their roles change
+        Guilds that haven't been indexed yet are skipped, they're built on first use
+        """
+        roster = RosterIndex._guilds.get(member.guild.id)
+        if roster is not None:
+            roster.set_member(member.id, member._roles)
+            RosterIndex._stats["updates"] += 1
+
+    @staticmethod
+    def remove_member(guild_id: int, member_id: int):
+        roster = RosterIndex._guilds.get(guild_id)
+        if roster is not None:
+            roster.remove_member(member_id)
+            RosterIndex._stats["updates"] += 1
+
+    @staticmethod
+    def remove_role(role: disnake.Role):
+        roster = RosterIndex._guilds.get(role.guild.id)
+        if roster is not None and role.id in roster.members:
+            roster.remove_team(role.id)
+            RosterIndex._stats["updates"] += 1
+
+    @staticmethod
+    def forget(guild_id: int = None):
+        """
+        Drop the index of a guild, or of every guild
+        """
+        if guild_id is None:
+            RosterIndex._guilds.clear()
+        else:
+            RosterIndex._guilds.pop(guild_id, None)
+
+    @staticmethod
+    def get_stats() -> dict:
+        return {
+            **RosterIndex._stats,
+            "guilds": len(RosterIndex._guilds),
+            "indexed_members": sum(len(roster.teams) for roster in RosterIndex._guilds.values()),
+        }
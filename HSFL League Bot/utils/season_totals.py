@@ -0,0 +1,247 @@
+import copy
+import logging
+import math
+import os
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Recompute every player's totals from all their weeks after each import and log any difference
+VERIFY_TOTALS = os.getenv("IMPORT_VERIFY_TOTALS", "").strip().lower() in {"1", "true", "yes"}
+
+_MISSING = object()
+
+
+class _NotFinite(Exception):
+    """
+    A stat like "inf" or "nan", the running sums can't take it back out so the player is recomputed in full
+    """
+
+
+def to_number(value: object) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    text = str(value).strip()
+    if not text:
+        return None
+
+    if text.endswith("%"):
+        text = text[:-1].strip()
+
+    text = text.replace(",", "")
+
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def to_decimal(value: object) -> Optional[Decimal]:
+    """
+    The exact value of a numeric stat (what to_number reads), so running sums don't drift
+    """
+    number = to_number(value)
+    if number is None:
+        return None
+    if not math.isfinite(number):
+        raise _NotFinite(value)
+
+    if isinstance(value, int) and not isinstance(value, bool):
+        return Decimal(value)
+    if isinstance(value, (int, float)):
+        return Decimal(repr(number))
+
+    text = str(value).strip()
+    if text.endswith("%"):
+        text = text[:-1].strip()
+    try:
+        return Decimal(text.replace(",", ""))
+    except InvalidOperation:
+        return Decimal(repr(number))
+
+
+def _display(total) -> object:
+    number = float(total)
+    if number.is_integer():
+        return int(number)
+    return round(number, 3)
+
+
+def recalculate_season_totals(stats: dict) -> None:
+    """
+    Rebuild season_totals from every week, and the running sums apply_week_fields keeps in meta
+    Numeric fields are summed, fields that were never numeric keep their last value
+    """
+    weeks_bucket = stats.get("weeks")
+    if not weeks_bucket:
+        stats.pop("season_totals", None)
+        if isinstance(stats.get("meta"), dict):
+            stats["meta"].pop("season_sums", None)
+        return
+
+    totals: dict[str, dict[str, float]] = {}
+    last_strings: dict[str, dict[str, str]] = {}
+
+    for week_data in weeks_bucket.values():
+        for category, fields in week_data.items():
+            category_totals = totals.setdefault(category, {})
+            category_strings = last_strings.setdefault(category, {})
+
+            for key, value in fields.items():
+                numeric_value = to_number(value)
+                if numeric_value is not None:
+                    category_totals[key] = category_totals.get(key, 0.0) + numeric_value
+                else:
+                    category_strings[key] = str(value)
+
+    season_totals: dict[str, dict[str, object]] = {}
+    for category, fields in totals.items():
+        category_total_values: dict[str, object] = {}
+        for key, total in fields.items():
+            category_total_values[key] = _display(total)
+
+        # Include non-numeric last values if they were never numeric
+        for key, value in last_strings.get(category, {}).items():
+            category_total_values.setdefault(key, value)
+
+        season_totals[category] = category_total_values
+
+    # Include categories that only had string values
+    for category, values in last_strings.items():
+        season_totals.setdefault(category, {})
+        for key, value in values.items():
+            season_totals[category].setdefault(key, value)
+
+    stats["season_totals"] = season_totals
+
+    # None rather than removed, saving a record deep merges it so a removed key would come back
+    meta = stats.setdefault("meta", {})
+    try:
+        meta["season_sums"] = _sum_weeks(weeks_bucket)
+    except _NotFinite:
+        meta["season_sums"] = None
+
+
+def _read_sum(category_sums: dict, key: str) -> tuple[Decimal, int]:
+    """
+    A field's running sum as (total, count)
+    Both are stored as strings, saving a record turns ints into strings anyway
+    """
+    total, count = category_sums.get(key, ("0", "0"))
+    return Decimal(total), int(count)
+
+
+def _sum_weeks(weeks_bucket: dict) -> dict:
+    """
+    category -> field -> [exact sum, how many weeks had a number], the running sums
+    """
+    sums: dict[str, dict[str, list]] = {}
+    for week_data in weeks_bucket.values():
+        for category, fields in week_data.items():
+            category_sums = sums.setdefault(category, {})
+            for key, value in fields.items():
+                number = to_decimal(value)
+                if number is not None:
+                    total, count = _read_sum(category_sums, key)
+                    category_sums[key] = [str(total + number), str(count + 1)]
+    return sums
+
+
+def _last_string(weeks_bucket: dict, category: str, key: str):
+    last = _MISSING
+    for week_data in weeks_bucket.values():
+        value = week_data.get(category, {}).get(key, _MISSING)
+        if value is not _MISSING and to_number(value) is None:
+            last = str(value)
+    return last
+
+
+def apply_week_fields(stats: dict, week_key: str, category: str, fields: dict) -> None:
+    """
+    Write fields into a week's category and move season_totals by the difference
+
+    Re-importing a week takes the old values back out of the running sums
+    and adds the new ones, so an import costs one step per field instead of
+    re-reading every week. Players imported before the sums existed are
+    recomputed once to seed them
+    """
+    weeks_bucket = stats.setdefault("weeks", {})
+    bucket = weeks_bucket.setdefault(week_key, {}).setdefault(category, {})
+    meta = stats.get("meta")
+    sums = meta.get("season_sums") if isinstance(meta, dict) else None
+
+    if sums is None or not isinstance(stats.get("season_totals"), dict):
+        bucket.update(fields)
+        recalculate_season_totals(stats)
+        return
+
+    category_sums = sums.setdefault(category, {})
+    try:
+        changed = {}
+        for key, value in fields.items():
+            old = bucket.get(key, _MISSING)
+            total, count = _read_sum(category_sums, key)
+
+            if old is not _MISSING:
+                number = to_decimal(old)
+                if number is not None:
+                    total -= number
+                    count -= 1
+
+            number = to_decimal(value)
+            if number is not None:
+                total += number
+                count += 1
+
+            changed[key] = (total, count)
+    except _NotFinite:
+        bucket.update(fields)
+        recalculate_season_totals(stats)
+        return
+
+    bucket.update(fields)
+    category_totals = stats["season_totals"].setdefault(category, {})
+    for key, (total, count) in changed.items():
+        # Fields with no numbers left stay in the sums at 0, a removed key would come back on the merge
+        category_sums[key] = [str(total), str(count)]
+        if count:
+            category_totals[key] = _display(total)
+            continue
+
+        last = _last_string(weeks_bucket, category, key)
+        if last is _MISSING:
+            category_totals.pop(key, None)
+        else:
+            category_totals[key] = last
+
+    if VERIFY_TOTALS:
+        verify_season_totals(stats)
+
+
+def verify_season_totals(stats: dict) -> bool:
+    """
+    Check the running totals against a full recompute, the recompute wins if they differ
+    """
+    expected = copy.deepcopy(stats)
+    recalculate_season_totals(expected)
+    # A saved record holds its totals as strings
+    if _as_text(expected.get("season_totals")) == _as_text(stats.get("season_totals")):
+        return True
+
+    logger.warning(
+        f"Season totals drifted from a full recompute: {stats.get('season_totals')} != {expected.get('season_totals')}"
+    )
+    stats["season_totals"] = expected["season_totals"]
+    if "season_sums" in expected.get("meta", {}):
+        stats.setdefault("meta", {})["season_sums"] = expected["meta"]["season_sums"]
+    return False
+
+
+def _as_text(totals):
+    if not isinstance(totals, dict):
+        return totals
+    return {category: {key: str(value) for key, value in fields.items()} for category, fields in totals.items()}
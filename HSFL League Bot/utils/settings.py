@@ -0,0 +1,193 @@
+import asyncio
+import copy
+from typing import Dict, Optional
+
+from utils.config import SETTINGS
+from utils.database import Database
+
+# Every SETTINGS table and how its value is stored:
+#   "ids"    - a list (or dict) of role or channel ids
+#   "limit"  - a number, "Limit ..." settings
+#   "toggle" - "On"/"Off", "Toggle ..." settings
+SETTING_TABLES = {
+    setting["table"]: "limit" if name.startswith("Limit") else "toggle" if name.startswith("Toggle") else "ids"
+    for name, setting in SETTINGS.items()
+}
+
+
+def matching_roles(role_ids: frozenset, member) -> frozenset:
+    """
+    Ids in role_ids that the member has
+    Intersects with member._roles, the member's sorted role ids, instead of
+    building member.roles (a Role lookup and sort per call)
+    """
+    matches = role_ids.intersection(member._roles)
+    # member.roles also holds @everyone, whose id is the guild id
+    if member.guild.id in role_ids:
+        matches = matches | {member.guild.id}
+    return matches
+
+
+def parse_ids(data) -> tuple:
+    """
+    Turn a stored list (or dict) of ids into a tuple of ints, skipping bad entries
+    """
+    if isinstance(data, dict):
+        data = data.values()
+    elif not isinstance(data, list):
+        return ()
+
+    ids = []
+    for value in data:
+        try:
+            ids.append(int(value))
+        except (ValueError, TypeError):
+            continue
+    return tuple(ids)
+
+
+class GuildSettings:
+    """
+    Every SETTINGS table for one guild, loaded together and parsed once
+
+    Snapshots are cached per guild and dropped when one of the guild's
+    setting tables is written (see Database.on_change), so most commands
+    read their settings without touching the database
+
+    settings = await GuildSettings.get(inter.guild.id)
+    if not settings.toggle("Signing"): ...
+    if settings.has_any("FranchiseRole", inter.author): ...
+    """
+
+    _cache: Dict[str, "GuildSettings"] = {}
+    # Bumped on every invalidation, a load that overlaps one isn't cached
+    _generation = 0
+    _stats = {"hits": 0, "loads": 0, "invalidations": 0}
+
+    def __init__(self, guild_id, data: dict):
+        self.guild_id = str(guild_id)
+        self._values = data
+        self._ids: Dict[str, tuple] = {}
+        self._id_sets: Dict[str, frozenset] = {}
+        self._limits: Dict[str, Optional[int]] = {}
+
+        for table, kind in SETTING_TABLES.items():
+            value = data.get(table)
+            if kind == "ids":
+                self._ids[table] = parse_ids(value)
+                self._id_sets[table] = frozenset(self._ids[table])
+            elif kind == "limit":
+                try:
+                    self._limits[table] = int(value) if value is not None else None
+                except (ValueError, TypeError):
+                    self._limits[table] = None
+
+    @staticmethod
+    async def get(guild_id) -> "GuildSettings":
+        """
+        Get the settings snapshot for a guild, loading it if it isn't cached
+        """
+        guild_id = str(guild_id)
+        settings = GuildSettings._cache.get(guild_id)
+        if settings is not None:
+            GuildSettings._stats["hits"] += 1
+            return settings
+
+        generation = GuildSettings._generation
+        tables = list(SETTING_TABLES)
+        values = await asyncio.gather(*(Database.get_data(table, guild_id) for table in tables))
+        settings = GuildSettings(guild_id, {table: value for table, value in zip(tables, values) if value is not None})
+        GuildSettings._stats["loads"] += 1
+
+        if generation == GuildSettings._generation:
+            GuildSettings._cache[guild_id] = settings
+        return settings
+
+    @staticmethod
+    def invalidate(guild_id=None):
+        """
+        Drop the cached snapshot of a guild, or of every guild
+        """
+        GuildSettings._generation += 1
+        GuildSettings._stats["invalidations"] += 1
+        if guild_id is None:
+            GuildSettings._cache.clear()
+        else:
+            GuildSettings._cache.pop(str(guild_id), None)
+
+    @staticmethod
+    def get_stats() -> dict:
+        """
+        Cache hits, snapshot loads and invalidations since startup
+        """
+        return {**GuildSettings._stats, "guilds": len(GuildSettings._cache)}
+
+    def value(self, table: str):
+        """
+        The stored value of a table, as Database.get_data would return it
+        """
+        return copy.deepcopy(self._values.get(table))
+
+    def ids(self, table: str) -> tuple:
+        """
+        Role or channel ids of a table, in the order they were added
+        """
+        return self._ids.get(table, ())
+
+    def id_set(self, table: str) -> frozenset:
+        """
+        Role or channel ids of a table, for membership checks
+        """
+        return self._id_sets.get(table, frozenset())
+
+    def member_roles(self, table: str, member) -> frozenset:
+        """
+        Ids of the member's roles that are in a table
+        """
+        return matching_roles(self.id_set(table), member)
+
+    def has_any(self, table: str, member) -> bool:
+        """
+        Checks if a member has any of the roles in a table
+        """
+        return bool(self.member_roles(table, member))
+
+    def limit(self, table: str) -> Optional[int]:
+        """
+        A "Limit" setting as an int, None if it isn't set
+        """
+        return self._limits.get(table)
+
+    def toggle(self, table: str) -> bool:
+        """
+        A "Toggle" setting, everything is on unless it's been turned "Off"
+        """
+        return self._values.get(table) != "Off"
+
+
+async def table_ids(table: str, guild_id) -> tuple:
+    """
+    Ids stored in a table for a guild, from the settings snapshot when it's a SETTINGS table
+    """
+    if table in SETTING_TABLES:
+        return (await GuildSettings.get(guild_id)).ids(table)
+    return parse_ids(await Database.get_data(table, guild_id))
+
+
+async def table_id_set(table: str, guild_id) -> frozenset:
+    """
+    Same as table_ids, as a frozenset for membership checks
+    """
+    if table in SETTING_TABLES:
+        return (await GuildSettings.get(guild_id)).id_set(table)
+    return frozenset(parse_ids(await Database.get_data(table, guild_id)))
+
+
+def _on_database_change(key, top_key):
+    if key is None or (key in SETTING_TABLES and top_key is None):
+        GuildSettings.invalidate()
+    elif key in SETTING_TABLES:
+        GuildSettings.invalidate(top_key)
+
+
+Database.on_change(_on_database_change)
@@ -0,0 +1,307 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+import aiohttp
+
+from utils.database import Database
+
+logger = logging.getLogger(__name__)
+
+SHEET_CACHE_DIR = Path("database/sheet_cache")
+SHEET_EXPORT_URL = "https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
+# Import markers for every sheet, in SHEET_CACHE_DIR
+IMPORTS_FILE = "imports.json"
+# Seconds before a sheet download is given up on
+SHEET_FETCH_TIMEOUT = 30
+
+
+class SheetFetch(NamedTuple):
+    """
+    A downloaded sheet
+    not_modified: Google answered 304 and the cached copy was used
+    """
+
+    sheet_id: str
+    gid: int
+    text: str
+    content_hash: str
+    not_modified: bool
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def import_marker(guild_id, week: Optional[int]) -> str:
+    return f"{guild_id}:{week if week is not None else 'season'}"
+
+
+class SheetCache:
+    """
+    Google Sheets CSV exports cached on disk, fetched with conditional requests
+
+    Every (sheet, tab) keeps its last CSV, content hash, ETag and
+    Last-Modified in database/sheet_cache. Re-fetching sends those back so
+    an unchanged sheet is a 304 with no body. imports.json remembers which
+    content hash was last imported per guild and week, so importing the
+    same sheet twice can stop before parsing anything. A guild's markers
+    are dropped when its stats change outside an import, or its Users data
+    is deleted
+
+    fetch = await SheetCache.fetch(sheet_id, gid)
+    if await SheetCache.already_imported(fetch, guild_id, week): ...
+    await SheetCache.mark_imported(fetch, guild_id, week)
+
+    Every fetch shares one aiohttp session, close() it when unloading
+    """
+
+    _session: Optional[aiohttp.ClientSession] = None
+    _locks: Dict[str, asyncio.Lock] = {}
+    _stats = {"downloads": 0, "not_modified": 0, "skipped_imports": 0}
+
+    # cache key -> {import marker: content hash}, read from disk on first use
+    _imports: Optional[Dict[str, Dict[str, str]]] = None
+    # Forgets made before the markers were read, applied once they are
+    _pending_forgets: set = set()
+    _save_lock: Optional[asyncio.Lock] = None
+    _save_tasks: set = set()
+
+    @staticmethod
+    def session() -> aiohttp.ClientSession:
+        if SheetCache._session is None or SheetCache._session.closed:
+            SheetCache._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=SHEET_FETCH_TIMEOUT))
+        return SheetCache._session
+
+    @staticmethod
+    async def close():
+        if SheetCache._session is not None and not SheetCache._session.closed:
+            await SheetCache._session.close()
+        SheetCache._session = None
+
+    @staticmethod
+    async def fetch(sheet_id: str, gid: Optional[int] = None) -> SheetFetch:
+        """
+        Download a tab's CSV export, or reuse the cached copy when Google says it hasn't changed
+        Raises ValueError when the sheet can't be read
+        """
+        gid = gid if gid is not None else 0
+        key = SheetCache._key(sheet_id, gid)
+        lock = SheetCache._locks.get(key)
+        if lock is None:
+            lock = SheetCache._locks[key] = asyncio.Lock()
+
+        async with lock:
+            loop = asyncio.get_event_loop()
+            entry = await loop.run_in_executor(None, SheetCache._read_entry, key)
+            cached = await loop.run_in_executor(None, SheetCache._read_body, key) if entry.get("hash") else None
+
+            headers = {}
+            if cached is not None:
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+
+            url = SHEET_EXPORT_URL.format(sheet_id=sheet_id, gid=gid)
+            async with SheetCache.session().get(url, headers=headers) as response:
+                if response.status == 304 and cached is not None:
+                    SheetCache._stats["not_modified"] += 1
+                    return SheetFetch(sheet_id, gid, cached, entry["hash"], True)
+                if response.status == 403:
+                    raise ValueError(
+                        "Google denied access to the sheet. Share it with 'Anyone with the link' (Viewer) or provide a CSV file."
+                    )
+                if response.status != 200:
+                    raise ValueError(f"Failed to fetch sheet: HTTP {response.status}")
+
+                text = await response.text()
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+
+            # If Google returns an HTML page, the sheet isn't publicly accessible.
+            if "<!DOCTYPE html" in text[:200].lower() or "<html" in text[:200].lower():
+                raise ValueError(
+                    "Received an HTML page instead of CSV data. Make sure the Google Sheet is shared with 'Anyone with the link' and try again."
+                )
+
+            SheetCache._stats["downloads"] += 1
+            fetch = SheetFetch(sheet_id, gid, text, content_hash(text), False)
+            entry.update({"etag": etag, "last_modified": last_modified, "hash": fetch.content_hash, "fetched": time.time()})
+            # The CSV goes first, an entry never points at a body that isn't there
+            await loop.run_in_executor(None, SheetCache._write, [
+                (SHEET_CACHE_DIR / f"{key}.csv", text),
+                (SHEET_CACHE_DIR / f"{key}.json", json.dumps(entry)),
+            ])
+            return fetch
+
+    @staticmethod
+    def remember(sheet_id: str, gid: Optional[int], text: str) -> SheetFetch:
+        """
+        A sheet read some other way (the service account), hashed so its imports are tracked too
+        """
+        return SheetFetch(sheet_id, gid if gid is not None else 0, text, content_hash(text), False)
+
+    @staticmethod
+    async def already_imported(fetch: SheetFetch, guild_id, week: Optional[int]) -> bool:
+        imports = await SheetCache._load_imports()
+        imported = imports.get(SheetCache._key(fetch.sheet_id, fetch.gid), {}).get(import_marker(guild_id, week)) == fetch.content_hash
+        if imported:
+            SheetCache._stats["skipped_imports"] += 1
+        return imported
+
+    @staticmethod
+    async def mark_imported(fetch: SheetFetch, guild_id, week: Optional[int]):
+        imports = await SheetCache._load_imports()
+        imports.setdefault(SheetCache._key(fetch.sheet_id, fetch.gid), {})[import_marker(guild_id, week)] = fetch.content_hash
+        await SheetCache._save_imports()
+
+    @staticmethod
+    def forget_imports(guild_id, week: Optional[int] = None):
+        """
+        Let a guild import its sheets again (its stats were cleared), every week or just one
+        guild_id None forgets every guild. The markers change in memory straight
+        away and are saved in the background
+        """
+        if SheetCache._imports is None:
+            if guild_id is None:
+                SheetCache._pending_forgets.clear()
+            SheetCache._pending_forgets.add((None if guild_id is None else str(guild_id), week))
+            return
+
+        if SheetCache._drop_markers(SheetCache._imports, guild_id, week):
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            task = asyncio.ensure_future(SheetCache._save_imports())
+            SheetCache._save_tasks.add(task)
+            task.add_done_callback(SheetCache._save_tasks.discard)
+
+    @staticmethod
+    def get_stats() -> dict:
+        return dict(SheetCache._stats)
+
+    @staticmethod
+    def _drop_markers(imports: dict, guild_id, week: Optional[int]) -> bool:
+        """
+        Remove a guild's markers (every guild's when guild_id is None), returns True if any were removed
+        """
+        prefix = f"{guild_id}:"
+        removed = False
+        for markers in imports.values():
+            for marker in list(markers):
+                if guild_id is None or (marker == import_marker(guild_id, week) if week is not None else marker.startswith(prefix)):
+                    del markers[marker]
+                    removed = True
+        return removed
+
+    @staticmethod
+    async def _load_imports() -> Dict[str, Dict[str, str]]:
+        if SheetCache._imports is None:
+            loop = asyncio.get_event_loop()
+            imports = await loop.run_in_executor(None, SheetCache._read_imports)
+            if SheetCache._imports is None:
+                for guild_id, week in SheetCache._pending_forgets:
+                    SheetCache._drop_markers(imports, guild_id, week)
+                SheetCache._pending_forgets.clear()
+                SheetCache._imports = imports
+        return SheetCache._imports
+
+    @staticmethod
+    async def _save_imports():
+        """
+        Write the markers as they are when the write starts, saves run one at a time
+        so the last one always holds the latest markers
+        """
+        if SheetCache._save_lock is None:
+            SheetCache._save_lock = asyncio.Lock()
+        async with SheetCache._save_lock:
+            content = json.dumps({key: markers for key, markers in SheetCache._imports.items() if markers})
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, SheetCache._write, [(SHEET_CACHE_DIR / IMPORTS_FILE, content)])
+
+    @staticmethod
+    def _key(sheet_id: str, gid: int) -> str:
+        # Sheet ids are [A-Za-z0-9-_], safe as a file name
+        return f"{sheet_id}_{gid}"
+
+    @staticmethod
+    def _read_json(path: Path) -> dict:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable sheet cache file {path.name}: {e}")
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    @staticmethod
+    def _read_entry(key: str) -> dict:
+        return SheetCache._read_json(SHEET_CACHE_DIR / f"{key}.json")
+
+    @staticmethod
+    def _read_imports() -> Dict[str, Dict[str, str]]:
+        imports = SheetCache._read_json(SHEET_CACHE_DIR / IMPORTS_FILE)
+        return {key: dict(markers) for key, markers in imports.items() if isinstance(markers, dict)}
+
+    @staticmethod
+    def _read_body(key: str) -> Optional[str]:
+        try:
+            with open(SHEET_CACHE_DIR / f"{key}.csv", encoding="utf-8", newline="") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _write(files: list):
+        """
+        Write (path, content) pairs in order through temp files, a crash never leaves half a file
+        Stops at the first file that fails (blocking, run in an executor)
+        """
+        SHEET_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for path, content in files:
+            temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            try:
+                with open(temp_path, "w", encoding="utf-8", newline="") as f:
+                    f.write(content)
+                os.replace(temp_path, path)
+            except OSError as e:
+                logger.warning(f"Failed to write sheet cache file {path.name}: {e}")
+                return
+            finally:
+                if temp_path.exists():
+                    temp_path.unlink()
+
+
+def _changes_stats(change) -> bool:
+    """
+    Check if a Users write to one guild can change its stats
+    Only stats edits and removed players or guilds count, contracts, demands and picks don't
+    """
+    if change is None:
+        return True
+    if change.op == "delete":
+        parts = change.path.split("/") if change.path else []
+        return len(parts) < 2 or parts[1] == "stats"
+    if not isinstance(change.value, dict):
+        return True
+    return any(not isinstance(player, dict) or "stats" in player for player in change.value.values())
+
+
+def _on_database_change(key, top_key, change):
+    # import_statsheet marks the sheet after its own write, which keeps that marker
+    if key is None or (key == "Users" and top_key is None):
+        SheetCache.forget_imports(None)
+    elif key == "Users" and _changes_stats(change):
+        SheetCache.forget_imports(top_key)
+
+
+Database.on_change(_on_database_change, with_change=True)
@@ -1,109 +1,94 @@
 import disnake
 import unidecode
 
+from utils.chunker import ChunkScheduler
 from utils.config import Links, Keywords, SETTINGS
 from utils.database import Database
 from utils.embed import Embed
-from utils.tools import premium_guild_check, get_mentions, guild_members
+from utils.fanout import Fanout
+from utils.role_planner import RolePlan
+from utils.settings import GuildSettings
+from utils.tools import premium_guild_check, get_mentions, guild_members, send_role_warnings
 
 async def team_check(guild_id: int, team: disnake.Role):
   """Checks if the role being used is in the teams database"""
-  team_data = await Database.get_data("TeamRole", guild_id)
-  if team_data is None or not isinstance(team_data, (list, dict)):
-    return False
-    
-  # Handle both list and dict formats
-  if isinstance(team_data, list):
-    team_ids = team_data
-  else:
-    team_ids = team_data.values() if isinstance(team_data, dict) else []
-    
-  for team_id in team_ids:
-    try:
-      if int(team.id) == int(team_id):
-        return True
-    except (ValueError, TypeError):
-      continue
-  return False  
+  settings = await GuildSettings.get(guild_id)
+  return team.id in settings.id_set("TeamRole")
 
 async def get_team_owner(guild: disnake.Guild, team: disnake.Role):
   """Find a user with a top FranchiseRole on the team, list[0]"""
-  coach_roles = await Database.get_data('FranchiseRole', guild.id)
-  if coach_roles is None or not isinstance(coach_roles, (list, dict)):
-    return None
-
-  # Handle both list and dict formats
-  if isinstance(coach_roles, list):
-    role_ids = coach_roles
-  else:
-    role_ids = coach_roles.values() if isinstance(coach_roles, dict) else []
-
+  settings = await GuildSettings.get(guild.id)
+  role_ids = settings.ids("FranchiseRole")
   if not role_ids:
     return None
 
   team_users = await guild_members(guild, team)
-  owner_role_id = role_ids[0]
-
-  try:
-    owner_role = guild.get_role(int(owner_role_id))
-  except (ValueError, TypeError):
-    return None
+  owner_role = guild.get_role(role_ids[0])
 
   if not owner_role:
      return None
 
   for user in team_users:
-    if owner_role in user.roles:
+    if user.get_role(owner_role.id):
        return user
   return None
 
-async def send_notfication_channel(guild: disnake.Guild, embed: disnake.Embed, content: str = None):
-  channel_ids = await Database.get_data("NotficationChannel", guild.id)
-  if channel_ids is None:
-    return
-  
-  # Handle both list and dict formats
-  if isinstance(channel_ids, list):
-    ids = channel_ids
-  elif isinstance(channel_ids, dict):
-    ids = channel_ids.values()
-  else:
-    return
-    
-  for channel_id in ids:
-    try:
-      channel = guild.get_channel_or_thread(int(channel_id))
-      if channel:
-        await channel.send(embed=embed, content=content, allowed_mentions=disnake.AllowedMentions.all())
-    except (ValueError, TypeError, AttributeError):
-      continue
-    except Exception as e:
-      print(f"Error sending to notification channel {channel_id}: {e}")
-      continue
+async def send_notfication_channel(guild: disnake.Guild, embed: disnake.Embed, content: str = None, background: bool = False):
+  """
+  Send an embed to the guild's notification channels, all at once
+  background: Queue it instead of waiting for the sends
+  """
+  settings = await GuildSettings.get(guild.id)
+  kwargs = dict(embed=embed, content=content, allowed_mentions=disnake.AllowedMentions.all())
 
+  if background:
+    return Fanout.send_later(guild, settings.ids("NotficationChannel"), "Notification", **kwargs)
+  return await Fanout.send(guild, settings.ids("NotficationChannel"), "Notification", **kwargs)
 
-async def send_to_channel_type(guild: disnake.Guild, channel_type: str, embed: disnake.Embed, content: str = None):
+
+async def send_to_channel_type(guild: disnake.Guild, channel_type: str, embed: disnake.Embed, content: str = None, background: bool = False):
   """
-  Send an embed to all configured channels for a specific command type.
+  Send an embed to all configured channels for a specific command type, all at once.
   
   channel_type: The command type (e.g., 'Transactions', 'Offers', 'Demands')
   embed: The embed to send
   content: Optional content message
+  background: Queue it instead of waiting for the sends
   """
   channel_ids = await get_channel_config(guild.id, channel_type)
-  if not channel_ids:
-    return
-  
-  for channel_id in channel_ids:
-    try:
-      channel = guild.get_channel_or_thread(int(channel_id))
-      if channel:
-        await channel.send(embed=embed, content=content, allowed_mentions=disnake.AllowedMentions.all())
-    except (ValueError, TypeError, AttributeError):
-      continue
-    except Exception as e:
-      print(f"Error sending to {channel_type} channel {channel_id}: {e}")
-      continue
+  kwargs = dict(embed=embed, content=content, allowed_mentions=disnake.AllowedMentions.all())
+
+  if background:
+    return Fanout.send_later(guild, channel_ids, channel_type, **kwargs)
+  return await Fanout.send(guild, channel_ids, channel_type, **kwargs)
+
+
+async def plan_signing(plan: RolePlan, member: disnake.Member, team: disnake.Role):
+  """Team role and AfterSignRole on, FreeAgentRole off"""
+  plan.add(member, team)
+  await plan.add_table(member, 'AfterSignRole')
+  await plan.remove_table(member, 'FreeAgentRole')
+
+
+async def plan_release(plan: RolePlan, member: disnake.Member, *roles: disnake.Role):
+  """roles (the team, a coach role) and AfterSignRole off, FreeAgentRole on"""
+  plan.remove(member, *roles)
+  await plan.remove_table(member, 'AfterSignRole')
+  await plan.add_table(member, 'FreeAgentRole')
+
+
+async def sign_roles(inter, member: disnake.Member, team: disnake.Role, guild: disnake.Guild = None):
+  """Give a member their signing roles in one role edit"""
+  plan = RolePlan(guild or inter.guild)
+  await plan_signing(plan, member, team)
+  await send_role_warnings(inter, await plan.apply())
+
+
+async def release_roles(inter, member: disnake.Member, *roles: disnake.Role, guild: disnake.Guild = None):
+  """Take a member's team roles and make them a free agent in one role edit"""
+  plan = RolePlan(guild or inter.guild)
+  await plan_release(plan, member, *roles)
+  await send_role_warnings(inter, await plan.apply())
 
 
 async def roster_cap(guild: disnake.Guild, team: disnake.Role, add_amount: int = 0):
@@ -111,15 +96,13 @@ async def roster_cap(guild: disnake.Guild, team: disnake.Role, add_amount: int =
   Checks if your under the league's roster cap
   add_amount: Checking if multiple users can fix the cap, like for trading 
   """
-  cap = await Database.get_data('RosterCap', guild.id)
-  if cap is None:
-      return True, f'[No roster cap set]({Links.premium_link})'
-
-  try:
-      cap_value = int(cap)
-  except (ValueError, TypeError):
+  settings = await GuildSettings.get(guild.id)
+  cap_value = settings.limit('RosterCap')
+  if cap_value is None:
       return True, f'[No roster cap set]({Links.premium_link})'
 
+  # The cap has to count the whole roster, give an unchunked guild a few seconds
+  await ChunkScheduler.wait(guild)
   current_cap = len(await guild_members(guild, team)) + add_amount
   #current_cap = sum(1 for member in await guild.chunk() if team in member.roles)
 
@@ -155,15 +138,11 @@ async def suspension_check(guild_id, member: disnake.Member):
 
 
 async def demand_limit_check(guild_id, member):
-  demand_limit = await Database.get_data('DemandLimit', guild_id)
-  if demand_limit is None:
+  settings = await GuildSettings.get(guild_id)
+  limit_value = settings.limit('DemandLimit')
+  if limit_value is None:
     return True, f'[No demand limit set]({Links.premium_link})' 
 
-  try:
-      limit_value = int(demand_limit)
-  except (ValueError, TypeError):
-      return True, f'[No demand limit set]({Links.premium_link})'
-
   # 10
   user_demands = await Database.get_data("Users", f'{guild_id}/{member.id}/demands')
   if user_demands is None:
@@ -320,8 +299,7 @@ async def remove_coach_team(guild_id: int, coach_id: int) -> tuple[bool, str]:
   if str(coach_id) not in coach_mapping:
     return False, "This coach is not assigned to a team"
   
-  del coach_mapping[str(coach_id)]
-  await Database.add_data('CoachTeamMapping', {guild_id: coach_mapping})
+  await Database.delete_data('CoachTeamMapping', f"{guild_id}/{coach_id}")
   return True, f"Coach removed from team assignment"
 
 
@@ -373,22 +351,11 @@ async def auto_detect_team(guild_id: int, member: disnake.Member) -> disnake.Rol
   if team:
     return team
   
-  team_data = await Database.get_data("TeamRole", guild_id)
-  if team_data is None or not isinstance(team_data, (list, dict)):
-    return None
-    
-  if isinstance(team_data, list):
-    team_ids = team_data
-  else:
-    team_ids = list(team_data.values()) if isinstance(team_data, dict) else []
-  
-  for team_id in team_ids:
-    try:
-      team_role = member.guild.get_role(int(team_id))
-      if team_role and team_role in member.roles:
-        return team_role
-    except (ValueError, TypeError):
-      continue
+  settings = await GuildSettings.get(guild_id)
+  for team_id in settings.ids("TeamRole"):
+    team_role = member.guild.get_role(team_id)
+    if team_role and team_role in member.roles:
+      return team_role
   
   return None
 
@@ -443,10 +410,11 @@ async def remove_channel_config(guild_id: int, channel_type: str, channel_id: in
   
   channel_config[channel_type].remove(channel_id_str)
   
+  # add_data merges, so an emptied type has to be deleted explicitly
   if not channel_config[channel_type]:
-    del channel_config[channel_type]
-  
-  await Database.add_data('ChannelConfig', {guild_id: channel_config})
+    await Database.delete_data('ChannelConfig', f"{guild_id}/{channel_type}")
+  else:
+    await Database.add_data('ChannelConfig', {guild_id: {channel_type: channel_config[channel_type]}})
   return True, f"Channel removed from {channel_type}"
 
 
@@ -0,0 +1,177 @@
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List
+
+# Limits of one store, the oldest messages go first once either is reached
+SNIPE_MAX_ENTRIES = 5000
+SNIPE_MAX_BYTES = 8 * 1024 * 1024
+# Seconds a message can be sniped for
+SNIPE_TTL = 6 * 60 * 60
+# Messages kept per channel, /snipe index picks one
+SNIPE_HISTORY = 5
+
+# Rough size of a record and its bookkeeping on top of its text
+RECORD_OVERHEAD = 200
+
+
+class DeletedMessage:
+    """
+    A deleted message, or a message someone removed a reaction from
+    """
+
+    __slots__ = ("author", "avatar_url", "content", "attachment", "file_name", "reaction", "created", "size")
+
+    def __init__(self, author: str, avatar_url: str, content: str, attachment: str = None, file_name: str = None, reaction: str = None):
+        self.author = author
+        self.avatar_url = avatar_url
+        self.content = content
+        self.attachment = attachment
+        self.file_name = file_name
+        self.reaction = reaction
+        self.created = time.monotonic()
+        self.size = RECORD_OVERHEAD + sum(
+            len(value) for value in (author, avatar_url, content, attachment, file_name, reaction) if value
+        )
+
+
+class EditedMessage:
+    """
+    A message before and after an edit
+    """
+
+    __slots__ = (
+        "author", "avatar_url",
+        "before", "before_attachment", "before_file_name",
+        "after", "after_attachment", "after_file_name",
+        "created", "size",
+    )
+
+    def __init__(
+        self,
+        author: str,
+        avatar_url: str,
+        before: str,
+        after: str,
+        before_attachment: str = None,
+        before_file_name: str = None,
+        after_attachment: str = None,
+        after_file_name: str = None,
+    ):
+        self.author = author
+        self.avatar_url = avatar_url
+        self.before = before
+        self.before_attachment = before_attachment
+        self.before_file_name = before_file_name
+        self.after = after
+        self.after_attachment = after_attachment
+        self.after_file_name = after_file_name
+        self.created = time.monotonic()
+        self.size = RECORD_OVERHEAD + sum(
+            len(value)
+            for value in (author, avatar_url, before, after, before_attachment, before_file_name, after_attachment, after_file_name)
+            if value
+        )
+
+
+class SnipeStore:
+    """
+    The last few snipeable messages of every channel, bounded in entries, bytes and age
+
+    Channels are kept in the order they were last written to. Once a limit
+    is hit the oldest messages of the least recently written channel are
+    dropped, and channels whose newest message has expired are dropped
+    whole, so memory stays flat no matter how many channels the bot sees
+
+    store.add(channel.id, DeletedMessage(...))
+    store.get(channel.id)     # newest
+    store.get(channel.id, 2)  # the one before it
+    """
+
+    def __init__(
+        self,
+        max_entries: int = SNIPE_MAX_ENTRIES,
+        max_bytes: int = SNIPE_MAX_BYTES,
+        ttl: float = SNIPE_TTL,
+        history: int = SNIPE_HISTORY,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.history = history
+        self._channels: "OrderedDict[int, deque]" = OrderedDict()
+        self._entries = 0
+        self._bytes = 0
+        self._stats = {"added": 0, "evicted": 0, "expired": 0}
+
+    def add(self, channel_id: int, record):
+        records = self._channels.get(channel_id)
+        if records is None:
+            records = self._channels[channel_id] = deque()
+        else:
+            self._channels.move_to_end(channel_id)
+
+        records.append(record)
+        self._entries += 1
+        self._bytes += record.size
+        self._stats["added"] += 1
+
+        if len(records) > self.history:
+            self._drop_oldest(channel_id, records, "evicted")
+
+        self._expire_stale(time.monotonic())
+        while self._channels and (self._entries > self.max_entries or self._bytes > self.max_bytes):
+            oldest_id = next(iter(self._channels))
+            self._drop_oldest(oldest_id, self._channels[oldest_id], "evicted")
+
+    def get(self, channel_id: int, index: int = 1):
+        """
+        The index-th newest message of a channel (1 is the newest), None if there isn't one
+        """
+        records = self._records(channel_id)
+        if index < 1 or index > len(records):
+            return None
+        return records[-index]
+
+    def count(self, channel_id: int) -> int:
+        return len(self._records(channel_id))
+
+    def get_stats(self) -> Dict[str, int]:
+        self._expire_stale(time.monotonic())
+        return {
+            **self._stats,
+            "channels": len(self._channels),
+            "entries": self._entries,
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _records(self, channel_id: int) -> List:
+        records = self._channels.get(channel_id)
+        if not records:
+            return []
+
+        cutoff = time.monotonic() - self.ttl
+        while records and records[0].created < cutoff:
+            self._drop_oldest(channel_id, records, "expired")
+        return list(records)
+
+    def _drop_oldest(self, channel_id: int, records: deque, reason: str):
+        record = records.popleft()
+        self._entries -= 1
+        self._bytes -= record.size
+        self._stats[reason] += 1
+        if not records:
+            del self._channels[channel_id]
+
+    def _expire_stale(self, now: float):
+        """
+        Drop channels whose newest message has expired, starting from the least recently written
+        """
+        cutoff = now - self.ttl
+        while self._channels:
+            channel_id, records = next(iter(self._channels.items()))
+            if records[-1].created >= cutoff:
+                return
+            while records:
+                self._drop_oldest(channel_id, records, "expired")
@@ -0,0 +1,469 @@
+import sqlite3
+import asyncio
+import copy
+import time
+import contextlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from utils import codec
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    tbl TEXT NOT NULL,
+    guild TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (tbl, guild, entity)
+) WITHOUT ROWID
+"""
+
+# Entity used for a top-level value that isn't a dict, or to mark an empty dict
+WHOLE_VALUE = ""
+EMPTY_DICT = "{}"
+
+
+class SQLiteBackend:
+    """
+    SQLite storage for the Database API
+    Every table is stored as rows of (table, guild, entity, value) where
+    guild is the top-level key (usually a guild id) and entity is the key
+    below it (usually a user or role id). Writing one user's data only
+    upserts that user's row
+
+    Selected with DATABASE_BACKEND=sqlite, the file location comes from
+    DATABASE_SQLITE_PATH (default database/league.db)
+    """
+
+    def __init__(self, path: Path):
+        from utils.database import Database
+
+        self.path = Path(path)
+        self._db = Database()
+        self._conn: Optional[sqlite3.Connection] = None
+        # One worker keeps every query on the same thread, in order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-db")
+        self._lock = asyncio.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open the connection on first use (runs on the executor thread)
+        """
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, func, *args):
+        """
+        Run a blocking function on the database thread
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def _transaction(self, func, *args):
+        """
+        Run func(conn, *args) inside one write transaction
+        """
+        def _call():
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(conn, *args)
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+
+        async with self._lock:
+            return await self._run(_call)
+
+    async def _read(self, func, *args):
+        """
+        Run func(conn, *args) for a read
+        """
+        async with self._lock:
+            return await self._run(lambda: func(self._connect(), *args))
+
+    def close(self):
+        """
+        Close the connection and stop the database thread
+        """
+        def _close():
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        self._executor.submit(_close).result()
+        self._executor.shutdown(wait=True)
+
+    # Row helpers, these run on the database thread
+
+    @staticmethod
+    def _assemble_guild(rows) -> object:
+        """
+        Build a guild's value from its (entity, value) rows
+        """
+        value = {}
+        for entity, raw in rows:
+            if entity == WHOLE_VALUE:
+                if raw == EMPTY_DICT:
+                    continue
+                return codec.loads(raw)
+            value[entity] = codec.loads(raw)
+        return value
+
+    def _load_guild(self, conn, table: str, guild: str):
+        rows = conn.execute(
+            "SELECT entity, value FROM entries WHERE tbl = ? AND guild = ?",
+            (table, guild),
+        ).fetchall()
+        if not rows:
+            return None
+        return self._assemble_guild(rows)
+
+    def _load_table(self, conn, table: str) -> dict:
+        data = {}
+        rows = conn.execute(
+            "SELECT guild, entity, value FROM entries WHERE tbl = ? ORDER BY guild",
+            (table,),
+        ).fetchall()
+        grouped = {}
+        for guild, entity, raw in rows:
+            grouped.setdefault(guild, []).append((entity, raw))
+        for guild, guild_rows in grouped.items():
+            data[guild] = self._assemble_guild(guild_rows)
+        return data
+
+    def _get_entity(self, conn, table: str, guild: str, entity: str):
+        row = conn.execute(
+            "SELECT value FROM entries WHERE tbl = ? AND guild = ? AND entity = ?",
+            (table, guild, entity),
+        ).fetchone()
+        return codec.loads(row[0]) if row else None
+
+    @staticmethod
+    def _put(conn, table: str, guild: str, entity: str, value):
+        conn.execute(
+            "INSERT INTO entries (tbl, guild, entity, value) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (tbl, guild, entity) DO UPDATE SET value = excluded.value",
+            (table, guild, entity, codec.dumps(value).decode("utf-8")),
+        )
+
+    def _mark_empty_if_needed(self, conn, table: str, guild: str):
+        """
+        Keep {guild: {}} around after its last entity is removed, like the JSON files do
+        """
+        exists = conn.execute(
+            "SELECT 1 FROM entries WHERE tbl = ? AND guild = ? LIMIT 1", (table, guild)
+        ).fetchone()
+        if not exists:
+            conn.execute(
+                "INSERT INTO entries (tbl, guild, entity, value) VALUES (?, ?, ?, ?)",
+                (table, guild, WHOLE_VALUE, EMPTY_DICT),
+            )
+
+    def _get_sync(self, conn, table: str, path: Optional[str]):
+        if path is None:
+            data = self._load_table(conn, table)
+            return data if data else None
+
+        guild, _, rest = path.partition('/')
+        if not rest:
+            return self._load_guild(conn, table, guild)
+
+        entity, _, rest = rest.partition('/')
+        value = self._get_entity(conn, table, guild, entity)
+        if value is None:
+            return None
+        return self._db._get_nested_value(value, rest)
+
+    def _add_sync(self, conn, table: str, value: dict):
+        for guild, guild_value in value.items():
+            if not isinstance(guild_value, dict):
+                conn.execute("DELETE FROM entries WHERE tbl = ? AND guild = ?", (table, guild))
+                self._put(conn, table, guild, WHOLE_VALUE, guild_value)
+                continue
+
+            whole = self._get_entity(conn, table, guild, WHOLE_VALUE)
+            if whole is not None:
+                conn.execute(
+                    "DELETE FROM entries WHERE tbl = ? AND guild = ? AND entity = ?",
+                    (table, guild, WHOLE_VALUE),
+                )
+
+            if not guild_value:
+                self._mark_empty_if_needed(conn, table, guild)
+                continue
+
+            for entity, entity_value in guild_value.items():
+                existing = self._get_entity(conn, table, guild, entity)
+                self._put(conn, table, guild, entity, self._db._apply_update(existing, entity_value))
+
+    def _delete_sync(self, conn, table: str, path: Optional[str]):
+        if path is None:
+            deleted = conn.execute("DELETE FROM entries WHERE tbl = ?", (table,)).rowcount
+            return {"deleted": True} if deleted else None
+
+        guild, _, rest = path.partition('/')
+        if not rest:
+            deleted = conn.execute(
+                "DELETE FROM entries WHERE tbl = ? AND guild = ?", (table, guild)
+            ).rowcount
+            return {"deleted": True} if deleted else None
+
+        entity, _, rest = rest.partition('/')
+        if not rest:
+            deleted = conn.execute(
+                "DELETE FROM entries WHERE tbl = ? AND guild = ? AND entity = ?",
+                (table, guild, entity),
+            ).rowcount
+            if deleted:
+                self._mark_empty_if_needed(conn, table, guild)
+            return {"deleted": True} if deleted else None
+
+        value = self._get_entity(conn, table, guild, entity)
+        if not isinstance(value, dict):
+            return None
+        self._db._delete_nested_value(value, rest)
+        self._put(conn, table, guild, entity, value)
+        return {"deleted": True}
+
+    def _add_and_load(self, conn, table: str, value: dict):
+        """
+        Merge a value in and return what Database.add_data returns on the JSON
+        backend: the merged guilds of a guild table, the whole table otherwise
+        """
+        self._add_sync(conn, table, value)
+        if self._db._is_sharded(table):
+            return {guild: self._load_guild(conn, table, guild) for guild in value}
+        return self._load_table(conn, table)
+
+    def _delete_and_load(self, conn, table: str, path: Optional[str]):
+        """
+        Delete and return what Database.delete_data returns on the JSON backend
+        Whole tables and guilds give {"deleted": True}, nested deletes the data
+        left in the guild (guild tables) or table, None when there was nothing there
+        """
+        sharded = self._db._is_sharded(table)
+        guild, _, rest = (path or "").partition('/')
+        if path is None or (sharded and not rest):
+            return self._delete_sync(conn, table, path)
+
+        if sharded:
+            if self._load_guild(conn, table, guild) is None:
+                return None
+            self._delete_sync(conn, table, path)
+            return {guild: self._load_guild(conn, table, guild)}
+
+        if not conn.execute("SELECT 1 FROM entries WHERE tbl = ? LIMIT 1", (table,)).fetchone():
+            return None
+        self._delete_sync(conn, table, path)
+        return self._load_table(conn, table)
+
+    def _prepare(self, key, value) -> dict:
+        """
+        Validate and normalise a value for add_data
+        """
+        if not self._db._validate_data(value):
+            raise ValueError(f"Invalid data structure for key {key} - data is not JSON serializable")
+        value = self._db._stringify_ints(value)
+        if not isinstance(value, dict):
+            raise ValueError(f"Invalid data structure for key {key} - the SQLite backend needs a {{top_level_key: data}} dict")
+        return value
+
+    def _path(self, path) -> Optional[str]:
+        return None if path is None else self._db._normalize_path(path)
+
+    # Database API
+
+    async def get_data(self, key, path=None):
+        return await self._read(self._get_sync, str(key), self._path(path))
+
+    async def add_data(self, key, value):
+        value = self._prepare(key, value)
+        return await self._transaction(self._add_and_load, str(key), value)
+
+    async def delete_data(self, key, path=None):
+        return await self._transaction(self._delete_and_load, str(key), self._path(path))
+
+    async def clear_all(self):
+        await self._transaction(lambda conn: conn.execute("DELETE FROM entries"))
+
+    async def get_db_keys(self) -> list:
+        rows = await self._read(lambda conn: conn.execute("SELECT DISTINCT tbl FROM entries ORDER BY tbl").fetchall())
+        return [row[0] for row in rows]
+
+    async def get_db_prefix(self, prefix=None) -> dict:
+        prefix_str = str(prefix) if prefix else ""
+
+        def _collect(conn):
+            tables = [row[0] for row in conn.execute("SELECT DISTINCT tbl FROM entries ORDER BY tbl")]
+            return {table: self._load_table(conn, table) for table in tables if table.startswith(prefix_str)}
+
+        return await self._read(_collect)
+
+    async def get_db_summary(self) -> dict:
+        def _collect(conn):
+            summary = {}
+            rows = conn.execute(
+                "SELECT tbl, guild, SUM(LENGTH(value)) FROM entries GROUP BY tbl, guild ORDER BY tbl, guild"
+            ).fetchall()
+            for table, guild, size in rows:
+                info = summary.setdefault(table, {"files": 1, "size": 0, "entries": 0, "preview": [], "modified": None})
+                info["size"] += size
+                info["entries"] += 1
+                if len(info["preview"]) < 5:
+                    info["preview"].append(guild)
+            return summary
+
+        return await self._read(_collect)
+
+    async def verify_integrity(self, deep: bool = False) -> dict:
+        report = {
+            "checked": 1,
+            "skipped": 0,
+            "corrupted": 0,
+            "recovered": 0,
+            "errors": [],
+            "timings": {},
+            "duration": 0.0
+        }
+        pragma = "PRAGMA integrity_check" if deep else "PRAGMA quick_check"
+        start = time.perf_counter()
+        result = await self._read(lambda conn: conn.execute(pragma).fetchone()[0])
+        report["duration"] = round((time.perf_counter() - start) * 1000, 2)
+        report["timings"][self.path.name] = report["duration"]
+        if result != "ok":
+            report["corrupted"] = 1
+            report["errors"].append(f"SQLite {pragma} failed for {self.path}: {result}")
+        return report
+
+    @contextlib.asynccontextmanager
+    async def batch(self):
+        """
+        Stage the writes made through the batch and apply them in one transaction on exit
+        The lock is only held for that transaction, other calls (including
+        ones made inside the block) run as usual. Nothing is written if the block raises
+        """
+        batch = SQLiteBatch(self)
+        yield batch
+        if batch._ops:
+            await self._transaction(batch._replay)
+
+    async def migrate_from_json(self) -> int:
+        """
+        Copy every table from the JSON files into SQLite
+        Only runs when the SQLite database is empty, returns the number of tables copied
+        """
+        existing = await self._read(lambda conn: conn.execute("SELECT 1 FROM entries LIMIT 1").fetchone())
+        if existing:
+            return 0
+
+        tables = {}
+        for key, files in self._db._table_sources().items():
+            data = {}
+            for file_path in files:
+                data.update(await self._db._load_file(file_path))
+            if data:
+                tables[key] = data
+
+        def _copy(conn):
+            for key, data in tables.items():
+                self._add_sync(conn, key, self._db._stringify_ints(data))
+
+        await self._transaction(_copy)
+        logger.info(f"Copied {len(tables)} tables from JSON files into {self.path}")
+        return len(tables)
+
+
+class SQLiteBatch:
+    """
+    Batch handle for the SQLite backend, like DatabaseBatch for the JSON files
+    Writes are staged on a working copy of each touched guild, so reads
+    through the batch see them, and replayed in one transaction on exit.
+    Each call is staged whole or not at all
+    """
+
+    def __init__(self, backend: SQLiteBackend):
+        self._backend = backend
+        self._db = backend._db
+        # (function, table, argument) of every write, replayed on commit
+        self._ops = []
+        # (table, guild) -> staged value, None once deleted
+        self._guilds = {}
+        self._cleared = set()
+        # (key, changes) of every write, for Database.on_change after commit
+        self.changes = []
+
+    def _replay(self, conn):
+        for func, table, arg in self._ops:
+            func(conn, table, arg)
+
+    async def _working_copy(self, table: str, guild: str):
+        if (table, guild) not in self._guilds:
+            backend = self._backend
+            value = None if table in self._cleared else await backend._read(backend._load_guild, table, guild)
+            self._guilds[(table, guild)] = value
+        return self._guilds[(table, guild)]
+
+    async def get_data(self, key, path=None):
+        backend = self._backend
+        table, path = str(key), backend._path(path)
+
+        if path is None:
+            data = {} if table in self._cleared else await backend._read(backend._load_table, table)
+            for (staged_table, guild), value in self._guilds.items():
+                if staged_table != table:
+                    continue
+                if value is None:
+                    data.pop(guild, None)
+                else:
+                    data[guild] = value
+            return copy.deepcopy(data) if data else None
+
+        guild, _, rest = path.partition('/')
+        value = await self._working_copy(table, guild)
+        if rest:
+            value = self._db._get_nested_value(value, rest) if isinstance(value, dict) else None
+        return copy.deepcopy(value)
+
+    async def add_data(self, key, value):
+        backend = self._backend
+        table, value = str(key), backend._prepare(key, value)
+
+        staged = {}
+        for guild, guild_value in value.items():
+            existing = copy.deepcopy(await self._working_copy(table, guild))
+            staged[(table, guild)] = self._db._apply_update(existing, copy.deepcopy(guild_value))
+        self._guilds.update(staged)
+        self._ops.append((backend._add_sync, table, value))
+        self.changes.append((key, self._db._changes(value)))
+
+    async def delete_data(self, key, path=None):
+        backend = self._backend
+        table, path = str(key), backend._path(path)
+
+        if path is None:
+            self._cleared.add(table)
+            for staged in [staged for staged in self._guilds if staged[0] == table]:
+                self._guilds[staged] = None
+        else:
+            guild, _, rest = path.partition('/')
+            value = None
+            if rest:
+                value = copy.deepcopy(await self._working_copy(table, guild))
+                if isinstance(value, dict):
+                    self._db._delete_nested_value(value, rest)
+            self._guilds[(table, guild)] = value
+
+        self._ops.append((backend._delete_sync, table, path))
+        self.changes.append((key, self._db._changes(path=path)))
@@ -0,0 +1,309 @@
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+from utils.database import Database
+from utils.season_totals import to_number
+
+_WEEK_KEY = re.compile(r"^week_(\d+)$")
+# Keys of a player's stats that aren't categories
+_STATS_META = frozenset({"weeks", "season_totals", "meta"})
+
+
+def stat_label(category: str, stat: str) -> str:
+    return f"{category} / {stat}"
+
+
+class GuildStats:
+    """
+    Every imported stat of one guild, laid out by column
+
+    Each (category, stat) is a players x weeks array (NaN where a player
+    has no number that week) plus a per-player value for stats imported
+    without a week. Leaderboards, weekly totals and team totals are then
+    whole-array operations instead of walking every player's nested dicts.
+    Without numpy the same queries run over plain dicts
+
+    stats = GuildStats(await Database.get_data("Users", guild_id) or {})
+    stats.leaderboard("PASSING", "Yds", limit=10)   # [(player, value), ...]
+    stats.team_totals("PASSING", "Yds", roster.teams)
+    """
+
+    def __init__(self, users: dict):
+        self.players: List[str] = []
+        self.player_index: Dict[str, int] = {}
+
+        week_numbers = set()
+        # (category, stat) -> {row: {week: value}} and {row: value}, gathered before the arrays are sized
+        weekly: Dict[Tuple[str, str], Dict[int, Dict[int, float]]] = {}
+        unweeked: Dict[Tuple[str, str], Dict[int, float]] = {}
+
+        for player, record in users.items():
+            stats = record.get("stats") if isinstance(record, dict) else None
+            if not isinstance(stats, dict):
+                continue
+
+            row = len(self.players)
+            found = False
+
+            for week_key, categories in (stats.get("weeks") or {}).items():
+                match = _WEEK_KEY.match(week_key)
+                if match is None or not isinstance(categories, dict):
+                    continue
+                week = int(match.group(1))
+                for category, fields in categories.items():
+                    if not isinstance(fields, dict):
+                        continue
+                    for stat, value in fields.items():
+                        number = to_number(value)
+                        if number is None:
+                            continue
+                        weekly.setdefault((category, stat), {}).setdefault(row, {})[week] = number
+                        week_numbers.add(week)
+                        found = True
+
+            for category, fields in stats.items():
+                if category in _STATS_META or not isinstance(fields, dict):
+                    continue
+                for stat, value in fields.items():
+                    number = to_number(value)
+                    if number is not None:
+                        unweeked.setdefault((category, stat), {})[row] = number
+                        found = True
+
+            if found:
+                self.players.append(str(player))
+                self.player_index[str(player)] = row
+
+        self.weeks: Tuple[int, ...] = tuple(sorted(week_numbers))
+        self.week_index = {week: index for index, week in enumerate(self.weeks)}
+        self.labels: Dict[str, Tuple[str, str]] = {
+            stat_label(*key): key for key in sorted(set(weekly) | set(unweeked), key=lambda key: (key[0], key[1].lower()))
+        }
+        # Discord caps autocomplete choices at 100 characters
+        self._search_keys = tuple((label.casefold(), label) for label in self.labels if len(label) <= 100)
+
+        if np is not None:
+            shape = (len(self.players), len(self.weeks))
+            self._weekly = {}
+            for key, rows in weekly.items():
+                column = np.full(shape, np.nan)
+                for row, weeks in rows.items():
+                    for week, number in weeks.items():
+                        column[row, self.week_index[week]] = number
+                self._weekly[key] = column
+            self._unweeked = {}
+            for key, rows in unweeked.items():
+                column = np.full(len(self.players), np.nan)
+                column[list(rows)] = list(rows.values())
+                self._unweeked[key] = column
+        else:
+            self._weekly = weekly
+            self._unweeked = unweeked
+
+    def __len__(self):
+        return len(self.players)
+
+    def search(self, query: str, limit: int = 25) -> List[str]:
+        """
+        Stat labels containing query, for autocomplete
+        """
+        query = query.strip().casefold()
+        matches = []
+        for folded, label in self._search_keys:
+            if query in folded:
+                matches.append(label)
+                if len(matches) == limit:
+                    break
+        return matches
+
+    def values(self, category: str, stat: str, week: Optional[int] = None):
+        """
+        One value per player: the season total (weekly numbers summed, or
+        the number imported without a week) or a single week's number
+        Missing values are NaN with numpy, left out of the dict without it
+        """
+        key = (category, stat)
+        if np is not None:
+            weekly = self._weekly.get(key)
+            unweeked = self._unweeked.get(key)
+            if week is not None:
+                if weekly is None or week not in self.week_index:
+                    return np.full(len(self.players), np.nan)
+                return weekly[:, self.week_index[week]]
+
+            total = np.full(len(self.players), np.nan)
+            if unweeked is not None:
+                total = unweeked.copy()
+            if weekly is not None:
+                has_weeks = ~np.isnan(weekly).all(axis=1)
+                total[has_weeks] = np.nansum(weekly[has_weeks], axis=1)
+            return total
+
+        weekly = self._weekly.get(key, {})
+        if week is not None:
+            return {row: weeks[week] for row, weeks in weekly.items() if week in weeks}
+        total = dict(self._unweeked.get(key, {}))
+        for row, weeks in weekly.items():
+            total[row] = sum(weeks[week] for week in sorted(weeks))
+        return total
+
+    def leaderboard(
+        self,
+        category: str,
+        stat: str,
+        week: Optional[int] = None,
+        limit: int = 10,
+        ascending: bool = False,
+        players: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        The top players by a stat, highest first (lowest with ascending)
+        players limits it to those ids (a team), ties go to whoever was imported first
+        """
+        values = self.values(category, stat, week)
+        rows = None
+        if players is not None:
+            rows = [self.player_index[player] for player in players if player in self.player_index]
+
+        if np is not None:
+            candidates = np.flatnonzero(~np.isnan(values))
+            if rows is not None:
+                candidates = np.intersect1d(candidates, np.asarray(rows, dtype=np.intp))
+            picked = values[candidates]
+            order = np.lexsort((candidates, picked if ascending else -picked))[:limit]
+            return [(self.players[row], float(values[row])) for row in candidates[order]]
+
+        if rows is not None:
+            rows = set(rows)
+            values = {row: value for row, value in values.items() if row in rows}
+        sign = 1 if ascending else -1
+        ranked = sorted(values.items(), key=lambda item: (sign * item[1], item[0]))[:limit]
+        return [(self.players[row], value) for row, value in ranked]
+
+    def week_totals(self, category: str, stat: str) -> Dict[int, float]:
+        """
+        League-wide total of a stat for every week someone has a number in
+        """
+        key = (category, stat)
+        if np is not None:
+            weekly = self._weekly.get(key)
+            if weekly is None:
+                return {}
+            present = ~np.isnan(weekly).all(axis=0)
+            sums = np.nansum(weekly, axis=0)
+            return {week: float(sums[index]) for week, index in self.week_index.items() if present[index]}
+
+        totals: Dict[int, float] = {}
+        for weeks in self._weekly.get(key, {}).values():
+            for week, number in weeks.items():
+                totals[week] = totals.get(week, 0.0) + number
+        return dict(sorted(totals.items()))
+
+    def team_totals(
+        self,
+        category: str,
+        stat: str,
+        member_teams: Dict[int, FrozenSet[int]],
+        week: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Every team's summed stat, highest first
+        member_teams is member id -> team role ids (RosterIndex's GuildRoster.teams),
+        a member on two teams counts for both
+        """
+        team_ids: List[int] = []
+        team_slots: Dict[int, int] = {}
+        pair_rows: List[int] = []
+        pair_teams: List[int] = []
+        for member_id, teams in member_teams.items():
+            row = self.player_index.get(str(member_id))
+            if row is None:
+                continue
+            for team_id in teams:
+                slot = team_slots.get(team_id)
+                if slot is None:
+                    slot = team_slots[team_id] = len(team_ids)
+                    team_ids.append(team_id)
+                pair_rows.append(row)
+                pair_teams.append(slot)
+
+        values = self.values(category, stat, week)
+        if np is not None:
+            if not pair_rows:
+                return []
+            picked = values[pair_rows]
+            present = ~np.isnan(picked)
+            teams = np.asarray(pair_teams)[present]
+            sums = np.bincount(teams, weights=picked[present], minlength=len(team_ids))
+            counted = np.bincount(teams, minlength=len(team_ids)) > 0
+            totals = [(team_ids[slot], float(sums[slot])) for slot in range(len(team_ids)) if counted[slot]]
+        else:
+            sums: Dict[int, float] = {}
+            for row, slot in zip(pair_rows, pair_teams):
+                if row in values:
+                    sums[slot] = sums.get(slot, 0.0) + values[row]
+            totals = [(team_ids[slot], total) for slot, total in sorted(sums.items())]
+
+        return sorted(totals, key=lambda item: -item[1])
+
+
+class StatsEngine:
+    """
+    GuildStats per guild, built on first use and dropped when the guild's Users data changes
+
+    stats = await StatsEngine.get(inter.guild.id)
+    """
+
+    _guilds: Dict[str, GuildStats] = {}
+    # Bumped on every invalidation, a build that overlaps one isn't cached
+    _generation = 0
+    _stats = {"hits": 0, "builds": 0, "invalidations": 0}
+
+    @staticmethod
+    async def get(guild_id) -> GuildStats:
+        guild_id = str(guild_id)
+        stats = StatsEngine._guilds.get(guild_id)
+        if stats is not None:
+            StatsEngine._stats["hits"] += 1
+            return stats
+
+        generation = StatsEngine._generation
+        users = await Database.get_data("Users", guild_id)
+        stats = GuildStats(users if isinstance(users, dict) else {})
+        StatsEngine._stats["builds"] += 1
+
+        if generation == StatsEngine._generation:
+            StatsEngine._guilds[guild_id] = stats
+        return stats
+
+    @staticmethod
+    def invalidate(guild_id=None):
+        StatsEngine._generation += 1
+        StatsEngine._stats["invalidations"] += 1
+        if guild_id is None:
+            StatsEngine._guilds.clear()
+        else:
+            StatsEngine._guilds.pop(str(guild_id), None)
+
+    @staticmethod
+    def get_stats() -> dict:
+        return {
+            **StatsEngine._stats,
+            "guilds": len(StatsEngine._guilds),
+            "backend": "numpy" if np is not None else "python",
+        }
+
+
+def _on_database_change(key, top_key):
+    if key is None:
+        StatsEngine.invalidate()
+    elif key == "Users":
+        StatsEngine.invalidate(top_key)
+
+
+Database.on_change(_on_database_change)
@@ -0,0 +1,205 @@
+import csv
+import io
+from typing import Iterator, NamedTuple, Optional
+
+# Header cells that mark a header row, and the columns that aren't stats
+IDENTIFIER_FIELDS = frozenset({
+    "user_id",
+    "discord_id",
+    "discord id",
+    "id",
+    "username",
+    "user",
+    "name",
+    "player",
+})
+
+# Identifier cells that are labels, not players
+IGNORED_IDENTIFIERS = frozenset({
+    "username",
+    "name",
+    "player",
+    "stream link",
+    "streamer + media",
+    "stat taker",
+    "coach",
+    "team",
+    "teams",
+    "position",
+    "pos",
+    "total",
+})
+
+# Identifier columns in the order they're tried
+IDENTIFIER_CANDIDATES = ("user_id", "discord_id", "discord id", "id", "username", "user", "name", "player")
+
+NON_STAT_FIELDS = IDENTIFIER_FIELDS | {"contract", "demands"}
+
+
+class PlayerRow(NamedTuple):
+    """
+    One player's stats from one row of a sheet
+    row: the data row number (the first data row is 2, like the old parser)
+    contract/demands: None when the sheet has no such column for the player
+    """
+
+    row: int
+    category: str
+    identifier: str
+    contract: Optional[str]
+    demands: Optional[str]
+    stats: dict
+
+
+def _split_key_suffix(key: str) -> tuple:
+    if not key:
+        return "", ""
+    parts = key.rsplit("_", 1)
+    if len(parts) == 2 and parts[1].isdigit():
+        return parts[0], f"_{parts[1]}"
+    return key, ""
+
+
+class _PlayerColumns:
+    """
+    The columns of one player section of a header row ("Name", "Yds" / "Name_2", "Yds_2"...)
+    Every column is a tuple of cell indexes, the last one the row has wins
+    """
+
+    __slots__ = ("columns", "identifier", "contract", "demands", "stats")
+
+    def __init__(self, columns: dict):
+        self.columns = tuple(columns.values())
+        self.contract = columns.get("contract")
+        self.demands = columns.get("demands")
+
+        # Header names are matched case-insensitively, a later column with the same name replaces an earlier one
+        normalized = {}
+        for base, indexes in columns.items():
+            key = (base or "").strip().lower()
+            if key:
+                normalized[key] = indexes
+
+        # The first candidate with a column decides, even if that column is empty
+        self.identifier = None
+        for candidate in IDENTIFIER_CANDIDATES:
+            for key, indexes in normalized.items():
+                if key == candidate or key.startswith(f"{candidate}_"):
+                    self.identifier = indexes
+                    break
+            if self.identifier is not None:
+                break
+
+        self.stats = tuple(
+            (base, indexes)
+            for base, indexes in columns.items()
+            if (base or "").strip().lower() not in NON_STAT_FIELDS
+        )
+
+
+def _cell(cells: list, indexes: tuple) -> str:
+    for index in indexes:
+        if index < len(cells):
+            return cells[index]
+    return ""
+
+
+class SheetSchema:
+    """
+    A header row compiled once: which cells hold each player section's identifier,
+    contract, demands and stats
+    """
+
+    __slots__ = ("players",)
+
+    def __init__(self, header_cells: list):
+        # Blank and repeated headers get the same names the old parser gave them
+        seen = {}
+        headers = []
+        for index, header in enumerate(header_cells):
+            header = header or f"Column_{index + 1}"
+            header = header.strip() or f"Column_{index + 1}"
+            base = header.lower()
+            count = seen.get(base, 0)
+            if count:
+                headers.append(f"{header}_{count + 1}")
+            else:
+                headers.append(header)
+            seen[base] = count + 1
+
+        # Header name -> cell indexes, latest first (a repeated name keeps the last cell)
+        indexes_by_header = {}
+        for index, header in enumerate(headers):
+            indexes_by_header.setdefault(header, []).insert(0, index)
+
+        sections = {}
+        for header, indexes in indexes_by_header.items():
+            if header.startswith("__"):
+                continue
+            base, suffix = _split_key_suffix(header)
+            sections.setdefault(suffix, {})[base] = tuple(indexes)
+
+        self.players = tuple(_PlayerColumns(columns) for columns in sections.values())
+
+    def read(self, cells: list, row: int, category: str) -> Iterator[PlayerRow]:
+        for player in self.players:
+            if player.identifier is None:
+                continue
+
+            # Skip sections with nothing filled in
+            if not any(_cell(cells, indexes).strip() for indexes in player.columns):
+                continue
+
+            identifier = _cell(cells, player.identifier).strip()
+            if not identifier:
+                continue
+            identifier_lower = identifier.lower()
+            if identifier_lower in IGNORED_IDENTIFIERS or identifier_lower.startswith("team "):
+                continue
+
+            contract = _cell(cells, player.contract) if player.contract is not None else None
+            demands = _cell(cells, player.demands) if player.demands is not None else None
+
+            stats = {}
+            for base, indexes in player.stats:
+                value = _cell(cells, indexes)
+                if value != "":
+                    stats[base] = value
+
+            if not stats and contract is None and demands is None:
+                continue
+
+            yield PlayerRow(row, category, identifier, contract, demands, stats)
+
+
+def iter_player_rows(csv_text: str) -> Iterator[PlayerRow]:
+    """
+    Stream the players out of a stat sheet
+
+    Single uppercase cells (PASSING, RUSHING...) start a category, rows with
+    an identifier header (Name, user_id...) start a new schema, every other
+    row is read with the current schema
+    """
+    schema = None
+    category = "General"
+    row = 1
+
+    for cells in csv.reader(io.StringIO(csv_text)):
+        stripped = [(cell or "").strip() for cell in cells]
+        filled = [cell for cell in stripped if cell]
+        if not filled:
+            continue
+
+        if len(filled) == 1 and stripped[0].isupper():
+            category = stripped[0]
+            continue
+
+        if any(cell.lower() in IDENTIFIER_FIELDS for cell in filled):
+            schema = SheetSchema(stripped)
+            continue
+
+        if schema is None:
+            continue
+
+        row += 1
+        yield from schema.read(cells, row, category)
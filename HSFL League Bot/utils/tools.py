@@ -13,15 +13,22 @@ from colour import Color
 from utils.config import Ids, SETTINGS
 from utils.database import Database
 from utils.embed import Embed
+from utils.chunker import URGENT, ChunkScheduler
+from utils.role_planner import RolePlan, RolePlanResult
+from utils.roster import RosterIndex
+from utils.settings import matching_roles, table_id_set, table_ids
 
 async def guild_members(guild: disnake.Guild, role: disnake.Role = None):
-    # Check if the guild is chunked
+    # Never chunk inside a command, queue it and use the members cached so far
     if not guild.chunked:
-        # If not chunked, chunk the guild first
-        await guild.chunk()
+        ChunkScheduler.request(guild, URGENT)
 
     # Return members with or without a specific role
     if role:
+        # Team rosters come from the index instead of scanning every member
+        members = await RosterIndex.team_members(guild, role)
+        if members is not None:
+            return members
         return role.members
     return guild.members
 
@@ -240,81 +247,41 @@ async def has_role(table, guild_id, member, role_id=None):
     await has_role("FranchiseRole", ..., ...)
     checks if the user has a role that is in the FranchiseRole table
     """
-    data = await Database.get_data(table, guild_id)
-    if not data:
+    matches = matching_roles(await table_id_set(table, guild_id), member)
+    if not matches:
       return False
-      
-    for row in data:
-      for role in member.roles:
-        if int(role.id) == int(row):
-          if role_id == 'id':
-            return int(role.id)
-          else:  
-            return True
-            
-    return False
+
+    if role_id == 'id':
+      # The first matching role in the order the table lists them
+      for row in await table_ids(table, guild_id):
+        if row in matches:
+          return row
+    return True
 
 
 async def add_roles(inter, table: str, member: disnake.Member, guild: disnake.Guild = None):
     guild = guild if guild else inter.guild
-  
-    roles_data = await Database.get_data(table, guild.id)
-    if roles_data is None:
-        return
-
-    # Handle both list and dict formats
-    if isinstance(roles_data, list):
-        role_ids = roles_data
-    elif isinstance(roles_data, dict):
-        role_ids = roles_data.values()
-    else:
-        return
 
-    for role_id in role_ids:
-        try:
-            role = guild.get_role(int(role_id))
-            if role:
-                await member.add_roles(role)
-        except disnake.NotFound:
-            embed = Embed().quick_embed("Roles Warning", f"Role with ID {role_id} not found").warn_embed()
-            await inter.send(embed=embed)
-        except disnake.Forbidden:
-            embed = Embed().quick_embed("Roles Warning", f"Permission denied to add role with ID {role_id} to {member.display_name}").warn_embed()
-            await inter.send(embed=embed)
-        except Exception as e:
-            embed = Embed().quick_embed("Roles Warning", f"An error occurred while adding roles:\n\n{e}").warn_embed()
-            await inter.send(embed=embed)
+    plan = RolePlan(guild)
+    await plan.add_table(member, table)
+    await send_role_warnings(inter, await plan.apply())
 
 
 async def remove_roles(inter, table: str, member: disnake.Member, guild: disnake.Guild = None):
     guild = guild if guild else inter.guild
-  
-    roles_data = await Database.get_data(table, guild.id)
-    if roles_data is None:
-        return
 
-    # Handle both list and dict formats
-    if isinstance(roles_data, list):
-        role_ids = roles_data
-    elif isinstance(roles_data, dict):
-        role_ids = roles_data.values()
-    else:
-        return
+    plan = RolePlan(guild)
+    await plan.remove_table(member, table)
+    await send_role_warnings(inter, await plan.apply())
 
-    for role_id in role_ids:
-        try:
-            role = guild.get_role(int(role_id))
-            if role:
-                await member.remove_roles(role)
-        except disnake.NotFound:
-            embed = Embed().quick_embed("Roles Warning", f"Role with ID {role_id} not found").warn_embed()
-            await inter.send(embed=embed)
-        except disnake.Forbidden:
-            embed = Embed().quick_embed("Roles Warning", f"Permission denied to remove role with ID {role_id} to {member.display_name}").warn_embed()
-            await inter.send(embed=embed)
-        except Exception as e:
-            embed = Embed().quick_embed("Roles Warning", f"An error occurred while removing roles:\n\n{e}").warn_embed()
-            await inter.send(embed=embed)
+
+async def send_role_warnings(inter, result: RolePlanResult):
+    """Tell the command user about members whose roles couldn't be changed"""
+    if not result.failed:
+        return
+    failures = "\n".join(f"{member.mention}: {reason}" for member, reason in result.failed.items())
+    embed = Embed().quick_embed("Roles Warning", f"Couldn't change the roles of:\n{failures}").warn_embed()
+    await inter.send(embed=embed)
 
 
 async def get_mentions(items: list, guild: disnake.Guild):